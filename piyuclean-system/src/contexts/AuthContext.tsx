@@ -1,5 +1,5 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
-import { login as apiLogin, studentLogin as apiStudentLogin, type AdminUser, type Student } from '@/lib/api';
+import { login as apiLogin, studentLogin as apiStudentLogin, clearTokens, type AdminUser, type Student } from '@/lib/api';
 
 type User = AdminUser | (Student & { role: string });
 
@@ -19,7 +19,7 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    // load from session storage to preserve simple session without backend tokens yet
+    // load from session storage; the API tokens are kept alongside by lib/api
     const raw = sessionStorage.getItem('ccms_current_user');
     setUser(raw ? JSON.parse(raw) : null);
     setLoading(false);
@@ -49,6 +49,7 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
 
   const logout = () => {
     sessionStorage.removeItem('ccms_current_user');
+    clearTokens();
     setUser(null);
   };
 
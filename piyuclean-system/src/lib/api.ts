@@ -96,12 +96,71 @@ export interface StudentPerformanceResponse {
 }
 
 const API_BASE = '/api';
+const TOKENS_KEY = 'ccms_tokens';
 
-async function http<T>(path: string, init?: RequestInit): Promise<T> {
+interface TokenResponse {
+  accessToken: string;
+  refreshToken: string;
+  tokenType: 'Bearer';
+  expiresIn: number;
+}
+
+interface Tokens {
+  accessToken: string;
+  refreshToken: string;
+}
+
+function loadTokens(): Tokens | null {
+  const raw = sessionStorage.getItem(TOKENS_KEY);
+  return raw ? JSON.parse(raw) : null;
+}
+
+function saveTokens(tokens: Tokens) {
+  sessionStorage.setItem(TOKENS_KEY, JSON.stringify(tokens));
+}
+
+export function clearTokens() {
+  sessionStorage.removeItem(TOKENS_KEY);
+}
+
+// Keep the user fields; store the tokens for later requests
+function takeTokens<T>(res: T & TokenResponse): T {
+  const { accessToken, refreshToken, tokenType, expiresIn, ...user } = res;
+  saveTokens({ accessToken, refreshToken });
+  return user as unknown as T;
+}
+
+// Exchange the refresh token for a new access token; false if the session is over
+async function refreshAccessToken(): Promise<boolean> {
+  const tokens = loadTokens();
+  if (!tokens) return false;
+  const res = await fetch(`${API_BASE}/auth/refresh`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ refreshToken: tokens.refreshToken }),
+  });
+  if (!res.ok) {
+    clearTokens();
+    return false;
+  }
+  const { accessToken } = await res.json();
+  saveTokens({ ...tokens, accessToken });
+  return true;
+}
+
+async function http<T>(path: string, init?: RequestInit, retry = true): Promise<T> {
+  const tokens = loadTokens();
   const res = await fetch(`${API_BASE}${path}`, {
-    headers: { 'Content-Type': 'application/json', ...(init?.headers || {}) },
     ...init,
+    headers: {
+      'Content-Type': 'application/json',
+      ...(tokens ? { Authorization: `Bearer ${tokens.accessToken}` } : {}),
+      ...(init?.headers || {}),
+    },
   });
+  if (res.status === 401 && retry && tokens && (await refreshAccessToken())) {
+    return http<T>(path, init, false);
+  }
   if (!res.ok) {
     const text = await res.text();
     throw new Error(text || `HTTP ${res.status}`);
@@ -111,11 +170,12 @@ async function http<T>(path: string, init?: RequestInit): Promise<T> {
 
 // Auth
 export async function login(username: string, password: string): Promise<AdminUser> {
-  return http<AdminUser>('/auth/login', { method: 'POST', body: JSON.stringify({ username, password }) });
+  const res = await http<AdminUser & TokenResponse>('/auth/login', { method: 'POST', body: JSON.stringify({ username, password }) }, false);
+  return takeTokens(res);
 }
 export async function studentLogin(studentId: string, password: string): Promise<Student & { role: 'Student' } > {
-  const s = await http<Student & { role: 'Student' }>('/auth/student-login', { method: 'POST', body: JSON.stringify({ studentId, password }) });
-  return s;
+  const s = await http<Student & { role: 'Student' } & TokenResponse>('/auth/student-login', { method: 'POST', body: JSON.stringify({ studentId, password }) }, false);
+  return takeTokens(s);
 }
 
 // Students
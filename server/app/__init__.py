@@ -2,17 +2,28 @@ from flask import Flask
 from flask_cors import CORS
 from flask_migrate import Migrate
 from .db import db
+from . import audit, compression, replica, rollover, tenancy, tokens
 from .config import Config
+from .json_provider import OrjsonProvider
 
 migrate = Migrate()
 
 
 def create_app(config_class: type[Config] = Config) -> Flask:
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     app.config.from_object(config_class)
 
+    # Registered first so its after_request hook runs last, on the final body
+    compression.init_app(app)
     db.init_app(app)
     migrate.init_app(app, db)
+    replica.init_app(app)
+    tenancy.init_app(app)
+    # After tenancy, so tokens are checked against the resolved tenant
+    tokens.init_app(app)
+    audit.init_app(app)
+    rollover.init_app(app)
     CORS(app, resources={r"/api/*": {"origins": app.config.get("CORS_ORIGINS", "*")}})
 
     # Blueprints
@@ -24,6 +35,10 @@ def create_app(config_class: type[Config] = Config) -> Flask:
     from .routes.assignments import bp as assignments_bp
     from .routes.admin_users import bp as admin_users_bp
     from .routes.reports import bp as reports_bp
+    from .routes.templates import bp as templates_bp
+    from .routes.dashboard import bp as dashboard_bp
+    from .routes.audit import bp as audit_bp
+    from .routes.rollover import bp as rollover_bp
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(students_bp, url_prefix="/api/students")
@@ -33,11 +48,24 @@ def create_app(config_class: type[Config] = Config) -> Flask:
     app.register_blueprint(assignments_bp, url_prefix="/api/assignments")
     app.register_blueprint(admin_users_bp, url_prefix="/api/admin-users")
     app.register_blueprint(reports_bp, url_prefix="/api/reports")
+    app.register_blueprint(templates_bp, url_prefix="/api/assignment-templates")
+    app.register_blueprint(dashboard_bp, url_prefix="/api/dashboard")
+    app.register_blueprint(audit_bp, url_prefix="/api/audit")
+    app.register_blueprint(rollover_bp, url_prefix="/api/rollover")
 
     @app.get("/api/health")
     def health():
         return {"status": "ok"}
 
+    @app.get("/api/metrics")
+    def metrics():
+        stats = app.extensions.get("compression")
+        writer = app.extensions.get("audit")
+        return {
+            "compression": stats.as_dict() if stats else None,
+            "audit": {"written": writer.written, "dropped": writer.dropped} if writer else None,
+        }
+
     # CLI seed command
     from .seed import seed_data
 
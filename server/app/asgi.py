@@ -0,0 +1,146 @@
+"""ASGI entry point serving the same Flask app.
+
+* ``GET``/``HEAD`` requests (lists, reports, dashboard, health) run the
+  unchanged Flask views on the event loop. Their ``db.session`` is the sync
+  side of an ``AsyncSession`` (``AsyncSession.run_sync``), so every query
+  goes through an async driver (aiosqlite, or psycopg's async mode for
+  PostgreSQL) and the loop keeps serving other requests while it waits.
+* Every other request is dispatched to Flask as usual in a small thread
+  pool (``ASGI_WRITE_THREADS``), with the regular engines.
+
+Run with ``uvicorn asgi:app``. ``wsgi.py`` is unchanged.
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from . import create_app
+from .config import Config
+from .db import db, bind_key, RoutingSession
+
+ASYNC_METHODS = ("GET", "HEAD")
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+psycopg_async"}
+
+
+class AsyncBridgeSession(RoutingSession):
+    """``RoutingSession`` whose binds are the sync facades of async engines (used inside ``run_sync``)."""
+
+    def __init__(self, engines: dict, **kwargs):
+        super().__init__(db, **kwargs)
+        self._async_engines = engines
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+        return self._async_engines[bind_key(self, self._async_engines, mapper, clause)].sync_engine
+
+
+def async_engines(app: Flask) -> dict:
+    """An async engine for each of the app's binds (None is the default database), keyed like ``db.engines``."""
+    with app.app_context():
+        urls = {key: engine.url for key, engine in db.engines.items()}
+    engines = {}
+    for key, url in urls.items():
+        backend = url.get_backend_name()
+        # SQLite keeps SQLAlchemy's own pool defaults, as it does for the sync engine
+        options = {} if backend == "sqlite" else app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+        engines[key] = create_async_engine(make_url(url).set(drivername=ASYNC_DRIVERS.get(backend, url.drivername)), **options)
+    return engines
+
+
+def _environ(scope: dict, body: bytes) -> dict:
+    """WSGI environ for an ASGI HTTP scope."""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        # The whole body is buffered, so it can be read to the end even without Content-Length
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope["headers"]:
+        name, value = raw_name.decode("latin1").upper().replace("-", "_"), raw_value.decode("latin1")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _dispatch(app: Flask, environ: dict, session=None) -> tuple[int, list, bytes]:
+    """Run one request through Flask like ``Flask.wsgi_app``; ``session`` replaces ``db.session`` for it."""
+    ctx = app.request_context(environ)
+    error = None
+    try:
+        try:
+            ctx.push()
+            if session is not None:
+                # Scoped to this request's app context; removed again on teardown
+                db.session.registry.set(session)
+            response = app.full_dispatch_request()
+        except Exception as e:
+            error = e
+            response = app.handle_exception(e)
+        body = b"" if environ["REQUEST_METHOD"] == "HEAD" else response.get_data()
+        return response.status_code, response.headers.to_wsgi_list(), body
+    finally:
+        ctx.pop(error)
+
+
+def create_asgi_app(config_class: type[Config] = Config):
+    app = create_app(config_class)
+    engines = async_engines(app)
+    pool = ThreadPoolExecutor(app.config.get("ASGI_WRITE_THREADS", 8), thread_name_prefix="asgi-write")
+
+    async def serve(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    for engine in engines.values():
+                        await engine.dispose()
+                    pool.shutdown()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        environ = _environ(scope, body)
+
+        if scope["method"] in ASYNC_METHODS:
+            async with AsyncSession(sync_session_class=AsyncBridgeSession, engines=engines, query_cls=db.Query) as session:
+                status, headers, payload = await session.run_sync(lambda sync: _dispatch(app, environ, sync))
+        else:
+            status, headers, payload = await asyncio.get_running_loop().run_in_executor(pool, _dispatch, app, environ)
+
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(k.lower().encode("latin1"), v.encode("latin1")) for k, v in headers],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    serve.flask_app = app
+    serve.engines = engines
+    return serve
@@ -0,0 +1,282 @@
+"""Buffered, append-only audit log of committed mutations.
+
+Changes are captured from SQLAlchemy session events, so route handlers do not
+write audit rows themselves:
+
+* ORM flushes record per-field ``[before, after]`` pairs for every
+  ``BaseModel`` insert, update and delete.
+* Statement-level updates (``BaseModel.conditional_update``) record
+  ``[before, after]`` too. On PostgreSQL the UPDATE itself returns the old
+  values: it joins a locked ``SELECT ... FOR UPDATE`` of the matched rows
+  (``UPDATE ... FROM (SELECT ...) old RETURNING old.*``). SQLite returns the
+  new values for such a join, so there the rows are read with a separate
+  SELECT just before the UPDATE. Statement-level deletes that carry the same
+  option record the columns they return.
+
+Entries are handed to a background thread on commit and dropped on rollback.
+The thread writes them in batched multi-row INSERTs into ``audit_log`` (or as
+JSON lines to a rotating file when ``AUDIT_FILE`` is set). The buffer is
+bounded: when it is full, new entries are dropped and counted instead of
+blocking requests. Pending entries are flushed when the process exits.
+"""
+import atexit
+import json
+import logging
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from flask import Flask, current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event, inspect, insert, select
+from sqlalchemy.orm import Session
+# Imported first so their do_orm_execute listeners run before ours, which returns a result
+from . import cache, report_cache, tenancy  # noqa: F401
+from .db import db, current_tenant
+from .models.models import AuditLog, BaseModel
+
+log = logging.getLogger(__name__)
+
+REDACTED = "***"
+REDACTED_FIELDS = {"password_hash"}
+# Execution option carrying the SET values of a statement-level update (see conditional_update);
+# an empty dict on a DELETE ... RETURNING marks it for auditing
+AUDIT_VALUES_OPTION = "audit_values"
+# Label prefix of the old values an UPDATE returns on PostgreSQL; removed before the caller sees the rows
+BEFORE_PREFIX = "audit_before_"
+
+
+def _jsonable(field: str, value):
+    if field in REDACTED_FIELDS and value is not None:
+        return REDACTED
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _public_id(obj) -> str:
+    return obj.ext_id or str(obj.id)
+
+
+def _actor_and_source() -> tuple[str | None, str | None]:
+    if not has_request_context():
+        return None, None
+    principal = g.get("principal")
+    actor = principal.key if principal else request.headers.get("X-Actor")
+    return actor, f"{request.method} {request.path}"[:255]
+
+
+class AuditWriter:
+    """Background thread draining a bounded queue into batched inserts or a file."""
+
+    def __init__(self, engine=None, file_path: str | None = None, max_queue: int = 10000,
+                 batch_size: int = 500, flush_seconds: float = 1.0, file_max_bytes: int = 10_000_000,
+                 file_backups: int = 5):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.dropped = 0
+        self.written = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._file_logger = None
+        if file_path:
+            handler = RotatingFileHandler(file_path, maxBytes=file_max_bytes, backupCount=file_backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._file_logger = logging.getLogger(f"{__name__}.file.{id(self)}")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.addHandler(handler)
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def enqueue(self, entries: list[dict]):
+        for entry in entries:
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                self.dropped += 1
+        if self.dropped and self.dropped % 1000 == 1:
+            log.warning("Audit buffer full, %s entries dropped so far", self.dropped)
+
+    def flush(self):
+        """Write everything queued so far (called by the thread, on close and in tests)."""
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout=10)
+        try:
+            self.flush()
+        except Exception:
+            log.exception("Failed to flush audit log on shutdown")
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception:  # keep the writer alive; the entries of the failed batch are lost
+                log.exception("Failed to write audit batch")
+
+    def _write(self, batch: list[dict]):
+        if self._file_logger:
+            for entry in batch:
+                self._file_logger.info(json.dumps({**entry, "occurred_at": entry["occurred_at"].isoformat()}))
+        else:
+            with self.engine.begin() as conn:
+                # A single executemany; SQLAlchemy renders it as multi-row INSERT ... VALUES batches
+                conn.execute(insert(AuditLog.__table__), batch)
+        self.written += len(batch)
+
+
+def init_app(app: Flask):
+    if not app.config.get("AUDIT_ENABLED", True):
+        return
+    with app.app_context():
+        engine = db.engine
+    app.extensions["audit"] = AuditWriter(
+        engine=engine,
+        file_path=app.config.get("AUDIT_FILE"),
+        max_queue=app.config.get("AUDIT_QUEUE_SIZE", 10000),
+        batch_size=app.config.get("AUDIT_BATCH_SIZE", 500),
+        flush_seconds=app.config.get("AUDIT_FLUSH_SECONDS", 1.0),
+        file_max_bytes=app.config.get("AUDIT_FILE_MAX_BYTES", 10_000_000),
+        file_backups=app.config.get("AUDIT_FILE_BACKUPS", 5),
+    )
+
+
+def _writer() -> AuditWriter | None:
+    return current_app.extensions.get("audit") if has_app_context() else None
+
+
+def _entry(action: str, entity: str, entity_id: str, changes: dict) -> dict:
+    actor, source = _actor_and_source()
+    return {
+        "occurred_at": datetime.now(timezone.utc),
+        "tenant_id": current_tenant(),
+        "actor": actor,
+        "source": source,
+        "action": action,
+        "entity": entity,
+        "entity_id": entity_id,
+        "changes": json.dumps(changes, default=str),
+    }
+
+
+def _pending(session) -> list[dict]:
+    return session.info.setdefault("audit_pending", [])
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_flush(session, flush_context):
+    if _writer() is None:
+        return
+    pending = _pending(session)
+    for obj in session.new:
+        if isinstance(obj, BaseModel):
+            changes = {c.key: [None, _jsonable(c.key, getattr(obj, c.key))] for c in inspect(obj).mapper.column_attrs}
+            pending.append(_entry("insert", obj.__tablename__, _public_id(obj), changes))
+    for obj in session.dirty:
+        if isinstance(obj, BaseModel):
+            state = inspect(obj)
+            changes = {}
+            for attr in state.mapper.column_attrs:
+                hist = state.attrs[attr.key].history
+                if hist.has_changes():
+                    before = hist.deleted[0] if hist.deleted else None
+                    after = hist.added[0] if hist.added else None
+                    changes[attr.key] = [_jsonable(attr.key, before), _jsonable(attr.key, after)]
+            if changes:
+                pending.append(_entry("update", obj.__tablename__, _public_id(obj), changes))
+    for obj in session.deleted:
+        if isinstance(obj, BaseModel):
+            changes = {c.key: [_jsonable(c.key, getattr(obj, c.key)), None] for c in inspect(obj).mapper.column_attrs}
+            pending.append(_entry("delete", obj.__tablename__, _public_id(obj), changes))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _capture_statement_write(orm_execute_state):
+    state = orm_execute_state
+    values = state.execution_options.get(AUDIT_VALUES_OPTION)
+    if values is None or not (state.is_update or state.is_delete) or _writer() is None:
+        return None
+    entity = state.bind_mapper.local_table.name
+    statement, before = state.statement, {}
+    if state.is_update and state.statement.whereclause is not None:
+        if state.session.get_bind(mapper=state.bind_mapper, clause=state.statement).dialect.name == "postgresql":
+            statement = _returning_old_values(state, values)
+        else:
+            before = _current_values(state, values)
+    # Run the UPDATE/DELETE ... RETURNING ourselves so the returned rows can be
+    # both recorded here and handed back to the caller
+    frozen = state.invoke_statement(statement=statement).freeze()
+    pending = _pending(state.session)
+    for row in frozen().all():
+        if state.is_update:
+            mapping = row._mapping
+            old = before.get(row.id) or {
+                k[len(BEFORE_PREFIX):]: v for k, v in mapping.items() if k.startswith(BEFORE_PREFIX)
+            }
+            changes = {k: [_jsonable(k, old.get(k)), _jsonable(k, v)] for k, v in {**values, "version": row.version}.items()}
+            pending.append(_entry("update", entity, row.ext_id or str(row.id), changes))
+        else:
+            # A statement-level delete records the columns it returned
+            changes = {k: [_jsonable(k, v), None] for k, v in row._mapping.items()}
+            pending.append(_entry("delete", entity, row.ext_id or str(row.id), changes))
+    result = frozen()
+    if statement is state.statement:
+        return result
+    return result.columns(*[k for k in result.keys() if not k.startswith(BEFORE_PREFIX)])
+
+
+def _audited_columns(state, values: dict) -> list:
+    columns = state.bind_mapper.columns
+    return [columns[k] for k in (*values, "version") if k in columns]
+
+
+def _returning_old_values(state, values: dict):
+    """The UPDATE, joined to a locked snapshot of the rows it matches, also returning their old values."""
+    columns = state.bind_mapper.columns
+    selected = _audited_columns(state, values)
+    old = (
+        select(columns["id"], *selected).where(state.statement.whereclause).with_for_update()
+        .subquery("old")
+    )
+    return state.statement.where(columns["id"] == old.c.id).returning(
+        *(old.c[c.key].label(BEFORE_PREFIX + c.key) for c in selected)
+    )
+
+
+def _current_values(state, values: dict) -> dict:
+    """id -> {column: value} of the rows a statement-level UPDATE is about to change.
+
+    The fallback for databases other than PostgreSQL, with one extra SELECT.
+    """
+    columns = state.bind_mapper.columns
+    selected = _audited_columns(state, values)
+    rows = state.session.execute(select(columns["id"], *selected).where(state.statement.whereclause).with_for_update())
+    return {row[0]: dict(zip((c.key for c in selected), row[1:])) for row in rows}
+
+
+@event.listens_for(Session, "after_commit")
+def _publish(session):
+    entries = session.info.pop("audit_pending", None)
+    writer = _writer()
+    if entries and writer is not None:
+        writer.enqueue(entries)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop("audit_pending", None)
@@ -0,0 +1,303 @@
+"""Micro-benchmarks for the API against a generated dataset.
+
+Runs against a throwaway SQLite file unless ``--database-url`` points at a
+scratch database (it is populated, so never point it at real data)::
+
+    python -m app.bench --students 2000 --days 60
+    python -m app.bench --only /api/students/ --repeat 20
+    python -m app.bench --no-audit   # compare write latency without the audit log
+    python -m app.bench --encoding br   # response sizes and CPU with compression
+    python -m app.bench --concurrency 64   # read throughput, WSGI threads vs the ASGI entry point
+    python -m app.bench --concurrency 64 --db-latency 2   # ... with a 2 ms database round trip
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from sqlalchemy import event, insert
+from sqlalchemy.util import await_only
+from . import create_app
+from .asgi import create_asgi_app
+from .config import Config
+from .db import db
+from .tokens import ACCESS, issue_token
+from .models.models import (
+    AdminUser, Student, Classroom, CleaningTask, Checklist, ChecklistTask, TaskAssignment, TaskAssignmentStudent,
+)
+
+READ_ENDPOINTS = [
+    "/api/students/",
+    "/api/classrooms/",
+    "/api/tasks/",
+    "/api/checklists/",
+    "/api/assignments/",
+    "/api/assignments/expanded",
+    "/api/reports/weekly-summary",
+    "/api/reports/student-performance",
+    "/api/dashboard/",
+]
+
+# (method, path, JSON body); ids exist in every populate() dataset
+WRITE_ENDPOINTS = [
+    ("put", "/api/students/student-1", {"firstName": "Bench"}),
+    ("put", "/api/classrooms/classroom-1", {"name": "Bench Room"}),
+    ("put", "/api/assignments/a-1", {"status": "completed", "comments": "bench"}),
+]
+
+
+def populate(students: int = 500, classrooms: int = 30, days: int = 30, group_size: int = 5, seed: int = 1):
+    """Insert a synthetic school: one assignment per classroom per weekday for ``days`` days."""
+    rnd = random.Random(seed)
+    password_hash = Student.hash_password("student123")
+    admin = AdminUser(ext_id="1", username="admin", full_name="System Administrator", role="Administrator", status="active")
+    admin.set_password("admin123")
+    db.session.add(admin)
+
+    db.session.execute(insert(Student), [
+        {
+            "id": i, "ext_id": f"student-{i}", "student_id": f"2024{i:05d}", "first_name": f"First{i}",
+            "last_name": f"Last{i % 97}", "class_section": f"BSIT {1 + i % 4}{'ABCD'[i % 4]}",
+            "status": "active", "password_hash": password_hash,
+        }
+        for i in range(1, students + 1)
+    ])
+    db.session.execute(insert(Classroom), [
+        {"id": i, "ext_id": f"classroom-{i}", "classroom_id": f"ROOM-{i:03d}", "name": f"Room {i}", "description": "Generated"}
+        for i in range(1, classrooms + 1)
+    ])
+    db.session.execute(insert(CleaningTask), [
+        {"id": i, "ext_id": f"task-{i}", "name": f"Task {i}", "description": "Generated"} for i in range(1, 9)
+    ])
+    db.session.execute(insert(Checklist), [
+        {"id": 1, "ext_id": "checklist-1", "name": "Daily", "description": "Generated"},
+        {"id": 2, "ext_id": "checklist-2", "name": "Weekly", "description": "Generated"},
+    ])
+    db.session.execute(insert(ChecklistTask), [
+        {"checklist_id": 1, "task_id": t, "position": t} for t in range(1, 4)
+    ] + [
+        {"checklist_id": 2, "task_id": t, "position": t} for t in range(1, 9)
+    ])
+
+    statuses = ["assigned", "pending", "completed", "completed", "overdue"]
+    assignments, links = [], []
+    start = date.today() - timedelta(days=days - 1)
+    pk = 0
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        for room in range(1, classrooms + 1):
+            pk += 1
+            status = rnd.choice(statuses)
+            assignments.append({
+                "id": pk, "ext_id": f"a-{pk}", "date": day, "classroom_id": room,
+                "checklist_id": 2 if day.weekday() == 4 else 1, "status": status, "comments": None,
+            })
+            for sid in rnd.sample(range(1, students + 1), min(group_size, students)):
+                links.append({"assignment_id": pk, "student_id": sid})
+    if assignments:
+        db.session.execute(insert(TaskAssignment), assignments)
+        db.session.execute(insert(TaskAssignmentStudent), links)
+    db.session.commit()
+    return {"students": students, "classrooms": classrooms, "assignments": len(assignments), "links": len(links)}
+
+
+def auth_headers(app) -> dict:
+    """Bearer token for the admin created by populate()."""
+    with app.app_context():
+        return {"Authorization": f"Bearer {issue_token(ACCESS, 'admin', '1', 'Administrator')}"}
+
+
+def measure(client, method: str, path: str, repeat: int = 10, **kwargs) -> dict:
+    """Mean wall/CPU milliseconds and peak traced allocation (KiB) for one request."""
+    getattr(client, method)(path, **kwargs)  # warm-up
+    wall, cpu = [], []
+    for _ in range(repeat):
+        w, c = time.perf_counter(), time.process_time()
+        resp = getattr(client, method)(path, **kwargs)
+        cpu.append(time.process_time() - c)
+        wall.append(time.perf_counter() - w)
+
+    tracemalloc.start()
+    getattr(client, method)(path, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "path": f"{method.upper()} {path}",
+        "status": resp.status_code,
+        "bytes": len(resp.get_data()),
+        "wall_ms": statistics.mean(wall) * 1000,
+        "cpu_ms": statistics.mean(cpu) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def simulate_db_latency(app, asgi_app, seconds: float):
+    """Add a network round trip to every statement, blocking for the sync engines and awaiting for the async ones."""
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", lambda *args: time.sleep(seconds))
+    for engine in asgi_app.engines.values():
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: await_only(asyncio.sleep(seconds)))
+
+
+def _throughput(server: str, concurrency: int, latencies: list[float], errors: int, elapsed: float) -> dict:
+    latencies.sort()
+    return {
+        "server": server,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def wsgi_throughput(app, paths: list[str], headers: dict, concurrency: int, requests: int, threads: int) -> dict:
+    """Requests/s and latency for ``concurrency`` concurrent clients of a WSGI server with ``threads`` threads.
+
+    Latency includes the time a request waits for a free thread.
+    """
+    def one(path, queued):
+        status = app.test_client().get(path, headers=headers).status_code
+        return time.perf_counter() - queued, status
+
+    # Clients send their next request as soon as the previous one is answered
+    results = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as server, ThreadPoolExecutor(concurrency) as clients:
+        def client(n):
+            return [server.submit(one, paths[i % len(paths)], time.perf_counter()).result() for i in range(n, requests, concurrency)]
+        for batch in clients.map(client, range(concurrency)):
+            results += batch
+    elapsed = time.perf_counter() - start
+    return _throughput("wsgi", concurrency, [r[0] for r in results], sum(r[1] >= 400 for r in results), elapsed)
+
+
+def asgi_throughput(asgi_app, paths: list[str], headers: dict, concurrency: int, requests: int) -> dict:
+    """Requests/s and latency with ``concurrency`` concurrent requests to the ASGI app on one event loop."""
+    raw_headers = [(k.lower().encode("latin1"), v.encode("latin1")) for k, v in headers.items()]
+
+    async def one(path, limit):
+        async with limit:
+            path, _, query = path.partition("?")
+            scope = {"type": "http", "method": "GET", "path": path, "query_string": query.encode(),
+                     "headers": raw_headers, "http_version": "1.1", "scheme": "http"}
+            sent = []
+
+            async def receive():
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def send(message):
+                sent.append(message)
+
+            start = time.perf_counter()
+            await asgi_app(scope, receive, send)
+            return time.perf_counter() - start, sent[0]["status"]
+
+    async def run():
+        limit = asyncio.Semaphore(concurrency)
+        try:
+            return await asyncio.gather(*(one(paths[i % len(paths)], limit) for i in range(requests)))
+        finally:
+            # Pooled connections belong to this event loop
+            for engine in asgi_app.engines.values():
+                await engine.dispose()
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    return _throughput("asgi", concurrency, [r[0] for r in results], sum(r[1] >= 400 for r in results), elapsed)
+
+
+def print_throughput(rows: list[dict]):
+    print(f"{'server':<8} {'concurrency':>11} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for r in rows:
+        print(f"{r['server']:<8} {r['concurrency']:>11} {r['requests']:>9} {r['errors']:>7} "
+              f"{r['rps']:>9.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f}")
+
+
+def print_table(rows: list[dict]):
+    print(f"{'endpoint':<42} {'status':>6} {'bytes':>10} {'wall ms':>9} {'cpu ms':>9} {'peak KiB':>9}")
+    for r in rows:
+        print(f"{r['path']:<42} {r['status']:>6} {r['bytes']:>10} {r['wall_ms']:>9.2f} {r['cpu_ms']:>9.2f} {r['peak_kib']:>9.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="scratch database to populate (default: temporary SQLite file)")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--classrooms", type=int, default=30)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--only", action="append", help="benchmark only this path (repeatable)")
+    parser.add_argument("--encoding", help="Accept-Encoding to send, e.g. 'br' or 'gzip' (default: none)")
+    parser.add_argument("--no-audit", action="store_true", help="disable the audit log (AUDIT_ENABLED=False)")
+    parser.add_argument("--concurrency", type=int, action="append",
+                        help="compare WSGI and ASGI read throughput at this many concurrent requests (repeatable)")
+    parser.add_argument("--requests", type=int, default=300, help="requests per throughput run")
+    parser.add_argument("--wsgi-threads", type=int, default=8,
+                        help="threads of the WSGI server being compared against (e.g. gunicorn --threads)")
+    parser.add_argument("--db-latency", type=float, default=0,
+                        help="milliseconds of simulated database round trip per statement in throughput runs")
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    if not args.database_url:
+        tmpdir = tempfile.TemporaryDirectory()
+        args.database_url = "sqlite:///" + os.path.join(tmpdir.name, "bench.db")
+
+    config = type("BenchConfig", (Config,), {
+        "SQLALCHEMY_DATABASE_URI": args.database_url,
+        "AUDIT_ENABLED": not args.no_audit,
+    })
+    # The ASGI entry point wraps its own Flask app; benchmark that one for both servers
+    asgi_app = create_asgi_app(config) if args.concurrency else None
+    app = asgi_app.flask_app if asgi_app else create_app(config)
+    with app.app_context():
+        db.create_all()
+        sizes = populate(args.students, args.classrooms, args.days)
+        print("dataset:", ", ".join(f"{k}={v}" for k, v in sizes.items()))
+
+    client = app.test_client()
+    headers = auth_headers(app)
+    if args.encoding:
+        headers["Accept-Encoding"] = args.encoding
+    write_paths = {path for _, path, _ in WRITE_ENDPOINTS}
+    if args.concurrency:
+        paths = [p for p in args.only or READ_ENDPOINTS if p not in write_paths]
+        if args.db_latency:
+            simulate_db_latency(app, asgi_app, args.db_latency / 1000)
+        rows = []
+        for concurrency in args.concurrency:
+            rows.append(wsgi_throughput(app, paths, headers, concurrency, args.requests, args.wsgi_threads))
+            rows.append(asgi_throughput(asgi_app, paths, headers, concurrency, args.requests))
+        print_throughput(rows)
+        if tmpdir:
+            tmpdir.cleanup()
+        return
+
+    rows = [measure(client, "get", p, args.repeat, headers=headers) for p in args.only or READ_ENDPOINTS if p not in write_paths]
+    rows += [
+        measure(client, method, path, args.repeat, json=body, headers=headers)
+        for method, path, body in WRITE_ENDPOINTS
+        if not args.only or path in args.only
+    ]
+    print_table(rows)
+    if "compression" in app.extensions:
+        print("compression:", app.extensions["compression"].as_dict())
+    if "audit" in app.extensions:
+        app.extensions["audit"].close()
+    if tmpdir:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
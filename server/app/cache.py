@@ -0,0 +1,83 @@
+"""Small in-process caches that are dropped whenever the database changes.
+
+Each worker process keeps its own copy, so entries also expire after a short
+TTL to bound staleness across workers.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_write_invalidated: list["TTLCache"] = []
+
+
+class TTLCache:
+    """Entries expire after ``ttl`` seconds; beyond ``max_size`` the least recently used are evicted."""
+
+    def __init__(self, ttl: float, max_size: int = 1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._items: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            hit = self._items.get(key)
+            if not hit:
+                return None
+            expires, value = hit
+            if expires < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._items[key] = (now + self.ttl, value)
+            self._items.move_to_end(key)
+            # Entries that are never read again would otherwise stay forever
+            while self._items:
+                oldest_key, (expires, _) = next(iter(self._items.items()))
+                if len(self._items) <= self.max_size and expires >= now:
+                    break
+                del self._items[oldest_key]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+def invalidate_on_write(cache: TTLCache) -> TTLCache:
+    """Clear ``cache`` after any commit that flushed changes."""
+    _write_invalidated.append(cache)
+    return cache
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_dirty(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    # Statement-level UPDATE/DELETE (e.g. conditional_update) bypasses the flush
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_caches(session):
+    if session.info.pop("has_writes", False):
+        for cache in _write_invalidated:
+            cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_writes(session):
+    session.info.pop("has_writes", None)
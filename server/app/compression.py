@@ -0,0 +1,227 @@
+"""Negotiated response compression (zstd, brotli, gzip).
+
+* The encoding is picked from ``Accept-Encoding`` (q-values honoured, server
+  preference zstd > br > gzip among those installed).
+* Bodies smaller than ``COMPRESS_MIN_SIZE`` are sent as-is.
+* Streamed responses are compressed chunk by chunk with a sync flush after
+  each chunk, so clients still receive data as it is produced.
+* For cacheable GETs the compressed body is kept in a bounded LRU keyed by
+  (encoding, digest of the uncompressed body), so an unchanged list is not
+  compressed again on every request.
+
+Counters (bytes in/out, bytes saved, CPU time, cache hits) are exposed through
+``GET /api/metrics``.
+"""
+import gzip
+import hashlib
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from flask import Flask, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional codec
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional codec
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/")
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+
+class _GzipStream:
+    def __init__(self):
+        self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def end(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def end(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdStream:
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def end(self) -> bytes:
+        return self._obj.flush()
+
+
+# encoding -> (one-shot compress, streaming compressor), in server preference order
+CODECS = {}
+if zstandard is not None:
+    CODECS["zstd"] = (lambda data: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data), _ZstdStream)
+if brotli is not None:
+    CODECS["br"] = (lambda data: brotli.compress(data, quality=BROTLI_QUALITY), _BrotliStream)
+CODECS["gzip"] = (lambda data: gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0), _GzipStream)
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Best available encoding the client accepts, or None for identity."""
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    for encoding in CODECS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+        self.cache_hits = 0
+        self.by_encoding: dict[str, int] = {}
+
+    def add(self, encoding: str, bytes_in: int, bytes_out: int, cpu: float = 0.0, cached: bool = False):
+        with self._lock:
+            self.responses += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.cpu_seconds += cpu
+            self.cache_hits += cached
+            self.by_encoding[encoding] = self.by_encoding.get(encoding, 0) + 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "bytesIn": self.bytes_in,
+                "bytesOut": self.bytes_out,
+                "bytesSaved": self.bytes_in - self.bytes_out,
+                "cpuMs": round(self.cpu_seconds * 1000, 3),
+                "cacheHits": self.cache_hits,
+                "byEncoding": dict(self.by_encoding),
+            }
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies bounded by total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._size = 0
+        self._lock = threading.Lock()
+        self._items: OrderedDict[tuple[str, bytes], bytes] = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            body = self._items.get(key)
+            if body is not None:
+                self._items.move_to_end(key)
+            return body
+
+    def set(self, key, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, old = self._items.popitem(last=False)
+                self._size -= len(old)
+
+
+def _stream(chunks, encoding: str, stats: CompressionStats):
+    stream = CODECS[encoding][1]()
+    bytes_in = bytes_out = 0
+    cpu = 0.0
+    for data in chunks:
+        if isinstance(data, str):
+            data = data.encode()
+        start = time.process_time()
+        out = stream.chunk(data)
+        cpu += time.process_time() - start
+        bytes_in += len(data)
+        bytes_out += len(out)
+        if out:
+            yield out
+    start = time.process_time()
+    out = stream.end()
+    cpu += time.process_time() - start
+    stats.add(encoding, bytes_in, bytes_out + len(out), cpu)
+    yield out
+
+
+def init_app(app: Flask):
+    if not app.config.get("COMPRESS_ENABLED", True):
+        return
+    min_size = app.config.get("COMPRESS_MIN_SIZE", 1024)
+    stats = CompressionStats()
+    cache = CompressedBodyCache(app.config.get("COMPRESS_CACHE_BYTES", 64 * 1024 * 1024))
+    app.extensions["compression"] = stats
+
+    @app.after_request
+    def _compress(response):
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or not (response.mimetype or "").startswith(COMPRESSIBLE_MIMETYPES)
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""))
+        if not encoding:
+            return response
+
+        if response.is_streamed:
+            response.response = _stream(response.response, encoding, stats)
+            response.headers.pop("Content-Length", None)
+            response.headers["Content-Encoding"] = encoding
+            return response
+
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+
+        cacheable = request.method in ("GET", "HEAD") and "no-store" not in (response.headers.get("Cache-Control") or "")
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest()) if cacheable else None
+        compressed = cache.get(key) if key else None
+        if compressed is not None:
+            stats.add(encoding, len(body), len(compressed), cached=True)
+        else:
+            start = time.process_time()
+            compressed = CODECS[encoding][0](body)
+            stats.add(encoding, len(body), len(compressed), time.process_time() - start)
+            if key:
+                cache.set(key, compressed)
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,40 @@
+"""Optimistic concurrency helpers for the PUT handlers.
+
+Clients send the version they last saw either as an ``If-Match`` header
+(``"3"`` or ``W/"3"``, as returned in ``ETag``) or as ``version`` in the JSON
+body. Updates run as one conditional UPDATE; a version mismatch returns 412.
+"""
+from typing import Optional
+from flask import jsonify, request
+
+
+def expected_version(data: dict) -> Optional[int]:
+    """Version the client expects to overwrite, or None for an unconditional update.
+
+    Raises ValueError for malformed values.
+    """
+    header = request.headers.get("If-Match")
+    if header and header.strip() != "*":
+        return int(header.strip().removeprefix("W/").strip('"'))
+    if data.get("version") is not None:
+        return int(data["version"])
+    return None
+
+
+def versioned_response(row, status: int = 200):
+    """JSON ``{"id", "version"}`` with a matching ETag for a conditional_update result row."""
+    resp = jsonify({"id": row.ext_id or str(row.id), "version": row.version})
+    resp.status_code = status
+    resp.headers["ETag"] = f'"{row.version}"'
+    return resp
+
+
+def update_failed(model, identifier: str):
+    """Explain why conditional_update matched nothing: 404 if missing, else 412 with the current version."""
+    obj = model.get_by_identifier(identifier)
+    if not obj:
+        return jsonify({"message": "Not found"}), 404
+    resp = jsonify({"message": "Version conflict", "id": obj.ext_id or str(obj.id), "version": obj.version})
+    resp.status_code = 412
+    resp.headers["ETag"] = f'"{obj.version}"'
+    return resp
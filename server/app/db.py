@@ -1,4 +1,99 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import Select
 
+REPLICA_BIND = "replica"
+DEFAULT_TENANT = "default"
+# Tables shared by all tenants; they always live in the default database
+GLOBAL_TABLES = {"tenants", "audit_log", "revocations"}
 
-db = SQLAlchemy()
+# Set per request by app.tenancy (or with use_tenant() in CLI code)
+_tenant: ContextVar[str] = ContextVar("tenant", default=DEFAULT_TENANT)
+_shard: ContextVar[str | None] = ContextVar("shard", default=None)
+
+
+def current_tenant() -> str:
+    return _tenant.get()
+
+
+def current_shard() -> str | None:
+    """Bind key of the current tenant's shard; None means the default database."""
+    return _shard.get()
+
+
+@contextmanager
+def use_tenant(tenant: str, shard: str | None = None):
+    tenant_token, shard_token = _tenant.set(tenant), _shard.set(shard)
+    try:
+        yield
+    finally:
+        _tenant.reset(tenant_token)
+        _shard.reset(shard_token)
+
+
+@contextmanager
+def primary_reads():
+    """Send this request's SELECTs to the primary inside the block, e.g. for results that get cached."""
+    if not has_request_context():
+        yield
+        return
+    previous = g.get("read_replica")
+    g.read_replica = False
+    try:
+        yield
+    finally:
+        g.read_replica = previous
+
+
+def _is_global(mapper, clause) -> bool:
+    table = getattr(mapper, "local_table", None) if mapper is not None else None
+    if table is None and clause is not None:
+        table = getattr(clause, "table", None)
+    return getattr(table, "name", None) in GLOBAL_TABLES
+
+
+def bind_key(session, engines, mapper=None, clause=None) -> str | None:
+    """Key in ``engines`` a statement should use: the tenant's shard, the replica, or None for the default database."""
+    if _is_global(mapper, clause):
+        return None
+    shard = current_shard()
+    if (
+        shard is None
+        and isinstance(clause, Select)
+        and not session._flushing
+        and has_request_context()
+        and g.get("read_replica")
+        and REPLICA_BIND in engines
+    ):
+        return REPLICA_BIND
+    return shard
+
+
+class RoutingSession(Session):
+    """Routes each statement to the current tenant's shard, and SELECTs to the
+    ``replica`` bind while the request allows it (see replica.py).
+
+    Flushes, statement-level writes and anything after a write in the same
+    request stay on the primary. Global tables always use the default bind.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            key = bind_key(self, self._db.engines, mapper, clause)
+            if key is not None:
+                return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _stick_to_primary(session, flush_context):
+    # Read-your-writes: once this request has written, later reads use the primary
+    if has_request_context():
+        g.read_replica = False
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
@@ -0,0 +1,36 @@
+"""Flask JSON provider backed by orjson, falling back to the stdlib encoder.
+
+Types orjson does not handle natively (and dates, which Flask renders as HTTP
+dates) go through Flask's default converter, so output matches the default
+provider.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    def _options(self, pretty: bool = False) -> int:
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        # Hand orjson's bytes straight to the response instead of decoding to str first
+        body = orjson.dumps(obj, default=self.default, option=self._options(pretty)) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,521 @@
+"""Load generator and request replayer for a running API server.
+
+Reproduces the morning rush: students log in, load their assignments and
+mark them done while admins open reports. Each scenario is picked at random
+by weight. Requests arrive as a Poisson stream at ``--rate`` per second, or
+back to back when no rate is given. ``--concurrency`` bounds how many are in
+flight. With a rate, latency is measured from each request's scheduled start,
+so time spent queueing behind a slow server counts::
+
+    python -m app.loadgen serve --students 500 --days 30        # local server on a scratch SQLite database
+    python -m app.loadgen run --concurrency 50 --rate 100 --duration 60
+    python -m app.loadgen run --mix student_login=1,feed=6,update=2,report=1 --record rush.jsonl
+    python -m app.loadgen replay rush.jsonl --speed 2
+    python -m app.loadgen replay access.log   # common/combined access log lines; bodies are not replayed
+
+Recorded files are JSON lines ``{"t": seconds, "method", "path", "body",
+"user"}``. ``user`` is ``"admin"`` or ``"student:<studentId>"``, and that
+user is logged in (once) before their requests are replayed.
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import queue
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+DEFAULT_MIX = {"student_login": 1, "feed": 6, "update": 2, "report": 1}
+REPORT_PATHS = ["/api/reports/weekly-summary", "/api/reports/student-performance", "/api/dashboard/"]
+# 127.0.0.1 - - [19/Oct/2026:05:53:18 +0000] "GET /api/students/ HTTP/1.1" 200 ...  (werkzeug omits the zone)
+ACCESS_LOG_LINE = re.compile(r'\[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+) HTTP/[\d.]+"')
+
+
+class Client:
+    """One keep-alive HTTP connection per thread."""
+
+    def __init__(self, base_url: str, tenant: str | None = None):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or (443 if parts.scheme == "https" else 80)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.tenant = tenant
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body=None, token: str | None = None) -> tuple[int, bytes]:
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        if self.tenant:
+            headers["X-Tenant"] = self.tenant
+        payload = json.dumps(body).encode() if body is not None else None
+        for attempt in (1, 2):
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = self._local.conn = self.connection_class(self.host, self.port, timeout=60)
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # The server closed an idle keep-alive connection; reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt == 2:
+                    raise
+
+
+class Stats:
+    """Latencies, status codes and errors per scenario."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def add(self, name: str, seconds: float, status: int | str):
+        with self._lock:
+            self.latencies[name].append(seconds)
+            self.statuses[name][status] += 1
+
+    def summary(self) -> list[dict]:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        rows = []
+        for name in sorted(self.latencies) + ["total"]:
+            if name == "total":
+                samples = sorted(s for values in self.latencies.values() for s in values)
+                statuses = sum(self.statuses.values(), Counter())
+            else:
+                samples, statuses = sorted(self.latencies[name]), self.statuses[name]
+            if not samples:
+                continue
+            errors = sum(n for status, n in statuses.items() if not isinstance(status, int) or status >= 400)
+            rows.append({
+                "scenario": name,
+                "requests": len(samples),
+                "errors": errors,
+                "error_rate": errors / len(samples),
+                "rps": len(samples) / elapsed,
+                **{f"p{p}_ms": _percentile(samples, p) * 1000 for p in (50, 90, 95, 99)},
+                "max_ms": samples[-1] * 1000,
+                "statuses": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+            })
+        return rows
+
+
+def _percentile(samples: list[float], p: float) -> float:
+    return samples[min(len(samples) - 1, math.ceil(len(samples) * p / 100) - 1)]
+
+
+def print_summary(rows: list[dict]):
+    width = max([16] + [len(r["scenario"]) for r in rows])
+    print(f"{'scenario':<{width}} {'requests':>8} {'errors':>7} {'err %':>6} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p90 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  statuses")
+    for r in rows:
+        print(f"{r['scenario']:<{width}} {r['requests']:>8} {r['errors']:>7} {r['error_rate'] * 100:>6.1f} {r['rps']:>8.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p90_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}  "
+              + " ".join(f"{k}:{v}" for k, v in r["statuses"].items()))
+
+
+class Users:
+    """The admin tokens and logged-in students (tokens plus the assignments seen in their last feed).
+
+    ``request`` renews an expired access token with the refresh token (or by
+    logging in again) and retries once, so runs can outlast the token lifetime.
+    """
+
+    def __init__(self, client: Client, admin: tuple[str, str], student_password: str):
+        self.client = client
+        self.admin_credentials = admin
+        self.student_password = student_password
+        self._lock = threading.Lock()
+        self._admin_token = None
+        self._admin_refresh_token = None
+        self.student_ids: list[str] = []
+        self.sessions: dict[str, dict] = {}  # studentId -> {"token", "refresh", "id", "assignments"}
+
+    def admin_token(self) -> str:
+        with self._lock:
+            if self._admin_token is None:
+                self._admin_login()
+            return self._admin_token
+
+    def _admin_login(self):
+        username, password = self.admin_credentials
+        status, body = self.client.request("POST", "/api/auth/login", {"username": username, "password": password})
+        if status != 200:
+            raise SystemExit(f"admin login failed ({status}): {body[:200]!r}")
+        data = json.loads(body)
+        self._admin_token, self._admin_refresh_token = data["accessToken"], data["refreshToken"]
+
+    def load_students(self):
+        status, body = self.client.request("GET", "/api/students/", token=self.admin_token())
+        if status != 200:
+            raise SystemExit(f"could not list students ({status})")
+        self.student_ids = [s["studentId"] for s in json.loads(body) if s.get("status", "active") == "active"]
+        if not self.student_ids:
+            raise SystemExit("no active students to log in as")
+
+    def login_student(self, student_id: str) -> tuple[int, bytes]:
+        status, body = self.client.request(
+            "POST", "/api/auth/student-login", {"studentId": student_id, "password": self.student_password}
+        )
+        if status == 200:
+            data = json.loads(body)
+            with self._lock:
+                self.sessions[student_id] = {
+                    "token": data["accessToken"], "refresh": data["refreshToken"], "id": data.get("id"), "assignments": [],
+                }
+        return status, body
+
+    def _refreshed(self, refresh_token: str) -> str | None:
+        status, body = self.client.request("POST", "/api/auth/refresh", {"refreshToken": refresh_token})
+        return json.loads(body)["accessToken"] if status == 200 else None
+
+    def renew(self, user: str | None, expired: str | None):
+        """Replace ``user``'s access token ``expired``: refresh it, or log in again if that fails."""
+        if not user or user == "admin":
+            with self._lock:
+                if self._admin_token == expired:
+                    self._admin_token = self._refreshed(self._admin_refresh_token)
+                    if self._admin_token is None:
+                        self._admin_login()
+            return
+        student_id = user.partition(":")[2]
+        session = self.sessions.get(student_id)
+        if session is None or session["token"] != expired:
+            return  # another thread renewed it already
+        token = self._refreshed(session["refresh"])
+        if token is None:
+            self.login_student(student_id)
+        else:
+            session["token"] = token
+
+    def request(self, method: str, path: str, body, user: str | None) -> tuple[int, bytes]:
+        """Send a request as ``user`` ("admin" or "student:<studentId>"), renewing its token once on a 401."""
+        token = self.token_for(user)
+        status, data = self.client.request(method, path, body, token)
+        if status == 401 and token:
+            self.renew(user, token)
+            status, data = self.client.request(method, path, body, self.token_for(user))
+        return status, data
+
+    def any_session(self) -> tuple[str, dict] | None:
+        with self._lock:
+            if not self.sessions:
+                return None
+            student_id = random.choice(list(self.sessions))
+            return student_id, self.sessions[student_id]
+
+    def token_for(self, user: str | None) -> str | None:
+        """Token for a recorded ``user`` ("admin" or "student:<studentId>"), logging in on first use."""
+        if not user or user == "admin":
+            return self.admin_token()
+        student_id = user.partition(":")[2]
+        if student_id not in self.sessions:
+            self.login_student(student_id)
+        session = self.sessions.get(student_id)
+        return session["token"] if session else None
+
+
+def _week() -> str:
+    monday = date.today() - timedelta(days=date.today().weekday())
+    return f"start={monday.isoformat()}&end={(monday + timedelta(days=6)).isoformat()}"
+
+
+def scenario_request(name: str, users: Users) -> tuple[str, str, str, dict | None, str] | None:
+    """(scenario, method, path, body, user) for one request, or None to log a student in first.
+
+    Student scenarios need a logged-in student, and an update needs an
+    assignment from that student's feed; otherwise the earlier step runs.
+    """
+    if name == "student_login":
+        return None
+    if name == "report":
+        path = random.choice(REPORT_PATHS)
+        if "weekly" in path:
+            path += f"?{_week()}"
+        return name, "GET", path, None, "admin"
+    picked = users.any_session()
+    if picked is None:
+        return None
+    student_id, session = picked
+    user = f"student:{student_id}"
+    if name == "update" and session["assignments"]:
+        body = {"status": "completed", "completedAt": datetime.utcnow().isoformat() + "Z"}
+        return name, "PUT", f"/api/assignments/{random.choice(session['assignments'])}", body, user
+    if name in ("feed", "update"):
+        return "feed", "GET", f"/api/assignments/expanded?{_week()}", None, user
+    raise ValueError(f"unknown scenario {name!r}")
+
+
+def run_scenario(name: str, users: Users, stats: Stats, recorder, scheduled: float):
+    """Issue one request for scenario ``name``; latency counts from ``scheduled``."""
+    request = scenario_request(name, users)
+    try:
+        if request is None:
+            name = "student_login"
+            student_id = random.choice(users.student_ids)
+            recorder(scheduled, "POST", "/api/auth/student-login", {"studentId": student_id}, f"student:{student_id}")
+            status, _ = users.login_student(student_id)
+        else:
+            name, method, path, body, user = request
+            recorder(scheduled, method, path, body, user)
+            status, data = users.request(method, path, body, user)
+            if status == 200 and path.startswith("/api/assignments/expanded"):
+                _remember_assignments(users, user.partition(":")[2], data)
+    except (OSError, http.client.HTTPException) as e:
+        status = type(e).__name__
+    stats.add(name, time.perf_counter() - scheduled, status)
+
+
+def _remember_assignments(users: Users, student_id: str, data: bytes):
+    session = users.sessions.get(student_id)
+    if session is None:
+        return
+    rows = json.loads(data)
+    own = {r["assignmentId"] for r in rows if r.get("studentId") == session["id"]}
+    session["assignments"] = list(own)[:50]
+
+
+class Recorder:
+    """Writes issued requests as replayable JSON lines."""
+
+    def __init__(self, path: str | None):
+        self._file = open(path, "w") if path else None
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def __call__(self, at: float, method: str, path: str, body, user: str):
+        if self._file is None:
+            return
+        if path == "/api/auth/student-login":
+            body = None  # never write passwords; replay logs the user in itself
+        line = json.dumps({"t": round(at - self._start, 4), "method": method, "path": path, "body": body, "user": user})
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+def drive(jobs, concurrency: int, stats: Stats, duration: float | None = None):
+    """Run ``job(scheduled_time)`` callables with at most ``concurrency`` in flight.
+
+    ``jobs`` yields ``(offset_seconds, job)``. With an offset, a job starts at that
+    time after the run began (open loop). Without one, it starts as soon as a
+    worker is free (closed loop). Stops after ``duration`` seconds if given.
+    """
+    pending: queue.Queue = queue.Queue(maxsize=concurrency * 4)
+    done = object()
+
+    def worker():
+        while True:
+            item = pending.get()
+            if item is done:
+                return
+            scheduled, job = item
+            job(scheduled)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    stats.started = start = time.perf_counter()
+    for offset, job in jobs:
+        now = time.perf_counter()
+        if duration and now - start >= duration:
+            break
+        if offset is not None:
+            scheduled = start + offset
+            if scheduled > now:
+                time.sleep(scheduled - now)
+        else:
+            scheduled = now
+        pending.put((scheduled if offset is not None else None, job))
+    for _ in threads:
+        pending.put(done)
+    for t in threads:
+        t.join()
+    stats.finished = time.perf_counter()
+
+
+def _mix_jobs(mix: dict[str, float], users: Users, stats: Stats, recorder, rate: float | None, requests: int | None):
+    names, weights = list(mix), list(mix.values())
+    offset = 0.0
+    n = 0
+    while requests is None or n < requests:
+        n += 1
+        name = random.choices(names, weights)[0]
+        if rate:
+            offset += random.expovariate(rate)
+        yield (offset if rate else None), (
+            lambda scheduled, name=name: run_scenario(name, users, stats, recorder, scheduled or time.perf_counter())
+        )
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def read_log(path: str) -> list[dict]:
+    """Requests from a recorded JSON-lines file or a common/combined access log, sorted by time."""
+    entries = []
+    first = None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                entries.append(json.loads(line))
+                continue
+            match = ACCESS_LOG_LINE.search(line)
+            # Access logs carry no bodies, so only reads can be replayed from them
+            if not match or match["method"] not in ("GET", "HEAD"):
+                continue
+            stamp = match["time"]
+            when = datetime.strptime(stamp, "%d/%b/%Y:%H:%M:%S %z" if ":" in stamp[:12] else "%d/%b/%Y %H:%M:%S")
+            if when.tzinfo:
+                when = when.astimezone(timezone.utc).replace(tzinfo=None)
+            first = first or when
+            entries.append({"t": (when - first).total_seconds(), "method": match["method"], "path": match["path"]})
+    entries.sort(key=lambda e: e.get("t", 0))
+    return entries
+
+
+def _replay_jobs(entries: list[dict], users: Users, stats: Stats, speed: float):
+    for entry in entries:
+        def job(scheduled, entry=entry):
+            method, path = entry["method"], entry["path"]
+            scheduled = scheduled or time.perf_counter()
+            try:
+                if path == "/api/auth/student-login":
+                    status, _ = users.login_student(entry["user"].partition(":")[2])
+                else:
+                    status, _ = users.request(method, path, entry.get("body"), entry.get("user"))
+            except (OSError, http.client.HTTPException) as e:
+                status = type(e).__name__
+            stats.add(_route(method, path), time.perf_counter() - scheduled, status)
+        yield (entry.get("t", 0) / speed if speed else None), job
+
+
+def _route(method: str, path: str) -> str:
+    """Path with ids collapsed so results group by route, e.g. 'PUT /api/assignments/:id'."""
+    parts = [":id" if any(c.isdigit() for c in part) else part for part in path.split("?")[0].split("/")]
+    return f"{method} {'/'.join(parts)}"
+
+
+def serve(args):
+    """Populate a scratch SQLite database with app.bench's generated school and serve it."""
+    from . import create_app
+    from .asgi import create_asgi_app
+    from .bench import populate
+    from .config import Config
+    from .db import db
+
+    tmpdir = tempfile.mkdtemp()
+    config = type("LoadConfig", (Config,), {
+        "SQLALCHEMY_DATABASE_URI": args.database_url or "sqlite:///" + os.path.join(tmpdir, "load.db"),
+    })
+    asgi_app = create_asgi_app(config) if args.asgi else None
+    app = asgi_app.flask_app if asgi_app else create_app(config)
+    with app.app_context():
+        db.create_all()
+        sizes = populate(args.students, args.classrooms, args.days)
+    print("dataset:", ", ".join(f"{k}={v}" for k, v in sizes.items()))
+    print("log in as admin/admin123; students use password student123")
+    if asgi_app:
+        import uvicorn
+        uvicorn.run(asgi_app, host=args.host, port=args.port, log_level="warning")
+    else:
+        from werkzeug.serving import run_simple
+        run_simple(args.host, args.port, app, threaded=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def target_options(p):
+        p.add_argument("--url", default="http://127.0.0.1:5000", help="server to load (default: %(default)s)")
+        p.add_argument("--tenant", help="X-Tenant header to send")
+        p.add_argument("--concurrency", type=int, default=20, help="requests in flight at most (default: %(default)s)")
+        p.add_argument("--admin", default="admin:admin123", help="admin username:password (default: %(default)s)")
+        p.add_argument("--student-password", default="student123")
+        p.add_argument("--json", help="also write the summary to this file")
+
+    run = commands.add_parser("run", help="generate a weighted scenario mix")
+    target_options(run)
+    run.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                     help="weights, e.g. student_login=1,feed=6,update=2,report=1 (the default)")
+    run.add_argument("--rate", type=float, help="arrivals per second (default: back to back)")
+    run.add_argument("--duration", type=float, default=30, help="seconds to run (default: %(default)s)")
+    run.add_argument("--requests", type=int, help="stop after this many requests")
+    run.add_argument("--record", help="write the issued requests to this JSON-lines file for replay")
+    run.add_argument("--seed", type=int, help="random seed for a repeatable mix")
+
+    replay = commands.add_parser("replay", help="replay a recorded JSON-lines file or access log")
+    target_options(replay)
+    replay.add_argument("log")
+    replay.add_argument("--speed", type=float, default=1.0, help="time scale; 2 replays twice as fast, 0 back to back")
+
+    local = commands.add_parser("serve", help="serve a generated school from a scratch database")
+    local.add_argument("--host", default="127.0.0.1")
+    local.add_argument("--port", type=int, default=5000)
+    local.add_argument("--database-url", help="scratch database to populate (default: temporary SQLite file)")
+    local.add_argument("--students", type=int, default=500)
+    local.add_argument("--classrooms", type=int, default=30)
+    local.add_argument("--days", type=int, default=30)
+    local.add_argument("--asgi", action="store_true", help="serve the ASGI entry point with uvicorn")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        return serve(args)
+
+    client = Client(args.url, args.tenant)
+    username, _, password = args.admin.partition(":")
+    users = Users(client, (username, password), args.student_password)
+    stats = Stats()
+    try:
+        users.admin_token()
+    except OSError as e:
+        raise SystemExit(f"cannot reach {args.url}: {e}")
+    if args.command == "run":
+        if args.seed is not None:
+            random.seed(args.seed)
+        users.load_students()
+        recorder = Recorder(args.record)
+        try:
+            drive(_mix_jobs(args.mix, users, stats, recorder, args.rate, args.requests), args.concurrency, stats,
+                  duration=None if args.requests else args.duration)
+        finally:
+            recorder.close()
+    else:
+        entries = read_log(args.log)
+        print(f"replaying {len(entries)} requests")
+        drive(_replay_jobs(entries, users, stats, args.speed), args.concurrency, stats)
+
+    rows = stats.summary()
+    print_summary(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
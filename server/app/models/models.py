@@ -1,18 +1,30 @@
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from typing import Optional
 from passlib.hash import bcrypt
-from sqlalchemy import UniqueConstraint
-from ..db import db
+from sqlalchemy import UniqueConstraint, Integer, func, literal, select, update
+from sqlalchemy.orm import aliased
+from ..db import db, current_tenant
 
 
 # Helper mixin for common id + external id string ('ext_id')
 class BaseModel(db.Model):
     __abstract__ = True
     id = db.Column(db.Integer, primary_key=True)
-    ext_id = db.Column(db.String, unique=True, index=True)
+    # Unique per tenant, see each model's __table_args__
+    ext_id = db.Column(db.String, index=True)
+    # School the row belongs to; every ORM query is scoped to it by app.tenancy
+    tenant_id = db.Column(db.String(64), nullable=False, default=current_tenant, index=True)
+    # Bumped on every conditional_update; used for optimistic concurrency (If-Match)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    _column_names: dict[type, tuple[str, ...]] = {}
 
     def as_dict(self):
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+        names = self._column_names.get(type(self))
+        if names is None:
+            # Reflect over __table__.columns once per class, not on every call
+            names = self._column_names[type(self)] = tuple(c.name for c in self.__table__.columns)
+        return {name: getattr(self, name) for name in names}
 
     @classmethod
     def get_by_identifier(cls, identifier: str):
@@ -30,19 +42,52 @@ class BaseModel(db.Model):
                 obj = None
         return obj
 
+    @classmethod
+    def conditional_update(cls, identifier: str, values: dict, version: Optional[int] = None):
+        """Apply ``values`` as a single ``UPDATE ... RETURNING`` statement and bump ``version``.
+
+        The row is matched like get_by_identifier (ext_id first, then numeric id).
+        When ``version`` is given the row must still be at that version. Returns
+        the (id, ext_id, version) row, or None when nothing matched.
+        """
+        # An ORM alias (not a table alias) so the tenant criteria also apply to the lookup
+        alias = aliased(cls)
+        by_ext_id = select(alias.id).where(alias.ext_id == identifier).scalar_subquery()
+        numeric = int(identifier) if isinstance(identifier, str) and identifier.isdigit() else None
+        stmt = (
+            update(cls)
+            .where(cls.id == func.coalesce(by_ext_id, literal(numeric, Integer)))
+            .values(**values, version=cls.version + 1)
+            .returning(cls.id, cls.ext_id, cls.version)
+            # audit_values lets app.audit record the change from the RETURNING rows
+            .execution_options(synchronize_session=False, audit_values=values)
+        )
+        if version is not None:
+            stmt = stmt.where(cls.version == version)
+        return db.session.execute(stmt).first()
+
 
 class AdminUser(BaseModel):
     __tablename__ = "admin_users"
 
-    username = db.Column(db.String(64), unique=True, nullable=False)
+    username = db.Column(db.String(64), nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     full_name = db.Column(db.String(128), nullable=False)
     role = db.Column(db.String(32), nullable=False)
     status = db.Column(db.String(16), nullable=False, default="active")
     last_login = db.Column(db.DateTime(timezone=True))
 
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "ext_id", name="uq_admin_users_ext_id"),
+        UniqueConstraint("tenant_id", "username", name="uq_admin_users_username"),
+    )
+
+    @staticmethod
+    def hash_password(password: str) -> str:
+        return bcrypt.hash(password)
+
     def set_password(self, password: str):
-        self.password_hash = bcrypt.hash(password)
+        self.password_hash = self.hash_password(password)
 
     def check_password(self, password: str) -> bool:
         return bcrypt.verify(password, self.password_hash)
@@ -51,15 +96,25 @@ class AdminUser(BaseModel):
 class Student(BaseModel):
     __tablename__ = "students"
 
-    student_id = db.Column(db.String(64), unique=True, nullable=False)
+    student_id = db.Column(db.String(64), nullable=False)
     first_name = db.Column(db.String(64), nullable=False)
     last_name = db.Column(db.String(64), nullable=False)
     class_section = db.Column(db.String(64), nullable=False)
     status = db.Column(db.String(16), nullable=False, default="active")
     password_hash = db.Column(db.String(255), nullable=False)
 
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "ext_id", name="uq_students_ext_id"),
+        UniqueConstraint("tenant_id", "student_id", name="uq_students_student_id"),
+        db.Index("idx_students_status", "tenant_id", "status"),
+    )
+
+    @staticmethod
+    def hash_password(password: str) -> str:
+        return bcrypt.hash(password)
+
     def set_password(self, password: str):
-        self.password_hash = bcrypt.hash(password)
+        self.password_hash = self.hash_password(password)
 
     def check_password(self, password: str) -> bool:
         return bcrypt.verify(password, self.password_hash) if self.password_hash else False
@@ -68,25 +123,40 @@ class Student(BaseModel):
 class Classroom(BaseModel):
     __tablename__ = "classrooms"
 
-    classroom_id = db.Column(db.String(64), unique=True, nullable=False)
+    classroom_id = db.Column(db.String(64), nullable=False)
     name = db.Column(db.String(128), nullable=False)
     description = db.Column(db.Text)
 
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "ext_id", name="uq_classrooms_ext_id"),
+        UniqueConstraint("tenant_id", "classroom_id", name="uq_classrooms_classroom_id"),
+    )
+
 
 class CleaningTask(BaseModel):
     __tablename__ = "cleaning_tasks"
 
-    name = db.Column(db.String(128), unique=True, nullable=False)
+    name = db.Column(db.String(128), nullable=False)
     description = db.Column(db.Text)
 
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "ext_id", name="uq_cleaning_tasks_ext_id"),
+        UniqueConstraint("tenant_id", "name", name="uq_cleaning_tasks_name"),
+    )
+
 
 class Checklist(BaseModel):
     __tablename__ = "checklists"
 
-    name = db.Column(db.String(128), unique=True, nullable=False)
+    name = db.Column(db.String(128), nullable=False)
     description = db.Column(db.Text)
     tasks = db.relationship("ChecklistTask", back_populates="checklist", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "ext_id", name="uq_checklists_ext_id"),
+        UniqueConstraint("tenant_id", "name", name="uq_checklists_name"),
+    )
+
 
 class ChecklistTask(db.Model):
     __tablename__ = "checklist_tasks"
@@ -100,6 +170,7 @@ class ChecklistTask(db.Model):
 
     __table_args__ = (
         UniqueConstraint("checklist_id", "position", name="uq_checklist_position"),
+        db.Index("idx_checklist_tasks_task", "task_id"),
     )
 
 
@@ -112,10 +183,22 @@ class TaskAssignment(BaseModel):
     status = db.Column(db.String(16), nullable=False, default="assigned")
     completed_at = db.Column(db.DateTime(timezone=True))
     comments = db.Column(db.Text)
+    # Set when this row is a materialized occurrence of a recurring template
+    template_id = db.Column(db.Integer, db.ForeignKey("assignment_templates.id", ondelete="SET NULL"), index=True)
 
     classroom = db.relationship("Classroom")
     checklist = db.relationship("Checklist")
     students = db.relationship("TaskAssignmentStudent", back_populates="assignment", cascade="all, delete-orphan")
+    template = db.relationship("AssignmentTemplate")
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "ext_id", name="uq_task_assignments_ext_id"),
+        UniqueConstraint("template_id", "date", name="uq_task_assignment_template_date"),
+        db.Index("idx_task_assignments_date", "tenant_id", "date"),
+        db.Index("idx_task_assignments_completed", "tenant_id", "completed_at"),
+        db.Index("idx_task_assignments_classroom", "classroom_id"),
+        db.Index("idx_task_assignments_checklist", "checklist_id"),
+    )
 
 
 class TaskAssignmentStudent(db.Model):
@@ -126,3 +209,157 @@ class TaskAssignmentStudent(db.Model):
 
     assignment = db.relationship("TaskAssignment", back_populates="students")
     student = db.relationship("Student")
+
+    __table_args__ = (
+        db.Index("idx_task_assignment_students_student", "student_id"),
+    )
+
+
+WEEKDAY_CODES = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+class AssignmentTemplate(BaseModel):
+    """Recurring assignment (RRULE-style FREQ=WEEKLY;BYDAY=...) between two dates.
+
+    Occurrences are not stored up front: they are generated on read and only
+    materialized as ``TaskAssignment`` rows when one of them is changed.
+    """
+    __tablename__ = "assignment_templates"
+
+    classroom_id = db.Column(db.Integer, db.ForeignKey("classrooms.id"), nullable=False)
+    checklist_id = db.Column(db.Integer, db.ForeignKey("checklists.id"), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    # Comma separated BYDAY codes, e.g. "MO,TU,WE,TH,FR"
+    weekdays = db.Column(db.String(32), nullable=False)
+    # Comma separated ISO dates that are skipped (EXDATE)
+    exdates = db.Column(db.Text, nullable=False, default="")
+    comments = db.Column(db.Text)
+
+    classroom = db.relationship("Classroom")
+    checklist = db.relationship("Checklist")
+    students = db.relationship("AssignmentTemplateStudent", back_populates="template", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "ext_id", name="uq_assignment_templates_ext_id"),
+    )
+
+    @property
+    def rrule(self) -> str:
+        return f"FREQ=WEEKLY;BYDAY={self.weekdays}"
+
+    def exception_dates(self) -> set[date]:
+        return {date.fromisoformat(d) for d in (self.exdates or "").split(",") if d}
+
+    def add_exception(self, day: date):
+        days = self.exception_dates()
+        days.add(day)
+        self.exdates = ",".join(sorted(d.isoformat() for d in days))
+
+    def occurs_on(self, day: date) -> bool:
+        return (
+            self.start_date <= day <= self.end_date
+            and WEEKDAY_CODES[day.weekday()] in self.weekdays.split(",")
+            and day not in self.exception_dates()
+        )
+
+    def occurrence_dates(self, start: Optional[date] = None, end: Optional[date] = None) -> list[date]:
+        """Dates this template occurs on, clipped to the optional [start, end] window."""
+        lo = max(self.start_date, start) if start else self.start_date
+        hi = min(self.end_date, end) if end else self.end_date
+        wanted = {WEEKDAY_CODES.index(code) for code in self.weekdays.split(",") if code in WEEKDAY_CODES}
+        skipped = self.exception_dates()
+        result = []
+        cur = lo
+        while cur <= hi:
+            if cur.weekday() in wanted and cur not in skipped:
+                result.append(cur)
+            cur += timedelta(days=1)
+        return result
+
+
+class AssignmentTemplateStudent(db.Model):
+    __tablename__ = "assignment_template_students"
+
+    template_id = db.Column(db.Integer, db.ForeignKey("assignment_templates.id", ondelete="CASCADE"), primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey("students.id"), primary_key=True)
+
+    template = db.relationship("AssignmentTemplate", back_populates="students")
+    student = db.relationship("Student")
+
+    __table_args__ = (
+        db.Index("idx_assignment_template_students_student", "student_id"),
+    )
+
+
+class AuditLog(db.Model):
+    """Append-only record of one committed insert/update/delete (written by app.audit)."""
+    __tablename__ = "audit_log"
+
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.String(64), nullable=False)
+    occurred_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+    actor = db.Column(db.String(128))
+    source = db.Column(db.String(255))  # e.g. "PUT /api/students/student-1"
+    action = db.Column(db.String(16), nullable=False)  # insert / update / delete
+    entity = db.Column(db.String(64), nullable=False)  # table name
+    entity_id = db.Column(db.String, nullable=False)
+    changes = db.Column(db.Text, nullable=False)  # JSON {"field": [before, after]}
+
+    __table_args__ = (
+        db.Index("idx_audit_log_entity", "tenant_id", "entity", "entity_id"),
+    )
+
+
+class Tenant(db.Model):
+    """Directory of schools and the database bind (shard) holding their rows.
+
+    Lives in the default database. Tenants without a row use the default bind.
+    """
+    __tablename__ = "tenants"
+
+    id = db.Column(db.Integer, primary_key=True)
+    slug = db.Column(db.String(64), unique=True, nullable=False)
+    name = db.Column(db.String(128), nullable=False)
+    shard = db.Column(db.String(64))  # SQLALCHEMY_BINDS key; NULL = default database
+    status = db.Column(db.String(16), nullable=False, default="active")  # active / moving
+
+
+class Revocation(db.Model):
+    """Tokens issued to ``principal`` ("admin:<id>" / "student:<id>") before ``revoked_at`` are invalid (app.tokens)."""
+    __tablename__ = "revocations"
+
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.String(64), nullable=False)
+    principal = db.Column(db.String(160), nullable=False)
+    revoked_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+
+
+class ReportSegment(db.Model):
+    """One closed week of a report (payload is JSON), stored and invalidated by app.report_cache."""
+    __tablename__ = "report_segments"
+
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.String(64), nullable=False)
+    report = db.Column(db.String(64), nullable=False)
+    filters = db.Column(db.String(255), nullable=False, default="")
+    week_start = db.Column(db.Date, nullable=False)  # Monday; the segment covers week_start..week_start + 6 days
+    payload = db.Column(db.Text, nullable=False)
+    computed_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "report", "filters", "week_start", name="uq_report_segments"),
+        db.Index("idx_report_segments_week", "tenant_id", "week_start"),
+    )
+
+
+class ReportWeek(db.Model):
+    """Write counter of a week; app.report_cache stores a segment only if no write bumped it during the compute."""
+    __tablename__ = "report_weeks"
+
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.String(64), nullable=False)
+    week_start = db.Column(db.Date, nullable=False)  # Monday
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (UniqueConstraint("tenant_id", "week_start", name="uq_report_weeks"),)
@@ -0,0 +1,351 @@
+"""Query-plan regression check for every API endpoint.
+
+Populates a scratch database with the benchmark dataset (see ``app.bench``),
+calls each blueprint endpoint once and records every SQL statement it runs,
+together with its plan (``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN (FORMAT
+JSON)`` on PostgreSQL). The result is compared with the baseline recorded in
+``query_plans.json``. The check fails (exit status 1) when an endpoint:
+
+* runs more statements than recorded (an N+1 shows up as a repeated query),
+* scans a table it did not scan before (e.g. a full scan of
+  ``task_assignments`` or ``task_assignment_students``). Reading a tenant's
+  whole table through the leading ``tenant_id`` index counts as a scan too,
+  since every tenant-scoped query can use that index,
+* has no scenario below, or returns an error status.
+
+::
+
+    python -m app.query_plans                     # check against the baseline
+    python -m app.query_plans --update-baseline   # accept the current counts and plans
+    python -m app.query_plans --database-url postgresql+psycopg://.../scratch
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from flask import Flask
+from sqlalchemy import event, text
+from . import create_app
+from .bench import auth_headers, populate
+from .config import Config
+from .db import db
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "query_plans.json")
+# Scans of these tables are called out in the report even when already in the baseline
+HOT_TABLES = ("task_assignments", "task_assignment_students", "students")
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+# SQLite: "SCAN t [USING ...]" or "SEARCH t USING [COVERING] INDEX i (tenant_id=?)"
+SQLITE_SCAN = re.compile(r"SCAN (\w+)|SEARCH (\w+) USING (?:COVERING )?INDEX \w+ \(tenant_id=\?\)$")
+# PostgreSQL: an index condition on tenant_id alone, e.g. "(tenant_id = 'default'::text)"
+PG_TENANT_ONLY = re.compile(r"^\(*tenant_id = [^()]*\)*$")
+
+_today = date.today()
+_week = f"start={_today - timedelta(days=_today.weekday())}&end={_today - timedelta(days=_today.weekday()) + timedelta(days=6)}"
+_template = {
+    "classroomId": "classroom-2", "checklistId": "checklist-1", "studentIds": ["student-3", "student-4"],
+    "startDate": _today.isoformat(), "endDate": (_today + timedelta(days=60)).isoformat(), "weekdays": "MO,WE,FR",
+}
+
+# (scenario name, method, path, JSON body), run in order. The name starts with
+# the Flask endpoint; "{endpoint}" in a path is replaced by the id returned by
+# that earlier scenario, so deletes only touch rows created here. A callable
+# body gets the earlier JSON responses by scenario name.
+SCENARIOS = [
+    ("health", "get", "/api/health", None),
+    ("metrics", "get", "/api/metrics", None),
+    ("auth.admin_login", "post", "/api/auth/login", {"username": "admin", "password": "admin123"}),
+    ("auth.refresh", "post", "/api/auth/refresh", lambda r: {"refreshToken": r["auth.admin_login"]["refreshToken"]}),
+    ("auth.student_login", "post", "/api/auth/student-login", {"studentId": "202400001", "password": "student123"}),
+    ("students.list_students", "get", "/api/students/", None),
+    ("classrooms.list_classrooms", "get", "/api/classrooms/", None),
+    ("tasks.list_tasks", "get", "/api/tasks/", None),
+    ("checklists.list_checklists", "get", "/api/checklists/", None),
+    ("admin_users.list_users", "get", "/api/admin-users/", None),
+    ("templates.list_templates", "get", "/api/assignment-templates/", None),
+    ("assignments.list_assignments_raw", "get", "/api/assignments/", None),
+    ("assignments.list_assignments_raw[week]", "get", f"/api/assignments/?{_week}", None),
+    ("assignments.list_assignments_expanded", "get", "/api/assignments/expanded", None),
+    ("assignments.list_assignments_expanded[week]", "get", f"/api/assignments/expanded?{_week}", None),
+    ("reports.weekly_summary", "get", f"/api/reports/weekly-summary?{_week}", None),
+    ("reports.student_performance", "get", "/api/reports/student-performance", None),
+    ("dashboard.dashboard", "get", "/api/dashboard/", None),
+    ("audit.list_audit_log", "get", "/api/audit/?entity=students", None),
+
+    ("students.create_student", "post", "/api/students/",
+     {"studentId": "PLAN-1", "firstName": "Plan", "lastName": "Check", "classSection": "BSIT 1A", "password": "plan12345"}),
+    ("classrooms.create_classroom", "post", "/api/classrooms/", {"classroomId": "PLAN-ROOM", "name": "Plan Room"}),
+    ("tasks.create_task", "post", "/api/tasks/", {"name": "Plan Task"}),
+    ("checklists.create_checklist", "post", "/api/checklists/", {"name": "Plan Checklist", "taskIds": ["task-1", "task-2"]}),
+    ("admin_users.create_user", "post", "/api/admin-users/",
+     {"username": "plan", "password": "plan12345", "fullName": "Plan Check", "role": "Teacher"}),
+    ("assignments.create_assignment", "post", "/api/assignments/",
+     {"date": _today.isoformat(), "classroomId": "classroom-1", "studentIds": ["student-1", "student-2"],
+      "checklistId": "checklist-1", "status": "assigned"}),
+    ("templates.create_template", "post", "/api/assignment-templates/", _template),
+
+    ("students.update_student", "put", "/api/students/student-1", {"firstName": "Planned"}),
+    ("classrooms.update_classroom", "put", "/api/classrooms/classroom-1", {"name": "Planned Room"}),
+    ("tasks.update_task", "put", "/api/tasks/task-1", {"description": "Planned"}),
+    ("checklists.update_checklist", "put", "/api/checklists/checklist-1", {"description": "Planned"}),
+    ("admin_users.update_user", "put", "/api/admin-users/1", {"fullName": "Planned Admin"}),
+    ("assignments.update_assignment", "put", "/api/assignments/a-1", {"status": "completed", "studentIds": ["student-5"]}),
+    ("templates.update_template", "put", "/api/assignment-templates/{templates.create_template}", {"comments": "planned"}),
+
+    ("assignments.delete_assignment", "delete", "/api/assignments/{assignments.create_assignment}", None),
+    ("templates.delete_template", "delete", "/api/assignment-templates/{templates.create_template}", None),
+    ("checklists.delete_checklist", "delete", "/api/checklists/{checklists.create_checklist}", None),
+    ("tasks.delete_task", "delete", "/api/tasks/{tasks.create_task}", None),
+    ("classrooms.delete_classroom", "delete", "/api/classrooms/{classrooms.create_classroom}", None),
+    ("students.delete_student", "delete", "/api/students/{students.create_student}", None),
+    ("admin_users.delete_user", "delete", "/api/admin-users/{admin_users.create_user}", None),
+
+    ("rollover.reassign_section", "post", "/api/rollover/reassign-section",
+     {"classSection": "BSIT 4D", "newClassSection": "PLAN 4D"}),
+    ("rollover.deactivate_section", "post", "/api/rollover/deactivate-section", {"classSection": "PLAN 4D"}),
+    ("rollover.delete_section", "post", "/api/rollover/delete-section", {"classSection": "PLAN 4D"}),
+    ("rollover.purge_assignments", "post", "/api/rollover/purge-assignments", {"before": (_today - timedelta(days=20)).isoformat()}),
+    ("rollover.retire_classrooms", "post", "/api/rollover/retire-classrooms", {"classroomIds": ["classroom-1", "PLAN-ROOM"]}),
+]
+
+
+class StatementRecorder:
+    """Collects the statements cursor-executed while a request is being handled."""
+
+    def __init__(self, app: Flask):
+        self.statements: list[tuple[str, object]] = []
+        self._thread = None
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", self._record)
+
+        # Registered after create_app's hooks, so tenant lookups in before_request are not counted
+        @app.before_request
+        def _start():
+            self.statements = []
+            self._thread = threading.get_ident()
+
+        @app.after_request
+        def _stop(response):
+            self._thread = None
+            return response
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self._thread == threading.get_ident():
+            if executemany and parameters:
+                parameters = parameters[0]
+            self.statements.append((statement, parameters))
+
+
+def _normalize(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def explain(statement: str, parameters) -> tuple[list[str], list[str]]:
+    """(plan lines, scanned tables) for one statement."""
+    raw = db.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if db.engine.dialect.name == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters or ())
+            lines = [detail for _, _, _, detail in cursor.fetchall()]
+            scans = [m.group(1) or m.group(2) for line in lines if (m := SQLITE_SCAN.match(line))]
+        else:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters or None)
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            lines, scans = [], []
+            _walk_pg_plan(plan[0]["Plan"], 0, lines, scans)
+        return lines, [t for t in map(_table_name, scans) if t in db.metadata.tables]
+    finally:
+        raw.rollback()
+        raw.close()
+
+
+def _table_name(name: str) -> str:
+    """SQLite plans name aliased tables (``students_1``) by their alias."""
+    base = re.sub(r"_\d+$", "", name)
+    return base if name not in db.metadata.tables and base in db.metadata.tables else name
+
+
+def _walk_pg_plan(node: dict, depth: int, lines: list[str], scans: list[str]):
+    relation = node.get("Relation Name")
+    condition = node.get("Index Cond") or node.get("Recheck Cond")
+    lines.append("  " * depth + node["Node Type"] + (f" on {relation}" if relation else "") + (f" ({condition})" if condition else ""))
+    if relation and (node["Node Type"] == "Seq Scan" or (condition and PG_TENANT_ONLY.match(condition))):
+        scans.append(relation)
+    for child in node.get("Plans", []):
+        _walk_pg_plan(child, depth + 1, lines, scans)
+
+
+def run_scenarios(app: Flask) -> dict[str, dict]:
+    recorder = StatementRecorder(app)
+    client = app.test_client()
+    headers = auth_headers(app)
+    created: dict[str, str] = {}
+    responses: dict[str, object] = {}
+    results = {}
+    for name, method, path, body in SCENARIOS:
+        for ref, value in created.items():
+            path = path.replace("{" + ref + "}", value)
+        if callable(body):
+            body = body(responses)
+        resp = getattr(client, method)(path, json=body, headers=headers)
+        responses[name] = resp.get_json() if resp.is_json else None
+        if isinstance(responses[name], dict) and "id" in responses[name]:
+            created[name] = responses[name]["id"]
+        statements = []
+        with app.app_context():
+            for sql, params in recorder.statements:
+                plan, scans = explain(sql, params) if sql.lstrip().upper().startswith(EXPLAINABLE) else ([], [])
+                statements.append({"sql": _normalize(sql), "plan": plan, "scans": scans})
+        results[name] = {
+            "request": f"{method.upper()} {path}",
+            "status": resp.status_code,
+            "statements": statements,
+        }
+    return results
+
+
+def summarize(results: dict[str, dict]) -> dict[str, dict]:
+    """The part of a run that is stored in the baseline."""
+    return {
+        name: {
+            "statements": len(r["statements"]),
+            "scans": sorted({t for s in r["statements"] for t in s["scans"]}),
+        }
+        for name, r in results.items()
+    }
+
+
+def uncovered_endpoints(app: Flask) -> list[str]:
+    covered = {name.split("[")[0] for name, *_ in SCENARIOS}
+    return sorted(
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if rule.rule.startswith("/api/") and rule.endpoint not in covered
+    )
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict]) -> tuple[list[str], list[str]]:
+    """(failures, notes) as report paragraphs."""
+    failures, notes = [], []
+    for name, r in results.items():
+        current = summarize({name: r})[name]
+        head = f"{name}  ({r['request']} -> {r['status']})"
+        if r["status"] >= 400:
+            failures.append(f"{head}\n  scenario failed with status {r['status']}")
+            continue
+        base = baseline.get(name)
+        if base is None:
+            failures.append(f"{head}\n  not in the baseline; run with --update-baseline")
+            continue
+        problems = []
+        if current["statements"] > base["statements"]:
+            problems.append(f"  statements: {base['statements']} -> {current['statements']}")
+            # Most repeated first, which is where an N+1 shows up
+            for sql, n in Counter(s["sql"] for s in r["statements"]).most_common(20):
+                problems.append(f"    x{n} {sql[:200]}")
+        new_scans = sorted(set(current["scans"]) - set(base["scans"]))
+        if new_scans:
+            problems.append(f"  new full scans: {', '.join(new_scans)}")
+            for s in r["statements"]:
+                if set(s["scans"]) & set(new_scans):
+                    problems.append(f"    {s['sql'][:300]}")
+                    problems += [f"      | {line}" for line in s["plan"]]
+        if problems:
+            failures.append("\n".join([head] + problems))
+        elif current != base:
+            notes.append(f"{head}\n  improved: {base} -> {current}; run with --update-baseline to record it")
+    return failures, notes
+
+
+def print_table(results: dict[str, dict]):
+    print(f"{'scenario':<48} {'status':>6} {'stmts':>6}  scans")
+    for name, r in results.items():
+        summary = summarize({name: r})[name]
+        scans = ", ".join(f"{t}*" if t in HOT_TABLES else t for t in summary["scans"])
+        print(f"{name:<48} {r['status']:>6} {summary['statements']:>6}  {scans}")
+    print("(* = scan of a hot table)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="scratch database to populate (default: temporary SQLite file)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="record the current counts and scans")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--classrooms", type=int, default=30)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--verbose", action="store_true", help="print every statement with its plan")
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    if not args.database_url:
+        tmpdir = tempfile.TemporaryDirectory()
+        args.database_url = "sqlite:///" + os.path.join(tmpdir.name, "plans.db")
+
+    app = create_app(type("PlanConfig", (Config,), {
+        "SQLALCHEMY_DATABASE_URI": args.database_url,
+        "SQLALCHEMY_BINDS": {},
+        "AUDIT_ENABLED": False,
+        "COMPRESS_ENABLED": False,
+        "DASHBOARD_CACHE_SECONDS": 0,
+    }))
+    with app.app_context():
+        db.create_all()
+        sizes = populate(args.students, args.classrooms, args.days)
+        dialect = db.engine.dialect.name
+        if dialect != "sqlite":
+            # PostgreSQL plans depend on statistics (autovacuum keeps them current in
+            # production). SQLite ones are kept stat-free, like an untuned database file.
+            with db.engine.begin() as conn:
+                conn.execute(text("ANALYZE"))
+    print(f"dataset ({dialect}):", ", ".join(f"{k}={v}" for k, v in sizes.items()))
+
+    results = run_scenarios(app)
+    print_table(results)
+    if args.verbose:
+        for name, r in results.items():
+            print(f"\n== {name}  ({r['request']})")
+            for s in r["statements"]:
+                print(f"  {s['sql']}")
+                print("\n".join(f"    | {line}" for line in s["plan"]))
+
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            stored = json.load(f)
+    missing = uncovered_endpoints(app)
+    if tmpdir:
+        tmpdir.cleanup()
+
+    if args.update_baseline:
+        stored[dialect] = summarize(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nbaseline for {dialect} written to {args.baseline}")
+        return 0
+
+    if dialect not in stored:
+        print(f"\nno {dialect} baseline in {args.baseline}; run with --update-baseline")
+        return 1
+    failures, notes = compare(results, stored[dialect])
+    failures += [f"{endpoint}\n  has no scenario in app/query_plans.py" for endpoint in missing]
+    for note in notes:
+        print("\n" + note)
+    if failures:
+        print(f"\n{len(failures)} regression(s):")
+        for failure in failures:
+            print("\n" + failure)
+        return 1
+    print("\nno regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
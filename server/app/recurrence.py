@@ -0,0 +1,174 @@
+"""Lazy expansion of recurring assignment templates.
+
+A template describes a weekly rotation between two dates. Its occurrences are
+generated on the fly ("virtual") and merged with the stored ``TaskAssignment``
+rows. An occurrence is written to the database ("materialized") only once it
+is changed, e.g. when a student marks it completed.
+"""
+from datetime import date
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
+from .db import db
+from .models.models import AssignmentTemplate, AssignmentTemplateStudent, TaskAssignment, TaskAssignmentStudent
+
+OCCURRENCE_SEPARATOR = "@"
+
+
+def occurrence_id(template: AssignmentTemplate, day: date) -> str:
+    return f"{template.ext_id or template.id}{OCCURRENCE_SEPARATOR}{day.isoformat()}"
+
+
+def split_occurrence_id(identifier: str) -> Optional[tuple[str, date]]:
+    """Split '<template id>@<YYYY-MM-DD>' into its parts, or return None."""
+    if not identifier or OCCURRENCE_SEPARATOR not in identifier:
+        return None
+    template_ident, _, day = identifier.rpartition(OCCURRENCE_SEPARATOR)
+    try:
+        return template_ident, date.fromisoformat(day)
+    except ValueError:
+        return None
+
+
+class VirtualOccurrence:
+    """Read-only stand-in for a ``TaskAssignment`` that has not been materialized.
+
+    Exposes the same attributes the routes read from ``TaskAssignment`` so both
+    can be serialized by the same code.
+    """
+    __slots__ = ("template", "date", "ext_id", "id")
+
+    status = "assigned"
+    completed_at = None
+    # Materializing creates the row at version 1, so clients can send If-Match: "1"
+    version = 1
+
+    def __init__(self, template: AssignmentTemplate, day: date):
+        self.template = template
+        self.date = day
+        self.ext_id = occurrence_id(template, day)
+        self.id = self.ext_id
+
+    @property
+    def template_id(self):
+        return self.template.id
+
+    @property
+    def classroom(self):
+        return self.template.classroom
+
+    @property
+    def checklist(self):
+        return self.template.checklist
+
+    @property
+    def checklist_id(self):
+        return self.template.checklist_id
+
+    @property
+    def comments(self):
+        return self.template.comments
+
+    @property
+    def students(self):
+        return self.template.students
+
+
+def virtual_occurrences(start: Optional[date] = None, end: Optional[date] = None) -> list[VirtualOccurrence]:
+    """Occurrences of all templates in [start, end] that have no stored row yet.
+
+    Costs two queries regardless of how many occurrences are generated: one for
+    the overlapping templates (with their students) and one for the dates that
+    were already materialized.
+    """
+    q = AssignmentTemplate.query.options(
+        joinedload(AssignmentTemplate.classroom),
+        joinedload(AssignmentTemplate.checklist),
+        selectinload(AssignmentTemplate.students).joinedload(AssignmentTemplateStudent.student),
+    )
+    if start:
+        q = q.filter(AssignmentTemplate.end_date >= start)
+    if end:
+        q = q.filter(AssignmentTemplate.start_date <= end)
+    templates = q.all()
+    if not templates:
+        return []
+
+    stored = db.session.query(TaskAssignment.template_id, TaskAssignment.date).filter(
+        TaskAssignment.template_id.in_([t.id for t in templates])
+    )
+    if start:
+        stored = stored.filter(TaskAssignment.date >= start)
+    if end:
+        stored = stored.filter(TaskAssignment.date <= end)
+    materialized = set(stored.all())
+
+    result = []
+    for t in templates:
+        for day in t.occurrence_dates(start, end):
+            if (t.id, day) not in materialized:
+                result.append(VirtualOccurrence(t, day))
+    return result
+
+
+def resolve_occurrence(identifier: str) -> Optional[tuple[AssignmentTemplate, date]]:
+    """Return (template, date) when identifier names a valid occurrence."""
+    parts = split_occurrence_id(identifier)
+    if not parts:
+        return None
+    template = AssignmentTemplate.get_by_identifier(parts[0])
+    if not template or not template.occurs_on(parts[1]):
+        return None
+    return template, parts[1]
+
+
+def materialize_occurrence(identifier: str) -> Optional[TaskAssignment]:
+    """Store a virtual occurrence as a ``TaskAssignment`` row (flushed, not committed).
+
+    Returns the existing row if the occurrence was already materialized (also
+    by a concurrent request), or None if the identifier does not name an
+    occurrence.
+    """
+    resolved = resolve_occurrence(identifier)
+    if not resolved:
+        return None
+    template, day = resolved
+    existing = TaskAssignment.query.filter_by(ext_id=occurrence_id(template, day)).first()
+    if existing:
+        return existing
+
+    ta = TaskAssignment(
+        ext_id=occurrence_id(template, day),
+        date=day,
+        classroom_id=template.classroom_id,
+        checklist_id=template.checklist_id,
+        status="assigned",
+        comments=template.comments,
+        template_id=template.id,
+    )
+    try:
+        with db.session.begin_nested():
+            db.session.add(ta)
+            db.session.flush()
+            for link in template.students:
+                db.session.add(TaskAssignmentStudent(assignment_id=ta.id, student_id=link.student_id))
+    except IntegrityError:
+        # Another request stored the same occurrence since the lookup above
+        return TaskAssignment.query.filter_by(ext_id=occurrence_id(template, day)).first()
+    return ta
+
+
+def detach_moved_occurrence(identifier: str, day: date) -> dict:
+    """Extra update values for moving the assignment ``identifier`` to ``day``.
+
+    A template occurrence that is moved to another date becomes a regular
+    assignment (``template_id`` NULL) and its old date becomes an exception of
+    the template. The template then neither generates the old date again nor
+    clashes with its own occurrence on ``day``. Returns {} for other assignments.
+    """
+    # A virtual occurrence is stored first, while its date is still a valid occurrence
+    ta = TaskAssignment.get_by_identifier(identifier) or materialize_occurrence(identifier)
+    if ta is None or ta.template is None or ta.date == day:
+        return {}
+    ta.template.add_exception(ta.date)
+    return {"template_id": None}
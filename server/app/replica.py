@@ -0,0 +1,54 @@
+"""Automatic read-replica routing with read-your-writes stickiness.
+
+GET/HEAD requests read from the ``replica`` bind (``DATABASE_REPLICA_URL``)
+when one is configured. After a client makes a successful write, a short-lived
+cookie keeps that client's reads on the primary for ``REPLICA_STICKY_SECONDS``
+so it never sees replication lag on its own changes.
+"""
+import sqlite3
+import time
+import click
+from flask import Flask, g, request
+from sqlalchemy.engine import make_url
+from .db import REPLICA_BIND
+
+READ_METHODS = ("GET", "HEAD")
+STICKY_COOKIE = "pc_primary_until"
+
+
+def init_app(app: Flask):
+    @app.before_request
+    def _choose_bind():
+        g.read_replica = (
+            REPLICA_BIND in app.config.get("SQLALCHEMY_BINDS", {})
+            and request.method in READ_METHODS
+            and not _sticky(request.cookies.get(STICKY_COOKIE))
+        )
+
+    @app.after_request
+    def _mark_sticky(response):
+        if REPLICA_BIND not in app.config.get("SQLALCHEMY_BINDS", {}):
+            return response
+        if request.method not in READ_METHODS and request.method != "OPTIONS" and response.status_code < 400:
+            seconds = app.config.get("REPLICA_STICKY_SECONDS", 5)
+            response.set_cookie(STICKY_COOKIE, str(time.time() + seconds), max_age=int(seconds) + 1, httponly=True, samesite="Lax")
+        response.headers["X-DB-Route"] = "replica" if g.get("read_replica") else "primary"
+        return response
+
+    @app.cli.command("replica-sync")
+    def replica_sync_command():
+        """Copy the primary SQLite database onto the replica file (local testing only)."""
+        primary = make_url(app.config["SQLALCHEMY_DATABASE_URI"])
+        replica = make_url(app.config.get("SQLALCHEMY_BINDS", {}).get(REPLICA_BIND) or "")
+        if primary.get_backend_name() != "sqlite" or replica.get_backend_name() != "sqlite":
+            raise click.ClickException("replica-sync only supports SQLite primary and replica files")
+        with sqlite3.connect(primary.database) as src, sqlite3.connect(replica.database) as dst:
+            src.backup(dst)
+        print(f"Copied {primary.database} -> {replica.database}")
+
+
+def _sticky(value: str | None) -> bool:
+    try:
+        return value is not None and float(value) > time.time()
+    except ValueError:
+        return False
@@ -0,0 +1,321 @@
+"""Persistent cache of report results for closed weeks.
+
+Reports add up day by day, so a request for [start, end] is split into
+Monday-aligned weeks:
+
+* Weeks that lie inside the range and ended before today are read from the
+  ``report_segments`` table. Missing ones are computed and stored.
+* Partial weeks at the edges of the range, and the current and future weeks,
+  are always computed live.
+
+Neighbouring weeks that need computing are computed together in one pass, so
+a cold term-long request costs about as much as it did without the cache.
+
+A write deletes only the segments for the weeks it touches. These are the
+weeks of an assignment's date (old and new), a template's changed exception
+dates, or the whole span of a template whose dates, weekdays or students
+change.
+
+Closed weeks are computed on the primary, never on a lagging replica. Each
+week has a write counter in ``report_weeks``: a write bumps it before
+deleting the week's segments, and a computed week is only stored if its
+counter is unchanged, so a result computed before a concurrent write never
+outlives it.
+"""
+import json
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable
+from flask import current_app
+from sqlalchemy import delete, event, insert, inspect, or_, select, true, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .db import db, current_tenant, primary_reads
+from .models.models import (
+    AssignmentTemplate, AssignmentTemplateStudent, ReportSegment, ReportWeek, TaskAssignment, TaskAssignmentStudent,
+)
+
+# Columns that change what the reports count
+ASSIGNMENT_FIELDS = ("date", "status", "template_id")
+TEMPLATE_SPAN_FIELDS = ("start_date", "end_date", "weekdays")
+TRACKED_TABLES = {"task_assignments", "task_assignment_students", "assignment_templates", "assignment_template_students"}
+
+
+def week_of(day: date) -> date:
+    """Monday of the week containing ``day``."""
+    return day - timedelta(days=day.weekday())
+
+
+def weekly_segments(report: str, start: date, end: date, compute: Callable[[date, date], dict],
+                    filters: str = "") -> list:
+    """Per-week payloads of ``report`` covering [start, end], oldest first.
+
+    ``compute(lo, hi)`` returns ``{week_start: payload}`` for the days in
+    [lo, hi]; weeks without data may be left out (they count as ``{}``).
+    Payloads must be JSON-serializable.
+    """
+    today = date.today()
+    weeks = []  # (week_start, lo, hi, closed)
+    cur = week_of(start)
+    while cur <= end:
+        last = cur + timedelta(days=6)
+        lo, hi = max(cur, start), min(last, end)
+        weeks.append((cur, lo, hi, lo == cur and hi == last and last < today))
+        cur += timedelta(days=7)
+
+    enabled = current_app.config.get("REPORT_CACHE_ENABLED", True)
+    closed = [w for w, _, _, is_closed in weeks if is_closed]
+    stored = _load(report, filters, closed[0], closed[-1]) if enabled and closed else {}
+
+    # Consecutive weeks that are not stored are computed with one call
+    payloads = dict(stored)
+    runs, run = [], []
+    for week in weeks:
+        if week[0] in stored:
+            if run:
+                runs.append(run)
+            run = []
+        else:
+            run.append(week)
+    if run:
+        runs.append(run)
+    missing = [w for run in runs for w, _, _, is_closed in run if is_closed]
+    versions = _week_versions(missing) if enabled and missing else {}
+    fresh = {}
+    for run in runs:
+        storable = any(w in versions for w, _, _, _ in run)
+        with primary_reads() if storable else nullcontext():
+            computed = compute(run[0][1], run[-1][2])
+        for w, _, _, is_closed in run:
+            payloads[w] = computed.get(w, {})
+            if is_closed:
+                fresh[w] = payloads[w]
+
+    if versions:
+        _store(report, filters, fresh, versions)
+    return [payloads[w] for w, _, _, _ in weeks]
+
+
+def _load(report: str, filters: str, first: date, last: date) -> dict:
+    rows = db.session.execute(
+        select(ReportSegment.week_start, ReportSegment.payload).where(
+            ReportSegment.tenant_id == current_tenant(),
+            ReportSegment.report == report,
+            ReportSegment.filters == filters,
+            ReportSegment.week_start >= first,
+            ReportSegment.week_start <= last,
+        )
+    )
+    return {week: json.loads(payload) for week, payload in rows}
+
+
+def _connection():
+    # Segments and counters are written on the connection, not the session, so
+    # they are not seen as data changes by the write-invalidated caches
+    return db.session.connection(bind_arguments={"mapper": inspect(ReportSegment)})
+
+
+def _versions(conn, weeks, lock: bool = False) -> dict:
+    stmt = select(ReportWeek.week_start, ReportWeek.version).where(
+        ReportWeek.tenant_id == current_tenant(), ReportWeek.week_start.in_(weeks)
+    )
+    return dict(conn.execute(stmt.with_for_update() if lock else stmt).all())
+
+
+def _week_versions(weeks: list) -> dict:
+    """Write counters of ``weeks``, creating missing ones, read from the primary before computing."""
+    conn = _connection()
+    versions = _versions(conn, weeks)
+    new = [w for w in weeks if w not in versions]
+    if new:
+        try:
+            conn.execute(insert(ReportWeek.__table__), [
+                {"tenant_id": current_tenant(), "week_start": w, "version": 0} for w in new
+            ])
+        except IntegrityError:
+            # Another request created them first
+            db.session.rollback()
+            conn = _connection()
+        versions = _versions(conn, weeks)
+    # Ends the transaction, so the compute reads data committed from now on
+    db.session.commit()
+    return versions
+
+
+def _store(report: str, filters: str, payloads: dict, versions: dict):
+    """Store ``payloads`` for the weeks whose write counter still matches ``versions``."""
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"tenant_id": current_tenant(), "report": report, "filters": filters, "week_start": week,
+         "payload": json.dumps(payload), "computed_at": now}
+        for week, payload in payloads.items() if week in versions
+    ]
+    conn = _connection()
+    try:
+        # Insert first, then check the counters under lock: a write that bumped
+        # them meanwhile (or is about to) is either seen here or deletes these rows
+        conn.execute(insert(ReportSegment.__table__), rows)
+        current = _versions(conn, [row["week_start"] for row in rows], lock=True)
+        stale = [w for w in current if current[w] != versions[w]]
+        if stale:
+            conn.execute(delete(ReportSegment.__table__).where(
+                ReportSegment.tenant_id == current_tenant(), ReportSegment.report == report,
+                ReportSegment.filters == filters, ReportSegment.week_start.in_(stale),
+            ))
+        db.session.commit()
+    except IntegrityError:
+        # Another request stored the same weeks first
+        db.session.rollback()
+
+
+def _week_conditions(column, dates, spans, everything: bool) -> list:
+    if everything:
+        return [true()]
+    conditions = [column.between(week_of(lo), hi) for lo, hi in spans if lo and hi]
+    weeks = {week_of(d) for d in dates if d}
+    if weeks:
+        conditions.append(column.in_(weeks))
+    return conditions
+
+
+def invalidate(conn, dates=(), spans=(), everything: bool = False):
+    """Delete the current tenant's segments for the weeks of ``dates`` and overlapping the (start, end) ``spans``.
+
+    The weeks' write counters are bumped first, so segments being computed
+    concurrently are not stored either.
+    """
+    conditions = _week_conditions(ReportWeek.week_start, dates, spans, everything)
+    if not conditions:
+        return
+    conn.execute(
+        update(ReportWeek.__table__).where(ReportWeek.tenant_id == current_tenant(), or_(*conditions))
+        .values(version=ReportWeek.version + 1)
+    )
+    conn.execute(delete(ReportSegment.__table__).where(
+        ReportSegment.tenant_id == current_tenant(),
+        or_(*_week_conditions(ReportSegment.week_start, dates, spans, everything)),
+    ))
+
+
+def _history(obj, field: str):
+    """(current value, previous value or None)"""
+    hist = inspect(obj).attrs[field].history
+    return getattr(obj, field), hist.deleted[0] if hist.deleted else None
+
+
+def _changed(obj, fields) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[f].history.has_changes() for f in fields)
+
+
+def _loaded(session, model, pk, *fields) -> dict | None:
+    """Already-loaded ``fields`` of the ``model`` row with primary key ``pk``, without emitting SQL."""
+    obj = session.identity_map.get(session.identity_key(model, pk))
+    values = inspect(obj).dict if obj is not None else {}
+    return values if all(f in values for f in fields) else None
+
+
+def _touched(session) -> dict:
+    """Dates and (start, end) spans written in the session's transaction so far."""
+    return session.info.setdefault("report_weeks", {"dates": set(), "spans": set(), "everything": False})
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed(session, flush_context):
+    dates, spans, assignment_ids, template_ids = set(), set(), set(), set()
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, TaskAssignment):
+            dates.add(obj.date)
+        elif isinstance(obj, TaskAssignmentStudent):
+            assignment_ids.add(obj.assignment_id)
+        elif isinstance(obj, AssignmentTemplate):
+            spans.add((obj.start_date, obj.end_date))
+        elif isinstance(obj, AssignmentTemplateStudent):
+            template_ids.add(obj.template_id)
+    for obj in session.dirty:
+        if isinstance(obj, TaskAssignment) and _changed(obj, ASSIGNMENT_FIELDS):
+            dates.update(_history(obj, "date"))
+        elif isinstance(obj, AssignmentTemplate):
+            if _changed(obj, TEMPLATE_SPAN_FIELDS):
+                (start, old_start), (end, old_end) = _history(obj, "start_date"), _history(obj, "end_date")
+                spans.update({(start, end), (old_start or start, old_end or end)})
+            exdates, old_exdates = _history(obj, "exdates")
+            if old_exdates is not None:
+                dates.update(date.fromisoformat(d) for d in set(exdates.split(",")) ^ set(old_exdates.split(",")) if d)
+    if not (dates or spans or assignment_ids or template_ids):
+        return
+
+    # Link rows' parents are usually already in the session
+    for pk in list(assignment_ids):
+        loaded = _loaded(session, TaskAssignment, pk, "date")
+        if loaded:
+            dates.add(loaded["date"])
+            assignment_ids.discard(pk)
+    for pk in list(template_ids):
+        loaded = _loaded(session, AssignmentTemplate, pk, "start_date", "end_date")
+        if loaded:
+            spans.add((loaded["start_date"], loaded["end_date"]))
+            template_ids.discard(pk)
+
+    conn = session.connection(bind_arguments={"mapper": inspect(ReportSegment)})
+    if assignment_ids:
+        dates.update(conn.scalars(select(TaskAssignment.date).where(TaskAssignment.id.in_(assignment_ids))))
+    if template_ids:
+        spans.update(tuple(r) for r in conn.execute(
+            select(AssignmentTemplate.start_date, AssignmentTemplate.end_date)
+            .where(AssignmentTemplate.id.in_(template_ids))
+        ))
+    touched = _touched(session)
+    touched["dates"] |= dates
+    touched["spans"] |= spans
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_statement(orm_execute_state):
+    # Statement-level writes (conditional_update, Query.delete, bulk inserts) bypass the flush
+    state = orm_execute_state
+    if not (state.is_update or state.is_delete or state.is_insert) or state.bind_mapper is None:
+        return
+    table = state.bind_mapper.local_table.name
+    if table not in TRACKED_TABLES:
+        return
+    values = state.execution_options.get("audit_values")  # SET values of a conditional_update
+    if state.is_update and table == "task_assignments" and values is not None and not set(values) & set(ASSIGNMENT_FIELDS):
+        return  # e.g. only comments or completedAt changed
+
+    session = state.session
+    touched = _touched(session)
+    where = getattr(state.statement, "whereclause", None)
+    if state.is_insert or where is None:
+        touched["everything"] = True
+    elif table == "task_assignments":
+        touched["dates"] |= set(session.scalars(select(TaskAssignment.date).where(where)))
+        touched["dates"].add((values or {}).get("date"))
+    elif table == "task_assignment_students":
+        touched["dates"] |= set(session.scalars(
+            select(TaskAssignment.date).join(TaskAssignmentStudent, TaskAssignmentStudent.assignment_id == TaskAssignment.id)
+            .where(where)
+        ))
+    else:
+        stmt = select(AssignmentTemplate.start_date, AssignmentTemplate.end_date)
+        if table == "assignment_template_students":
+            stmt = stmt.join(AssignmentTemplateStudent, AssignmentTemplateStudent.template_id == AssignmentTemplate.id)
+        spans = {tuple(r) for r in session.execute(stmt.where(where))}
+        if values:
+            spans |= {(values.get("start_date", lo), values.get("end_date", hi)) for lo, hi in spans}
+        touched["spans"] |= spans
+
+
+@event.listens_for(Session, "before_commit")
+def _invalidate_touched(session):
+    # One DELETE per transaction, after the final flush has reported its changes
+    session.flush()
+    touched = session.info.pop("report_weeks", None)
+    if touched:
+        conn = session.connection(bind_arguments={"mapper": inspect(ReportSegment)})
+        invalidate(conn, touched["dates"], touched["spans"], touched["everything"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_touched(session):
+    session.info.pop("report_weeks", None)
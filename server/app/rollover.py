@@ -0,0 +1,227 @@
+"""Set-based bulk operations for the end of a term.
+
+Each operation walks the rows it affects in primary-key order,
+``BULK_BATCH_SIZE`` at a time. A batch is handled by a few set-based
+statements (``... WHERE id IN (...)``) in its own short transaction, so locks
+are held for one batch at a time and an interrupted run can simply be started
+again. The statements go through the ORM session, so tenant scoping, the
+audit log, token revocation and cache invalidation apply exactly as they do
+for the single-row routes.
+
+CLI::
+
+    flask rollover deactivate-section "BSIT 4D"
+    flask rollover reassign-section "BSIT 1A" "BSIT 2A"
+    flask rollover delete-section "BSIT 4D"
+    flask rollover purge-assignments 2026-06-01
+    flask rollover retire-classrooms classroom-7 classroom-8
+    flask rollover --tenant north-high --batch-size 200 deactivate-section "BSIT 4D"
+"""
+from datetime import date
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, exists, select, update
+from .db import db, DEFAULT_TENANT, use_tenant
+from .models.models import (
+    AssignmentTemplate, AssignmentTemplateStudent, Classroom, Student, TaskAssignment, TaskAssignmentStudent,
+)
+from .tenancy import lookup_tenant
+from .tokens import revoke_many
+
+
+def _batch_size(batch_size: int | None) -> int:
+    return batch_size or current_app.config.get("BULK_BATCH_SIZE", 500)
+
+
+def _batches(model, *criteria, batch_size: int | None = None):
+    """(id, ext_id) rows of ``model`` matching ``criteria``, one list per batch, in id order.
+
+    Each batch is selected after the previous one was committed, in a new transaction.
+    """
+    last = 0
+    while True:
+        rows = db.session.execute(
+            select(model.id, model.ext_id).where(*criteria, model.id > last)
+            .order_by(model.id).limit(_batch_size(batch_size))
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1].id
+
+
+def _public_ids(rows) -> list[str]:
+    return [row.ext_id or str(row.id) for row in rows]
+
+
+def _update(model, ids: list[int], values: dict) -> int:
+    """One ``UPDATE ... WHERE id IN (...)``, bumping ``version`` like ``conditional_update``; returns the row count."""
+    stmt = (
+        update(model).where(model.id.in_(ids))
+        .values(**values, version=model.version + 1)
+        .returning(model.id, model.ext_id, model.version)
+        .execution_options(synchronize_session=False, audit_values=values)
+    )
+    return len(db.session.execute(stmt).all())
+
+
+def _delete(model, *criteria, returning=()) -> list:
+    """One audited ``DELETE ... RETURNING``; returns the deleted rows."""
+    stmt = (
+        delete(model).where(*criteria)
+        .returning(model.id, model.ext_id, *returning)
+        .execution_options(synchronize_session=False, audit_values={})
+    )
+    return db.session.execute(stmt).all()
+
+
+def _unlink(model, *criteria):
+    db.session.execute(delete(model).where(*criteria).execution_options(synchronize_session=False))
+
+
+def deactivate_section(section: str, batch_size: int | None = None) -> int:
+    """Mark the section's active students inactive and revoke their tokens; returns how many changed."""
+    count = 0
+    for rows in _batches(Student, Student.class_section == section, Student.status != "inactive", batch_size=batch_size):
+        count += _update(Student, [row.id for row in rows], {"status": "inactive"})
+        revoke_many("student", _public_ids(rows))
+        db.session.commit()
+    return count
+
+
+def reassign_section(section: str, new_section: str, batch_size: int | None = None) -> int:
+    """Move every student of ``section`` to ``new_section``; returns how many moved."""
+    count = 0
+    for rows in _batches(Student, Student.class_section == section, batch_size=batch_size):
+        count += _update(Student, [row.id for row in rows], {"class_section": new_section})
+        db.session.commit()
+    return count
+
+
+def delete_section(section: str, batch_size: int | None = None) -> int:
+    """Delete the section's students with their assignment and template links; returns how many were deleted."""
+    count = 0
+    for rows in _batches(Student, Student.class_section == section, batch_size=batch_size):
+        ids = [row.id for row in rows]
+        # Links first to satisfy FK constraints, as delete_student does
+        _unlink(TaskAssignmentStudent, TaskAssignmentStudent.student_id.in_(ids))
+        _unlink(AssignmentTemplateStudent, AssignmentTemplateStudent.student_id.in_(ids))
+        deleted = _delete(Student, Student.id.in_(ids), returning=(Student.student_id, Student.class_section))
+        revoke_many("student", _public_ids(deleted))
+        db.session.commit()
+        count += len(deleted)
+    return count
+
+
+def purge_assignments(before: date, batch_size: int | None = None) -> dict[str, int]:
+    """Delete assignments dated before ``before`` and drop the templates' occurrences before it.
+
+    Templates that ended before ``before`` are deleted; templates still running
+    from then on start on ``before`` instead. Templates go first, so a run
+    interrupted before the assignments are deleted never brings purged dates
+    back as virtual occurrences.
+    """
+    counts = {"assignments": 0, "templates": 0, "templatesShortened": 0}
+    for rows in _batches(AssignmentTemplate, AssignmentTemplate.end_date < before, batch_size=batch_size):
+        ids = [row.id for row in rows]
+        _unlink(AssignmentTemplateStudent, AssignmentTemplateStudent.template_id.in_(ids))
+        # Materialized occurrences that were moved past the cutoff stay as regular assignments, as in delete_template
+        db.session.execute(
+            update(TaskAssignment).where(TaskAssignment.template_id.in_(ids)).values(template_id=None)
+            .execution_options(synchronize_session=False)
+        )
+        counts["templates"] += len(_delete(AssignmentTemplate, AssignmentTemplate.id.in_(ids)))
+        db.session.commit()
+
+    for rows in _batches(AssignmentTemplate, AssignmentTemplate.start_date < before, batch_size=batch_size):
+        counts["templatesShortened"] += _update(AssignmentTemplate, [row.id for row in rows], {"start_date": before})
+        db.session.commit()
+
+    for rows in _batches(TaskAssignment, TaskAssignment.date < before, batch_size=batch_size):
+        ids = [row.id for row in rows]
+        _unlink(TaskAssignmentStudent, TaskAssignmentStudent.assignment_id.in_(ids))
+        counts["assignments"] += len(_delete(TaskAssignment, TaskAssignment.id.in_(ids), returning=(TaskAssignment.date,)))
+        db.session.commit()
+    return counts
+
+
+def retire_classrooms(identifiers: list[str], batch_size: int | None = None) -> dict[str, list[str]]:
+    """Delete the given classrooms unless assignments or templates still use them.
+
+    Each identifier matches like ``get_by_identifier``: by ext_id, or by
+    numeric id only when no classroom has it as ext_id. The in-use check is
+    part of the DELETE, so a classroom that gets an assignment meanwhile is kept.
+    """
+    result = {"deleted": [], "inUse": [], "notFound": []}
+    size = _batch_size(batch_size)
+    for i in range(0, len(identifiers), size):
+        chunk = identifiers[i:i + size]
+        by_ext_id = db.session.execute(select(Classroom.id, Classroom.ext_id).where(Classroom.ext_id.in_(chunk))).all()
+        matched = {row.ext_id for row in by_ext_id}
+        numeric = [int(v) for v in chunk if v.isdigit() and v not in matched]
+        by_id = db.session.execute(
+            select(Classroom.id, Classroom.ext_id).where(Classroom.id.in_(numeric))
+        ).all() if numeric else []
+        matched |= {str(row.id) for row in by_id}
+        found = by_ext_id + by_id
+        deleted = _delete(
+            Classroom,
+            Classroom.id.in_([row.id for row in found]),
+            ~exists().where(TaskAssignment.classroom_id == Classroom.id),
+            ~exists().where(AssignmentTemplate.classroom_id == Classroom.id),
+        )
+        db.session.commit()
+        deleted_ids = {row.id for row in deleted}
+        result["deleted"] += _public_ids(deleted)
+        result["inUse"] += _public_ids(row for row in found if row.id not in deleted_ids)
+        result["notFound"] += [v for v in chunk if v not in matched]
+    return result
+
+
+def init_app(app: Flask):
+    @app.cli.group("rollover")
+    @click.option("--tenant", default=DEFAULT_TENANT, show_default=True, help="school whose rows are changed")
+    @click.option("--batch-size", type=int, default=None, help="rows per transaction (default BULK_BATCH_SIZE)")
+    @click.pass_context
+    @with_appcontext
+    def rollover_group(ctx, tenant, batch_size):
+        """Bulk end-of-term operations, committed in batches."""
+        entry = lookup_tenant(tenant)
+        if entry is None:
+            raise click.ClickException(f"Unknown tenant {tenant!r}")
+        ctx.with_resource(use_tenant(tenant, entry[0]))
+        if batch_size:
+            app.config["BULK_BATCH_SIZE"] = batch_size
+
+    @rollover_group.command("deactivate-section")
+    @click.argument("section")
+    def deactivate_section_command(section):
+        print(f"Deactivated {deactivate_section(section)} students")
+
+    @rollover_group.command("reassign-section")
+    @click.argument("section")
+    @click.argument("new_section")
+    def reassign_section_command(section, new_section):
+        print(f"Moved {reassign_section(section, new_section)} students to {new_section}")
+
+    @rollover_group.command("delete-section")
+    @click.argument("section")
+    def delete_section_command(section):
+        print(f"Deleted {delete_section(section)} students")
+
+    @rollover_group.command("purge-assignments")
+    @click.argument("before", type=click.DateTime(formats=["%Y-%m-%d"]))
+    def purge_assignments_command(before):
+        """Delete assignments dated before BEFORE (YYYY-MM-DD)."""
+        counts = purge_assignments(before.date())
+        print(", ".join(f"{name}={n}" for name, n in counts.items()))
+
+    @rollover_group.command("retire-classrooms")
+    @click.argument("identifiers", nargs=-1, required=True)
+    def retire_classrooms_command(identifiers):
+        """Delete classrooms that no assignment or template uses."""
+        result = retire_classrooms(list(identifiers))
+        for name, ids in result.items():
+            if ids:
+                print(f"{name}: {', '.join(ids)}")
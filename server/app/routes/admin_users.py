@@ -1,24 +1,18 @@
 from flask import Blueprint, request, jsonify
 from ..db import db
+from sqlalchemy.exc import IntegrityError
 from ..models.models import AdminUser
+from ..concurrency import expected_version, versioned_response, update_failed
+from ..serialization import ADMIN_USER_FIELDS
+from ..tokens import revoke
 
 bp = Blueprint("admin_users", __name__)
 
 
 @bp.get("/")
 def list_users():
-    items = AdminUser.query.order_by(AdminUser.username).all()
-    return jsonify([
-        {
-            "id": u.ext_id or str(u.id),
-            "username": u.username,
-            "fullName": u.full_name,
-            "role": u.role,
-            "status": u.status,
-            "lastLogin": u.last_login.isoformat() if u.last_login else None,
-        }
-        for u in items
-    ])
+    stmt = ADMIN_USER_FIELDS.select().order_by(AdminUser.username)
+    return jsonify(ADMIN_USER_FIELDS.rows(stmt))
 
 
 @bp.post("/")
@@ -45,26 +39,37 @@ def create_user():
 
 @bp.put("/<ext_id>")
 def update_user(ext_id: str):
-    u = AdminUser.get_by_identifier(ext_id)
-    if not u:
-        return jsonify({"message": "Not found"}), 404
-
     data = request.get_json(force=True, silent=True) or {}
+    try:
+        version = expected_version(data)
+    except ValueError:
+        return jsonify({"message": "Invalid version"}), 400
 
-    for k, v in {
+    values = {k: v for k, v in {
         "username": data.get("username"),
         "full_name": data.get("fullName"),
         "role": data.get("role"),
         "status": data.get("status"),
-    }.items():
-        if v is not None:
-            setattr(u, k, v)
+    }.items() if v is not None}
 
     if pwd := data.get("password"):
-        u.set_password(pwd)
+        values["password_hash"] = AdminUser.hash_password(pwd)
 
-    db.session.commit()
-    return jsonify({"id": u.ext_id or str(u.id)})
+    # The admin UI always sends the role; only an actual change revokes the user's tokens
+    current = AdminUser.get_by_identifier(ext_id) if "role" in values else None
+    role_changed = current is not None and current.role != values["role"]
+
+    try:
+        row = AdminUser.conditional_update(ext_id, values, version)
+        if row and ("password_hash" in values or role_changed or values.get("status") == "inactive"):
+            revoke("admin", row.ext_id or str(row.id))
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({"message": "User with same username already exists", "detail": str(e.orig) if getattr(e, 'orig', None) else None}), 409
+    if not row:
+        return update_failed(AdminUser, ext_id)
+    return versioned_response(row)
 
 
 @bp.delete("/<ext_id>")
@@ -72,6 +77,7 @@ def delete_user(ext_id: str):
     u = AdminUser.get_by_identifier(ext_id)
     if not u:
         return jsonify({"message": "Not found"}), 404
+    revoke("admin", u.ext_id or str(u.id))
     db.session.delete(u)
     db.session.commit()
     return jsonify({"ok": True})
@@ -1,7 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, g, request, jsonify
 from ..db import db
-from ..models.models import TaskAssignment, TaskAssignmentStudent, Student, Classroom, Checklist, ChecklistTask, CleaningTask
-from datetime import datetime
+from ..models.models import AssignmentTemplateStudent, TaskAssignment, TaskAssignmentStudent, Student, Classroom, Checklist
+from ..recurrence import virtual_occurrences, materialize_occurrence, resolve_occurrence, detach_moved_occurrence
+from ..concurrency import expected_version, versioned_response, update_failed
+from ..serialization import (
+    ASSIGNMENT_FIELDS, ASSIGNMENT_STUDENT_IDS, EXPANDED_MEMBERS, assignment_select, checklist_tasks, isoformat,
+)
+from datetime import datetime, date
 from typing import Optional
 
 bp = Blueprint("assignments", __name__)
@@ -23,22 +28,66 @@ def _parse_iso_datetime(value: str) -> Optional[datetime]:
     return datetime.fromisoformat(v)
 
 
+def _date_range_args() -> tuple[Optional[date], Optional[date]]:
+    """Optional ?start=YYYY-MM-DD&end=YYYY-MM-DD filter. Raises ValueError on bad input."""
+    start = request.args.get("start")
+    end = request.args.get("end")
+    return (date.fromisoformat(start) if start else None, date.fromisoformat(end) if end else None)
+
+
+def _in_range(stmt, start: Optional[date], end: Optional[date]):
+    if start:
+        stmt = stmt.where(TaskAssignment.date >= start)
+    if end:
+        stmt = stmt.where(TaskAssignment.date <= end)
+    return stmt
+
+
+def _assigned_to(ext_id: str, student_public_id: str) -> bool:
+    """Whether the student is linked to the assignment (or to the template of a virtual occurrence)."""
+    student = Student.get_by_identifier(student_public_id)
+    if not student:
+        return False
+    ta = TaskAssignment.get_by_identifier(ext_id)
+    if ta:
+        return TaskAssignmentStudent.query.filter_by(assignment_id=ta.id, student_id=student.id).first() is not None
+    occurrence = resolve_occurrence(ext_id)
+    if not occurrence:
+        return False
+    template = occurrence[0]
+    return AssignmentTemplateStudent.query.filter_by(template_id=template.id, student_id=student.id).first() is not None
+
+
 @bp.get("/")
 def list_assignments_raw():
-    items = TaskAssignment.query.order_by(TaskAssignment.date.desc()).all()
-    result = []
-    for ta in items:
-        student_ids = [s.student.ext_id or str(s.student.id) for s in ta.students]
+    try:
+        start, end = _date_range_args()
+    except ValueError:
+        return jsonify({"message": "Invalid date format"}), 400
+
+    stmt = _in_range(assignment_select(), start, end).order_by(TaskAssignment.date.desc(), TaskAssignment.id)
+    result = ASSIGNMENT_FIELDS.rows(stmt)
+    student_ids: dict[str, list[str]] = {}
+    for assignment_id, student_id in db.session.execute(_in_range(ASSIGNMENT_STUDENT_IDS, start, end)):
+        student_ids.setdefault(assignment_id, []).append(student_id)
+    for row in result:
+        row["studentIds"] = student_ids.get(row["id"], [])
+
+    # Merge in template occurrences that have not been materialized, newest first
+    for occ in virtual_occurrences(start, end):
         result.append({
-            "id": ta.ext_id or str(ta.id),
-            "date": ta.date.isoformat(),
-            "classroomId": ta.classroom.ext_id or str(ta.classroom.id),
-            "studentIds": student_ids,
-            "checklistId": ta.checklist.ext_id or str(ta.checklist.id),
-            "status": ta.status,
-            "completedAt": ta.completed_at.isoformat() if ta.completed_at else None,
-            "comments": ta.comments,
+            "id": occ.ext_id,
+            "date": occ.date.isoformat(),
+            "classroomId": occ.classroom.ext_id or str(occ.classroom.id),
+            "studentIds": [s.student.ext_id or str(s.student.id) for s in occ.students],
+            "checklistId": occ.checklist.ext_id or str(occ.checklist.id),
+            "status": occ.status,
+            "completedAt": None,
+            "comments": occ.comments,
+            "version": occ.version,
+            "templateId": occ.template.ext_id or str(occ.template.id),
         })
+    result.sort(key=lambda row: row["date"], reverse=True)
     return jsonify(result)
 
 
@@ -80,70 +129,109 @@ def create_assignment():
 @bp.get("/expanded")
 def list_assignments_expanded():
     # Flattened view similar to frontend getAssignments
-    items = TaskAssignment.query.all()
-    result = []
+    try:
+        start, end = _date_range_args()
+    except ValueError:
+        return jsonify({"message": "Invalid date format"}), 400
+
+    tasks_by_checklist = checklist_tasks()
+    # (assignment id, date, classroom id, classroom name, student id, student name,
+    #  checklist pk, status, completedAt, comments), one entry per assigned student
+    members = [
+        (aid, day.isoformat(), cid, cname, sid, f"{first} {last}", checklist_pk, status, isoformat(completed_at), comments)
+        for aid, day, cid, cname, sid, first, last, checklist_pk, status, completed_at, comments
+        in db.session.execute(_in_range(EXPANDED_MEMBERS, start, end))
+    ]
+    for occ in virtual_occurrences(start, end):
+        cid = occ.classroom.ext_id or str(occ.classroom.id)
+        members.extend(
+            (occ.ext_id, occ.date.isoformat(), cid, occ.classroom.name, link.student.ext_id or str(link.student.id),
+             f"{link.student.first_name} {link.student.last_name}", occ.checklist_id, occ.status, None, occ.comments)
+            for link in occ.students
+        )
+    members.sort(key=lambda m: m[1], reverse=True)
 
-    for ta in items:
-        classroom_name = ta.classroom.name
-        checklist_tasks = ChecklistTask.query.filter_by(checklist_id=ta.checklist_id).order_by(ChecklistTask.position).all()
-        tasks = [CleaningTask.query.get(ct.task_id) for ct in checklist_tasks]
-
-        for tas in ta.students:
-            student = tas.student
-            for task in tasks:
-                result.append({
-                    "id": f"{ta.ext_id or ta.id}-{student.ext_id or student.id}-{task.ext_id or task.id}",
-                    "assignmentId": ta.ext_id or str(ta.id),
-                    "date": ta.date.isoformat(),
-                    "classroomId": ta.classroom.ext_id or str(ta.classroom.id),
-                    "classroomName": classroom_name,
-                    "studentId": student.ext_id or str(student.id),
-                    "studentName": f"{student.first_name} {student.last_name}",
-                    "taskId": task.ext_id or str(task.id),
-                    "taskName": task.name,
-                    "status": ta.status,
-                    "completedAt": ta.completed_at.isoformat() if ta.completed_at else None,
-                    "comments": ta.comments,
-                })
+    result = []
+    for aid, day, cid, cname, sid, student_name, checklist_pk, status, completed_at, comments in members:
+        for task_id, task_name in tasks_by_checklist.get(checklist_pk, ()):
+            result.append({
+                "id": f"{aid}-{sid}-{task_id}",
+                "assignmentId": aid,
+                "date": day,
+                "classroomId": cid,
+                "classroomName": cname,
+                "studentId": sid,
+                "studentName": student_name,
+                "taskId": task_id,
+                "taskName": task_name,
+                "status": status,
+                "completedAt": completed_at,
+                "comments": comments,
+            })
     return jsonify(result)
 
 
 @bp.put("/<ext_id>")
 def update_assignment(ext_id: str):
-    ta = TaskAssignment.get_by_identifier(ext_id)
-    if not ta:
-        return jsonify({"message": "Not found"}), 404
-
     data = request.get_json(force=True, silent=True) or {}
+    principal = g.get("principal")
+    # app.tokens only lets students change status/completedAt/comments; here, only on their own assignments
+    if principal and principal.kind == "student" and not _assigned_to(ext_id, principal.id):
+        return jsonify({"message": "Forbidden"}), 403
+    try:
+        version = expected_version(data)
+    except ValueError:
+        return jsonify({"message": "Invalid version"}), 400
+
+    values = {}
     if data.get("date") is not None:
-        ta.date = datetime.fromisoformat(data["date"]).date()
+        values["date"] = datetime.fromisoformat(data["date"]).date()
     if data.get("status") is not None:
-        ta.status = data["status"]
+        values["status"] = data["status"]
     if "completedAt" in data:
         try:
-            ta.completed_at = _parse_iso_datetime(data["completedAt"]) if data["completedAt"] else None
+            values["completed_at"] = _parse_iso_datetime(data["completedAt"]) if data["completedAt"] else None
         except ValueError:
             return jsonify({"message": "Invalid completedAt format"}), 400
     if "comments" in data:
-        ta.comments = data["comments"]
+        values["comments"] = data["comments"]
+    if "date" in values:
+        values.update(detach_moved_occurrence(ext_id, values["date"]))
+
+    row = TaskAssignment.conditional_update(ext_id, values, version)
+    # Changing a template occurrence stores it as a regular row first
+    if not row and materialize_occurrence(ext_id):
+        row = TaskAssignment.conditional_update(ext_id, values, version)
+    if not row:
+        db.session.rollback()
+        return update_failed(TaskAssignment, ext_id)
 
     if "studentIds" in data:
-        TaskAssignmentStudent.query.filter_by(assignment_id=ta.id).delete()
+        TaskAssignmentStudent.query.filter_by(assignment_id=row.id).delete()
         db.session.flush()
         for sid in data.get("studentIds") or []:
             student = Student.get_by_identifier(sid)
             if student:
-                db.session.add(TaskAssignmentStudent(assignment_id=ta.id, student_id=student.id))
+                db.session.add(TaskAssignmentStudent(assignment_id=row.id, student_id=student.id))
 
     db.session.commit()
-    return jsonify({"id": ta.ext_id or str(ta.id)})
+    return versioned_response(row)
 
 
 @bp.delete("/<ext_id>")
 def delete_assignment(ext_id: str):
     ta = TaskAssignment.get_by_identifier(ext_id)
     if not ta:
-        return jsonify({"message": "Not found"}), 404
+        # Deleting a virtual occurrence records an exception date on its template
+        occurrence = resolve_occurrence(ext_id)
+        if not occurrence:
+            return jsonify({"message": "Not found"}), 404
+        template, day = occurrence
+        template.add_exception(day)
+        db.session.commit()
+        return jsonify({"ok": True})
+    if ta.template:
+        ta.template.add_exception(ta.date)
     db.session.delete(ta)
     db.session.commit()
     return jsonify({"ok": True})
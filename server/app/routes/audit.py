@@ -0,0 +1,65 @@
+from flask import Blueprint, current_app, request, jsonify
+from datetime import datetime
+import json
+from ..db import current_tenant
+from ..models.models import AuditLog
+
+bp = Blueprint("audit", __name__)
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+@bp.get("/")
+def list_audit_log():
+    """Newest-first audit entries with keyset pagination (?before=<nextCursor>).
+
+    Filters: entity (table name), entityId, actor, since, until (ISO datetimes).
+    Entries appear once the background writer flushes (AUDIT_FLUSH_SECONDS).
+    """
+    if current_app.config.get("AUDIT_FILE"):
+        return jsonify({"message": "Audit log is written to files (AUDIT_FILE), not the database"}), 400
+
+    try:
+        limit = min(int(request.args.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+        before = int(request.args["before"]) if request.args.get("before") else None
+        since = datetime.fromisoformat(request.args["since"]) if request.args.get("since") else None
+        until = datetime.fromisoformat(request.args["until"]) if request.args.get("until") else None
+        if limit < 1:
+            raise ValueError(limit)
+    except ValueError:
+        return jsonify({"message": "Invalid limit, before, since or until"}), 400
+
+    q = AuditLog.query.filter(AuditLog.tenant_id == current_tenant())
+    if entity := request.args.get("entity"):
+        q = q.filter(AuditLog.entity == entity)
+    if entity_id := request.args.get("entityId"):
+        q = q.filter(AuditLog.entity_id == entity_id)
+    if actor := request.args.get("actor"):
+        q = q.filter(AuditLog.actor == actor)
+    if since:
+        q = q.filter(AuditLog.occurred_at >= since)
+    if until:
+        q = q.filter(AuditLog.occurred_at <= until)
+    if before:
+        q = q.filter(AuditLog.id < before)
+
+    items = q.order_by(AuditLog.id.desc()).limit(limit + 1).all()
+    has_more = len(items) > limit
+    items = items[:limit]
+    return jsonify({
+        "items": [
+            {
+                "id": e.id,
+                "occurredAt": e.occurred_at.isoformat(),
+                "actor": e.actor,
+                "source": e.source,
+                "action": e.action,
+                "entity": e.entity,
+                "entityId": e.entity_id,
+                "changes": json.loads(e.changes),
+            }
+            for e in items
+        ],
+        "nextCursor": items[-1].id if has_more else None,
+    })
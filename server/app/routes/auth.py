@@ -1,6 +1,7 @@
-from flask import Blueprint, request, jsonify
-from ..db import db
+from flask import Blueprint, current_app, request, jsonify
+from ..db import db, current_tenant
 from ..models.models import AdminUser, Student
+from ..tokens import ACCESS, REFRESH, issue_token, issue_tokens, verify_token
 from datetime import datetime
 
 bp = Blueprint("auth", __name__)
@@ -28,6 +29,7 @@ def admin_login():
         "role": user.role,
         "status": user.status,
         "lastLogin": user.last_login.isoformat() if user.last_login else None,
+        **issue_tokens("admin", user.ext_id or str(user.id), user.role),
     })
 
 
@@ -52,4 +54,26 @@ def student_login():
         "classSection": student.class_section,
         "role": "Student",
         "status": student.status,
+        **issue_tokens("student", student.ext_id or str(student.id), "Student"),
+    })
+
+
+@bp.post("/refresh")
+def refresh():
+    """New access token for a refresh token; checks the user is still active, without bcrypt."""
+    data = request.get_json(force=True, silent=True) or {}
+    principal = verify_token(data.get("refreshToken") or "", REFRESH)
+    if not principal or principal.tenant != current_tenant():
+        return jsonify({"message": "Invalid or expired refresh token"}), 401
+
+    model = AdminUser if principal.kind == "admin" else Student
+    user = model.get_by_identifier(principal.id)
+    if not user or user.status != "active":
+        return jsonify({"message": "Invalid or expired refresh token"}), 401
+
+    role = user.role if principal.kind == "admin" else "Student"
+    return jsonify({
+        "accessToken": issue_token(ACCESS, principal.kind, principal.id, role),
+        "tokenType": "Bearer",
+        "expiresIn": current_app.config.get("AUTH_ACCESS_TOKEN_SECONDS", 900),
     })
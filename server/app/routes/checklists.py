@@ -2,23 +2,19 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime
 from sqlalchemy.exc import IntegrityError
 from ..db import db
-from ..models.models import Checklist, CleaningTask, ChecklistTask, TaskAssignment
+from ..models.models import AssignmentTemplate, Checklist, CleaningTask, ChecklistTask, TaskAssignment
+from ..concurrency import expected_version, versioned_response, update_failed
+from ..serialization import CHECKLIST_FIELDS, checklist_task_ids
 
 bp = Blueprint("checklists", __name__)
 
 
 @bp.get("/")
 def list_checklists():
-    items = Checklist.query.order_by(Checklist.name).all()
-    result = []
-    for cl in items:
-        task_ids = [t.task.ext_id or str(t.task.id) for t in sorted(cl.tasks, key=lambda x: x.position)]
-        result.append({
-            "id": cl.ext_id or str(cl.id),
-            "name": cl.name,
-            "description": cl.description or "",
-            "taskIds": task_ids,
-        })
+    result = CHECKLIST_FIELDS.rows(CHECKLIST_FIELDS.select().order_by(Checklist.name))
+    task_ids = checklist_task_ids()
+    for cl in result:
+        cl["taskIds"] = task_ids.get(cl["id"], [])
     return jsonify(result)
 
 
@@ -50,27 +46,36 @@ def create_checklist():
 
 @bp.put("/<ext_id>")
 def update_checklist(ext_id: str):
-    cl = Checklist.get_by_identifier(ext_id)
-    if not cl:
-        return jsonify({"message": "Not found"}), 404
-
     data = request.get_json(force=True, silent=True) or {}
+    try:
+        version = expected_version(data)
+    except ValueError:
+        return jsonify({"message": "Invalid version"}), 400
+
+    values = {}
     if data.get("name") is not None:
-        cl.name = data["name"]
+        values["name"] = data["name"]
     if data.get("description") is not None:
-        cl.description = data["description"]
-
-    if "taskIds" in data:
-        # Replace mapping
-        ChecklistTask.query.filter_by(checklist_id=cl.id).delete()
-        db.session.flush()
-        for pos, task_ext in enumerate(data.get("taskIds") or [], start=1):
-            task = CleaningTask.get_by_identifier(task_ext)
-            if task:
-                db.session.add(ChecklistTask(checklist_id=cl.id, task_id=task.id, position=pos))
+        values["description"] = data["description"]
 
-    db.session.commit()
-    return jsonify({"id": cl.ext_id or str(cl.id)})
+    try:
+        # The version bump also covers changes to the task mapping below
+        row = Checklist.conditional_update(ext_id, values, version)
+        if row and "taskIds" in data:
+            # Replace mapping
+            ChecklistTask.query.filter_by(checklist_id=row.id).delete()
+            db.session.flush()
+            for pos, task_ext in enumerate(data.get("taskIds") or [], start=1):
+                task = CleaningTask.get_by_identifier(task_ext)
+                if task:
+                    db.session.add(ChecklistTask(checklist_id=row.id, task_id=task.id, position=pos))
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({"message": "Checklist with same name/id already exists", "detail": str(e.orig) if getattr(e, 'orig', None) else None}), 409
+    if not row:
+        return update_failed(Checklist, ext_id)
+    return versioned_response(row)
 
 
 @bp.delete("/<ext_id>")
@@ -81,6 +86,8 @@ def delete_checklist(ext_id: str):
     # Prevent deleting checklists that are used by assignments
     if TaskAssignment.query.filter_by(checklist_id=cl.id).first():
         return jsonify({"message": "Checklist is in use by assignments"}), 400
+    if AssignmentTemplate.query.filter_by(checklist_id=cl.id).first():
+        return jsonify({"message": "Checklist is in use by assignment templates"}), 400
     db.session.delete(cl)
     db.session.commit()
     return jsonify({"ok": True})
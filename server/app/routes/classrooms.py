@@ -2,23 +2,17 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime
 from sqlalchemy.exc import IntegrityError
 from ..db import db
-from ..models.models import Classroom, TaskAssignment
+from ..models.models import AssignmentTemplate, Classroom, TaskAssignment
+from ..concurrency import expected_version, versioned_response, update_failed
+from ..serialization import CLASSROOM_FIELDS
 
 bp = Blueprint("classrooms", __name__)
 
 
 @bp.get("/")
 def list_classrooms():
-    items = Classroom.query.order_by(Classroom.name).all()
-    return jsonify([
-        {
-            "id": c.ext_id or str(c.id),
-            "classroomId": c.classroom_id,
-            "name": c.name,
-            "description": c.description or "",
-        }
-        for c in items
-    ])
+    stmt = CLASSROOM_FIELDS.select().order_by(Classroom.name)
+    return jsonify(CLASSROOM_FIELDS.rows(stmt))
 
 
 @bp.post("/")
@@ -46,21 +40,27 @@ def create_classroom():
 
 @bp.put("/<ext_id>")
 def update_classroom(ext_id: str):
-    c = Classroom.get_by_identifier(ext_id)
-    if not c:
-        return jsonify({"message": "Not found"}), 404
-
     data = request.get_json(force=True, silent=True) or {}
-    for k, v in {
+    try:
+        version = expected_version(data)
+    except ValueError:
+        return jsonify({"message": "Invalid version"}), 400
+
+    values = {k: v for k, v in {
         "classroom_id": data.get("classroomId"),
         "name": data.get("name"),
         "description": data.get("description"),
-    }.items():
-        if v is not None:
-            setattr(c, k, v)
+    }.items() if v is not None}
 
-    db.session.commit()
-    return jsonify({"id": c.ext_id or str(c.id)})
+    try:
+        row = Classroom.conditional_update(ext_id, values, version)
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({"message": "Classroom with same id already exists", "detail": str(e.orig) if getattr(e, 'orig', None) else None}), 409
+    if not row:
+        return update_failed(Classroom, ext_id)
+    return versioned_response(row)
 
 
 @bp.delete("/<ext_id>")
@@ -71,6 +71,8 @@ def delete_classroom(ext_id: str):
     # Prevent deleting classrooms that are referenced by assignments
     if TaskAssignment.query.filter_by(classroom_id=c.id).first():
         return jsonify({"message": "Classroom is in use by assignments"}), 400
+    if AssignmentTemplate.query.filter_by(classroom_id=c.id).first():
+        return jsonify({"message": "Classroom is in use by assignment templates"}), 400
     db.session.delete(c)
     db.session.commit()
     return jsonify({"ok": True})
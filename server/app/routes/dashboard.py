@@ -0,0 +1,155 @@
+from flask import Blueprint, current_app, jsonify
+from datetime import date, timedelta
+from sqlalchemy import case, func, select
+from ..db import db, current_tenant
+from ..cache import TTLCache, invalidate_on_write
+from ..models.models import (
+    AssignmentTemplate, Checklist, Classroom, CleaningTask, Student, TaskAssignment, TaskAssignmentStudent,
+)
+from ..recurrence import virtual_occurrences
+
+bp = Blueprint("dashboard", __name__)
+
+STATUSES = ("assigned", "pending", "completed", "overdue")
+PERFORMANCE_WINDOW_DAYS = 30
+PERFORMER_LIMIT = 5
+RECENT_LIMIT = 10
+
+# TTL is read from config on first use
+_cache: TTLCache | None = None
+
+
+def _get_cache() -> TTLCache:
+    global _cache
+    if _cache is None:
+        _cache = invalidate_on_write(TTLCache(current_app.config.get("DASHBOARD_CACHE_SECONDS", 15)))
+    return _cache
+
+
+def _empty_breakdown() -> dict[str, int]:
+    return {s: 0 for s in STATUSES}
+
+
+def _counts() -> dict:
+    # One round trip: each count is a scalar subquery of a single SELECT
+    def count(model, *where):
+        return select(func.count()).select_from(model).where(*where).scalar_subquery()
+
+    row = db.session.execute(select(
+        count(Student).label("students"),
+        count(Student, Student.status == "active").label("activeStudents"),
+        count(Classroom).label("classrooms"),
+        count(CleaningTask).label("tasks"),
+        count(Checklist).label("checklists"),
+        count(TaskAssignment).label("assignments"),
+        count(AssignmentTemplate).label("templates"),
+    )).one()
+    return dict(row._mapping)
+
+
+def _status_breakdown(start: date, end: date, today: date) -> tuple[dict, dict]:
+    """(today, week) status counts, including unmaterialized template occurrences."""
+    rows = db.session.execute(
+        select(TaskAssignment.date, TaskAssignment.status, func.count())
+        .where(TaskAssignment.date >= start, TaskAssignment.date <= end)
+        .group_by(TaskAssignment.date, TaskAssignment.status)
+    ).all()
+    rows += [(occ.date, occ.status, 1) for occ in virtual_occurrences(start, end)]
+
+    today_counts, week_counts = _empty_breakdown(), _empty_breakdown()
+    for day, status, n in rows:
+        # Count unexpected statuses as pending, like the weekly summary report
+        key = status if status in week_counts else "pending"
+        week_counts[key] += n
+        if day == today:
+            today_counts[key] += n
+    return today_counts, week_counts
+
+
+def _performers(start: date, end: date) -> tuple[list, list]:
+    completed = func.sum(case((TaskAssignment.status == "completed", 1), else_=0))
+    overdue = func.sum(case((TaskAssignment.status == "overdue", 1), else_=0))
+    rows = db.session.execute(
+        select(TaskAssignmentStudent.student_id, func.count(), completed, overdue)
+        .join(TaskAssignment, TaskAssignmentStudent.assignment_id == TaskAssignment.id)
+        .where(TaskAssignment.date >= start, TaskAssignment.date <= end)
+        .group_by(TaskAssignmentStudent.student_id)
+    ).all()
+    stats = {sid: [assigned, done or 0, late or 0] for sid, assigned, done, late in rows}
+    for occ in virtual_occurrences(start, end):
+        for link in occ.students:
+            stats.setdefault(link.student_id, [0, 0, 0])[0] += 1
+
+    def rate(sid):
+        assigned, done, _ = stats[sid]
+        return done / assigned if assigned else 0.0
+
+    ranked = sorted(stats, key=lambda sid: (rate(sid), stats[sid][1]), reverse=True)
+    top = ranked[:PERFORMER_LIMIT]
+    bottom = [sid for sid in reversed(ranked) if sid not in top][:PERFORMER_LIMIT]
+
+    students = {s.id: s for s in Student.query.filter(Student.id.in_(top + bottom)).all()} if ranked else {}
+
+    def serialize(sid):
+        s = students[sid]
+        assigned, done, late = stats[sid]
+        return {
+            "id": s.ext_id or str(s.id),
+            "studentId": s.student_id,
+            "name": f"{s.first_name} {s.last_name}",
+            "classSection": s.class_section,
+            "assigned": assigned,
+            "completed": done,
+            "overdue": late,
+            "completionRate": rate(sid),
+        }
+
+    return [serialize(sid) for sid in top if sid in students], [serialize(sid) for sid in bottom if sid in students]
+
+
+def _recent_completions() -> list:
+    rows = db.session.execute(
+        select(TaskAssignment.id, TaskAssignment.ext_id, TaskAssignment.date, TaskAssignment.completed_at, Classroom.name)
+        .join(Classroom, TaskAssignment.classroom_id == Classroom.id)
+        .where(TaskAssignment.status == "completed", TaskAssignment.completed_at.is_not(None))
+        .order_by(TaskAssignment.completed_at.desc())
+        .limit(RECENT_LIMIT)
+    ).all()
+    return [
+        {
+            "id": ext_id or str(pk),
+            "date": day.isoformat(),
+            "completedAt": completed_at.isoformat(),
+            "classroomName": classroom_name,
+        }
+        for pk, ext_id, day, completed_at, classroom_name in rows
+    ]
+
+
+@bp.get("/")
+def dashboard():
+    today = date.today()
+    cache = _get_cache()
+    key = (current_tenant(), today)
+    cached = cache.get(key)
+    if cached is not None:
+        return jsonify(cached)
+
+    week_start = today - timedelta(days=today.weekday())  # Monday
+    week_end = week_start + timedelta(days=6)  # Sunday
+    today_counts, week_counts = _status_breakdown(week_start, week_end, today)
+    top, bottom = _performers(today - timedelta(days=PERFORMANCE_WINDOW_DAYS - 1), today)
+
+    result = {
+        "date": today.isoformat(),
+        "weekStart": week_start.isoformat(),
+        "weekEnd": week_end.isoformat(),
+        "counts": _counts(),
+        "today": today_counts,
+        "week": week_counts,
+        "topPerformers": top,
+        "bottomPerformers": bottom,
+        "recentCompletions": _recent_completions(),
+    }
+    cache.set(key, result)
+    return jsonify(result)
@@ -1,6 +1,11 @@
 from flask import Blueprint, request, jsonify
 from datetime import date, timedelta
-from ..models.models import TaskAssignment, TaskAssignmentStudent, Student
+from sqlalchemy import func, select
+from ..db import db
+from ..models.models import AssignmentTemplate, TaskAssignment, TaskAssignmentStudent, Student
+from ..report_cache import week_of, weekly_segments
+from ..serialization import public_id
+from ..recurrence import virtual_occurrences
 
 bp = Blueprint("reports", __name__)
 
@@ -18,6 +23,35 @@ def _current_week_range(today: date | None = None) -> tuple[date, date]:
     return start, end
 
 
+EMPTY_DAY = {"assigned": 0, "pending": 0, "completed": 0, "overdue": 0}
+
+
+def _summary_weeks(start: date, end: date) -> dict[date, dict]:
+    """Status counts per day in [start, end], grouped by week."""
+    days: dict[date, dict[str, int]] = {}
+    cur = start
+    while cur <= end:
+        days[cur] = dict(EMPTY_DAY)
+        cur += timedelta(days=1)
+
+    rows = db.session.execute(
+        select(TaskAssignment.date, TaskAssignment.status).where(TaskAssignment.date >= start, TaskAssignment.date <= end)
+    )
+    for day, ta_status in rows:
+        # Count by status; default others as pending if unexpected
+        status = (ta_status or "").lower()
+        days[day][status if status in EMPTY_DAY else "pending"] += 1
+
+    # Template occurrences that were never changed are still 'assigned'
+    for occ in virtual_occurrences(start, end):
+        days[occ.date]["assigned"] += 1
+
+    weeks: dict[date, dict] = {}
+    for day, counts in days.items():
+        weeks.setdefault(week_of(day), {})[day.isoformat()] = counts
+    return weeks
+
+
 @bp.get("/weekly-summary")
 def weekly_summary():
     start = _parse_date(request.args.get("start"))
@@ -25,24 +59,9 @@ def weekly_summary():
     if not start or not end:
         start, end = _current_week_range()
 
-    # Initialize all days in range
     days: dict[str, dict[str, int]] = {}
-    cur = start
-    while cur <= end:
-        days[cur.isoformat()] = {"assigned": 0, "pending": 0, "completed": 0, "overdue": 0}
-        cur += timedelta(days=1)
-
-    items = TaskAssignment.query.filter(TaskAssignment.date >= start, TaskAssignment.date <= end).all()
-    for ta in items:
-        key = ta.date.isoformat()
-        if key not in days:
-            days[key] = {"assigned": 0, "pending": 0, "completed": 0, "overdue": 0}
-        # Count by status; default others as pending if unexpected
-        status = (ta.status or "").lower()
-        if status in days[key]:
-            days[key][status] += 1
-        else:
-            days[key]["pending"] += 1
+    for segment in weekly_segments("weekly-summary", start, end, _summary_weeks):
+        days.update(segment)
 
     return jsonify({
         "start": start.isoformat(),
@@ -51,6 +70,43 @@ def weekly_summary():
     })
 
 
+def _performance_weeks(start: date, end: date) -> dict[date, list]:
+    """[student pk, assigned, completed, overdue] per student with assignments in [start, end], grouped by week."""
+    # One row per (assignment, student). Virtual template occurrences count
+    # as assigned to each of the template's students.
+    rows = list(db.session.execute(
+        select(TaskAssignment.date, TaskAssignmentStudent.student_id, TaskAssignment.status)
+        .select_from(TaskAssignmentStudent)
+        .join(TaskAssignment, TaskAssignmentStudent.assignment_id == TaskAssignment.id)
+        .where(TaskAssignment.date >= start, TaskAssignment.date <= end)
+    ))
+    for occ in virtual_occurrences(start, end):
+        rows.extend((occ.date, link.student_id, occ.status) for link in occ.students)
+
+    weeks: dict[date, dict[int, list]] = {}
+    for day, pk, ta_status in rows:
+        counts = weeks.setdefault(week_of(day), {}).setdefault(pk, [pk, 0, 0, 0])
+        counts[1] += 1
+        status = (ta_status or "").lower()
+        if status == "completed":
+            counts[2] += 1
+        elif status == "overdue":
+            counts[3] += 1
+    return {week: list(counts.values()) for week, counts in weeks.items()}
+
+
+def _data_range() -> tuple[date, date] | None:
+    """Earliest and latest date with assignments or template occurrences."""
+    lo, hi, tlo, thi = db.session.execute(select(
+        func.min(TaskAssignment.date),
+        func.max(TaskAssignment.date),
+        select(func.min(AssignmentTemplate.start_date)).scalar_subquery(),
+        select(func.max(AssignmentTemplate.end_date)).scalar_subquery(),
+    )).one()
+    los, his = [d for d in (lo, tlo) if d], [d for d in (hi, thi) if d]
+    return (min(los), max(his)) if los else None
+
+
 @bp.get("/student-performance")
 def student_performance():
     start = _parse_date(request.args.get("start"))
@@ -62,40 +118,41 @@ def student_performance():
         start = None
         end = None
 
-    # Join TaskAssignmentStudent -> TaskAssignment -> Student
-    q = (
-        TaskAssignmentStudent.query
-        .join(TaskAssignment, TaskAssignmentStudent.assignment_id == TaskAssignment.id)
-        .join(Student, TaskAssignmentStudent.student_id == Student.id)
-    )
-    if apply_date_filter:
-        q = q.filter(TaskAssignment.date >= start, TaskAssignment.date <= end)
-
-    # Aggregate in Python for simplicity
+    # Add up the per-week counts; weeks are cached (see app/report_cache.py)
+    span = (start, end) if apply_date_filter else _data_range()
+    totals: dict[int, list] = {}
+    if span:
+        for segment in weekly_segments("student-performance", *span, _performance_weeks):
+            for pk, assigned, completed, overdue in segment:
+                counts = totals.setdefault(pk, [0, 0, 0])
+                counts[0] += assigned
+                counts[1] += completed
+                counts[2] += overdue
+
+    # Names and ids are read live so cached weeks never show stale details
+    details = db.session.execute(
+        select(
+            Student.id, public_id(Student), Student.student_id, Student.first_name, Student.last_name,
+            Student.class_section,
+        ).where(Student.id.in_(totals))
+    ) if totals else []
     perf: dict[int, dict] = {}
-    for tas in q.all():
-        s = tas.student
-        ta = tas.assignment
-        if s.id not in perf:
-            perf[s.id] = {
-                "id": s.ext_id or str(s.id),
-                "studentId": s.student_id,
-                "name": f"{s.first_name} {s.last_name}",
-                "classSection": s.class_section,
-                "assigned": 0,
-                "completed": 0,
-                "overdue": 0,
-            }
-        perf[s.id]["assigned"] += 1
-        status = (ta.status or "").lower()
-        if status == "completed":
-            perf[s.id]["completed"] += 1
-        elif status == "overdue":
-            perf[s.id]["overdue"] += 1
+    for pk, public, student_id, first_name, last_name, class_section in details:
+        assigned, completed, overdue = totals[pk]
+        perf[pk] = {
+            "id": public,
+            "studentId": student_id,
+            "name": f"{first_name} {last_name}",
+            "classSection": class_section,
+            "assigned": assigned,
+            "completed": completed,
+            "overdue": overdue,
+        }
 
     # Compute completion rate and sort
     students = []
-    for s in perf.values():
+    for pk in sorted(perf):
+        s = perf[pk]
         assigned = s["assigned"] or 0
         completed = s["completed"] or 0
         s["completionRate"] = (completed / assigned) if assigned else 0.0
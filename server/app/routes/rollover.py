@@ -0,0 +1,54 @@
+from flask import Blueprint, request, jsonify
+from datetime import date
+from .. import rollover
+
+bp = Blueprint("rollover", __name__)
+
+
+def _body(*required: str) -> dict | None:
+    data = request.get_json(force=True, silent=True) or {}
+    return data if all(data.get(k) for k in required) else None
+
+
+@bp.post("/deactivate-section")
+def deactivate_section():
+    data = _body("classSection")
+    if data is None:
+        return jsonify({"message": "Missing required fields"}), 400
+    return jsonify({"deactivated": rollover.deactivate_section(data["classSection"])})
+
+
+@bp.post("/reassign-section")
+def reassign_section():
+    data = _body("classSection", "newClassSection")
+    if data is None:
+        return jsonify({"message": "Missing required fields"}), 400
+    return jsonify({"moved": rollover.reassign_section(data["classSection"], data["newClassSection"])})
+
+
+@bp.post("/delete-section")
+def delete_section():
+    data = _body("classSection")
+    if data is None:
+        return jsonify({"message": "Missing required fields"}), 400
+    return jsonify({"deleted": rollover.delete_section(data["classSection"])})
+
+
+@bp.post("/purge-assignments")
+def purge_assignments():
+    data = _body("before")
+    if data is None:
+        return jsonify({"message": "Missing required fields"}), 400
+    try:
+        before = date.fromisoformat(data["before"])
+    except (TypeError, ValueError):
+        return jsonify({"message": "Invalid date"}), 400
+    return jsonify(rollover.purge_assignments(before))
+
+
+@bp.post("/retire-classrooms")
+def retire_classrooms():
+    data = _body("classroomIds")
+    if data is None or not isinstance(data["classroomIds"], list):
+        return jsonify({"message": "Missing required fields"}), 400
+    return jsonify(rollover.retire_classrooms([str(v) for v in data["classroomIds"]]))
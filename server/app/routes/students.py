@@ -2,25 +2,18 @@ from flask import Blueprint, request, jsonify
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from ..db import db
-from ..models.models import Student, TaskAssignmentStudent
+from ..models.models import AssignmentTemplateStudent, Student, TaskAssignmentStudent
+from ..concurrency import expected_version, versioned_response, update_failed
+from ..serialization import STUDENT_FIELDS
+from ..tokens import revoke
 
 bp = Blueprint("students", __name__)
 
 
 @bp.get("/")
 def list_students():
-    items = Student.query.order_by(Student.last_name, Student.first_name).all()
-    return jsonify([
-        {
-            "id": s.ext_id or str(s.id),
-            "studentId": s.student_id,
-            "firstName": s.first_name,
-            "lastName": s.last_name,
-            "classSection": s.class_section,
-            "status": s.status,
-        }
-        for s in items
-    ])
+    stmt = STUDENT_FIELDS.select().order_by(Student.last_name, Student.first_name)
+    return jsonify(STUDENT_FIELDS.rows(stmt))
 
 
 @bp.post("/")
@@ -56,31 +49,35 @@ def create_student():
 
 @bp.put("/<ext_id>")
 def update_student(ext_id: str):
-    # Resolve student by ext id, falling back to numeric internal id when applicable
-    s = Student.get_by_identifier(ext_id)
-    if not s:
-        return jsonify({"message": "Not found"}), 404
-
     data = request.get_json(force=True, silent=True) or {}
-    for k, v in {
+    try:
+        version = expected_version(data)
+    except ValueError:
+        return jsonify({"message": "Invalid version"}), 400
+
+    values = {k: v for k, v in {
         "student_id": data.get("studentId"),
         "first_name": data.get("firstName"),
         "last_name": data.get("lastName"),
         "class_section": data.get("classSection"),
         "status": data.get("status"),
-    }.items():
-        if v is not None:
-            setattr(s, k, v)
+    }.items() if v is not None}
 
     if pwd := data.get("password"):
-        s.set_password(pwd)
+        values["password_hash"] = Student.hash_password(pwd)
 
+    # Resolve student by ext id, falling back to numeric internal id when applicable
     try:
+        row = Student.conditional_update(ext_id, values, version)
+        if row and ("password_hash" in values or values.get("status") == "inactive"):
+            revoke("student", row.ext_id or str(row.id))
         db.session.commit()
     except IntegrityError as e:
         db.session.rollback()
         return jsonify({"message": "Duplicate studentId detected", "detail": str(e.orig) if getattr(e, 'orig', None) else None}), 409
-    return jsonify({"id": s.ext_id or str(s.id)})
+    if not row:
+        return update_failed(Student, ext_id)
+    return versioned_response(row)
 
 
 @bp.delete("/<ext_id>")
@@ -91,7 +88,9 @@ def delete_student(ext_id: str):
         return jsonify({"message": "Not found"}), 404
     # Remove assignment links first to satisfy FK constraints
     TaskAssignmentStudent.query.filter_by(student_id=s.id).delete()
+    AssignmentTemplateStudent.query.filter_by(student_id=s.id).delete()
     db.session.flush()
+    revoke("student", s.ext_id or str(s.id))
     db.session.delete(s)
     db.session.commit()
     return jsonify({"ok": True})
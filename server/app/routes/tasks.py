@@ -3,17 +3,16 @@ from datetime import datetime
 from sqlalchemy.exc import IntegrityError
 from ..db import db
 from ..models.models import CleaningTask, ChecklistTask
+from ..concurrency import expected_version, versioned_response, update_failed
+from ..serialization import TASK_FIELDS
 
 bp = Blueprint("tasks", __name__)
 
 
 @bp.get("/")
 def list_tasks():
-    items = CleaningTask.query.order_by(CleaningTask.name).all()
-    return jsonify([
-        {"id": t.ext_id or str(t.id), "name": t.name, "description": t.description or ""}
-        for t in items
-    ])
+    stmt = TASK_FIELDS.select().order_by(CleaningTask.name)
+    return jsonify(TASK_FIELDS.rows(stmt))
 
 
 @bp.post("/")
@@ -34,16 +33,25 @@ def create_task():
 
 @bp.put("/<ext_id>")
 def update_task(ext_id: str):
-    t = CleaningTask.get_by_identifier(ext_id)
-    if not t:
-        return jsonify({"message": "Not found"}), 404
     data = request.get_json(force=True, silent=True) or {}
+    try:
+        version = expected_version(data)
+    except ValueError:
+        return jsonify({"message": "Invalid version"}), 400
+    values = {}
     if data.get("name") is not None:
-        t.name = data["name"]
+        values["name"] = data["name"]
     if data.get("description") is not None:
-        t.description = data["description"]
-    db.session.commit()
-    return jsonify({"id": t.ext_id or str(t.id)})
+        values["description"] = data["description"]
+    try:
+        row = CleaningTask.conditional_update(ext_id, values, version)
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({"message": "Task with same name/id already exists", "detail": str(e.orig) if getattr(e, 'orig', None) else None}), 409
+    if not row:
+        return update_failed(CleaningTask, ext_id)
+    return versioned_response(row)
 
 
 @bp.delete("/<ext_id>")
@@ -0,0 +1,168 @@
+from flask import Blueprint, request, jsonify
+from datetime import datetime, date
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+from ..concurrency import expected_version, versioned_response, update_failed
+from ..db import db
+from ..models.models import (
+    AssignmentTemplate, AssignmentTemplateStudent, TaskAssignment, Student, Classroom, Checklist, WEEKDAY_CODES,
+)
+
+bp = Blueprint("templates", __name__)
+
+
+def _parse_weekdays(value) -> str | None:
+    """Normalize ['MO', 'we'] / 'MO,WE' / 'FREQ=WEEKLY;BYDAY=MO,WE' to 'MO,WE'."""
+    if isinstance(value, str):
+        for part in value.split(";"):
+            if part.upper().startswith("BYDAY="):
+                value = part[len("BYDAY="):]
+        value = value.split(",")
+    codes = {str(v).strip().upper() for v in value or []}
+    if not codes or not codes <= set(WEEKDAY_CODES):
+        return None
+    return ",".join(c for c in WEEKDAY_CODES if c in codes)
+
+
+def _parse_exdates(values) -> str:
+    return ",".join(sorted({date.fromisoformat(v).isoformat() for v in values or []}))
+
+
+def _set_students(tpl, student_ids):
+    """Replace the template's student links; ``tpl`` is a template or a conditional_update row."""
+    AssignmentTemplateStudent.query.filter_by(template_id=tpl.id).delete()
+    db.session.flush()
+    for sid in student_ids or []:
+        student = Student.get_by_identifier(sid)
+        if student:
+            db.session.add(AssignmentTemplateStudent(template_id=tpl.id, student_id=student.id))
+
+
+def _serialize(tpl: AssignmentTemplate) -> dict:
+    return {
+        "id": tpl.ext_id or str(tpl.id),
+        "classroomId": tpl.classroom.ext_id or str(tpl.classroom.id),
+        "checklistId": tpl.checklist.ext_id or str(tpl.checklist.id),
+        "studentIds": [s.student.ext_id or str(s.student.id) for s in tpl.students],
+        "startDate": tpl.start_date.isoformat(),
+        "endDate": tpl.end_date.isoformat(),
+        "weekdays": tpl.weekdays.split(","),
+        "exceptions": sorted(d.isoformat() for d in tpl.exception_dates()),
+        "rrule": tpl.rrule,
+        "comments": tpl.comments,
+        "version": tpl.version,
+    }
+
+
+@bp.get("/")
+def list_templates():
+    items = (
+        AssignmentTemplate.query
+        .options(
+            joinedload(AssignmentTemplate.classroom),
+            joinedload(AssignmentTemplate.checklist),
+            selectinload(AssignmentTemplate.students).joinedload(AssignmentTemplateStudent.student),
+        )
+        .order_by(AssignmentTemplate.start_date.desc())
+        .all()
+    )
+    return jsonify([_serialize(t) for t in items])
+
+
+@bp.post("/")
+def create_template():
+    data = request.get_json(force=True, silent=True) or {}
+    required = ["classroomId", "checklistId", "studentIds", "startDate", "endDate", "weekdays"]
+    if any(not data.get(k) for k in required):
+        return jsonify({"message": "Missing required fields"}), 400
+
+    classroom = Classroom.get_by_identifier(data["classroomId"])
+    checklist = Checklist.get_by_identifier(data["checklistId"])
+    if not classroom or not checklist:
+        return jsonify({"message": "Invalid classroomId or checklistId"}), 400
+
+    weekdays = _parse_weekdays(data["weekdays"])
+    try:
+        start = date.fromisoformat(data["startDate"])
+        end = date.fromisoformat(data["endDate"])
+        exdates = _parse_exdates(data.get("exceptions"))
+    except ValueError:
+        return jsonify({"message": "Invalid date format"}), 400
+    if not weekdays or end < start:
+        return jsonify({"message": "Invalid weekdays or date range"}), 400
+
+    ext_id = data.get("id") or f"r-{int(datetime.utcnow().timestamp()*1000)}"
+    tpl = AssignmentTemplate(
+        ext_id=ext_id,
+        classroom_id=classroom.id,
+        checklist_id=checklist.id,
+        start_date=start,
+        end_date=end,
+        weekdays=weekdays,
+        exdates=exdates,
+        comments=data.get("comments"),
+    )
+    db.session.add(tpl)
+    db.session.flush()
+    _set_students(tpl, data["studentIds"])
+
+    db.session.commit()
+    return jsonify({"id": tpl.ext_id or str(tpl.id)}), 201
+
+
+@bp.put("/<ext_id>")
+def update_template(ext_id: str):
+    """Update a template. Only future virtual occurrences change; materialized ones keep their values."""
+    data = request.get_json(force=True, silent=True) or {}
+    try:
+        version = expected_version(data)
+    except ValueError:
+        return jsonify({"message": "Invalid version"}), 400
+
+    values = {}
+    try:
+        if data.get("startDate") is not None:
+            values["start_date"] = date.fromisoformat(data["startDate"])
+        if data.get("endDate") is not None:
+            values["end_date"] = date.fromisoformat(data["endDate"])
+        if "exceptions" in data:
+            values["exdates"] = _parse_exdates(data["exceptions"])
+    except ValueError:
+        return jsonify({"message": "Invalid date format"}), 400
+    if data.get("weekdays") is not None:
+        values["weekdays"] = _parse_weekdays(data["weekdays"])
+        if not values["weekdays"]:
+            return jsonify({"message": "Invalid weekdays"}), 400
+    if "comments" in data:
+        values["comments"] = data["comments"]
+
+    # The version bump also covers changes to the student links below
+    row = AssignmentTemplate.conditional_update(ext_id, values, version)
+    if not row:
+        db.session.rollback()
+        return update_failed(AssignmentTemplate, ext_id)
+    if "start_date" in values or "end_date" in values:
+        # Only one end may have been sent; check the range the UPDATE left behind
+        start, end = db.session.execute(
+            select(AssignmentTemplate.start_date, AssignmentTemplate.end_date).where(AssignmentTemplate.id == row.id)
+        ).one()
+        if end < start:
+            db.session.rollback()
+            return jsonify({"message": "Invalid date range"}), 400
+    if "studentIds" in data:
+        _set_students(row, data["studentIds"])
+
+    db.session.commit()
+    return versioned_response(row)
+
+
+@bp.delete("/<ext_id>")
+def delete_template(ext_id: str):
+    tpl = AssignmentTemplate.get_by_identifier(ext_id)
+    if not tpl:
+        return jsonify({"message": "Not found"}), 404
+    # Materialized occurrences stay as regular assignments
+    TaskAssignment.query.filter_by(template_id=tpl.id).update({"template_id": None})
+    db.session.delete(tpl)
+    db.session.commit()
+    return jsonify({"ok": True})
@@ -0,0 +1,173 @@
+"""Column-level serialization for list endpoints.
+
+Each resource has a precompiled field map from output key to SQL expression.
+List routes select exactly those columns as Core rows (no ORM entities, no
+per-row ``ext_id or str(id)`` in Python) and zip them into dicts.
+"""
+from datetime import date, datetime
+from typing import Callable, Optional
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.sql import ColumnElement
+from .db import db
+from .models.models import (
+    AdminUser, AssignmentTemplate, Checklist, ChecklistTask, Classroom, CleaningTask, Student, TaskAssignment,
+    TaskAssignmentStudent,
+)
+
+
+def public_id(model) -> ColumnElement:
+    """SQL equivalent of ``obj.ext_id or str(obj.id)``."""
+    return func.coalesce(func.nullif(model.ext_id, ""), cast(model.id, String))
+
+
+def isoformat(value: Optional[date | datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+class FieldMap:
+    """Ordered output keys, their SQL expressions and optional per-key converters."""
+
+    def __init__(self, converters: Optional[dict[str, Callable]] = None, **fields: ColumnElement):
+        self.keys = tuple(fields)
+        self.columns = tuple(expr.label(key) for key, expr in fields.items())
+        self.converters = [(self.keys.index(k), fn) for k, fn in (converters or {}).items()]
+
+    def select(self):
+        return select(*self.columns)
+
+    def rows(self, stmt) -> list[dict]:
+        keys = self.keys
+        result = db.session.execute(stmt)
+        if not self.converters:
+            return [dict(zip(keys, row)) for row in result]
+        converters = self.converters
+        out = []
+        for row in result:
+            values = list(row)
+            for i, fn in converters:
+                values[i] = fn(values[i])
+            out.append(dict(zip(keys, values)))
+        return out
+
+
+STUDENT_FIELDS = FieldMap(
+    id=public_id(Student),
+    studentId=Student.student_id,
+    firstName=Student.first_name,
+    lastName=Student.last_name,
+    classSection=Student.class_section,
+    status=Student.status,
+    version=Student.version,
+)
+
+CLASSROOM_FIELDS = FieldMap(
+    id=public_id(Classroom),
+    classroomId=Classroom.classroom_id,
+    name=Classroom.name,
+    description=func.coalesce(Classroom.description, ""),
+    version=Classroom.version,
+)
+
+TASK_FIELDS = FieldMap(
+    id=public_id(CleaningTask),
+    name=CleaningTask.name,
+    description=func.coalesce(CleaningTask.description, ""),
+    version=CleaningTask.version,
+)
+
+# taskIds is filled in from CHECKLIST_TASK_IDS
+CHECKLIST_FIELDS = FieldMap(
+    id=public_id(Checklist),
+    name=Checklist.name,
+    description=func.coalesce(Checklist.description, ""),
+    version=Checklist.version,
+)
+
+CHECKLIST_TASK_IDS = (
+    select(public_id(Checklist), public_id(CleaningTask))
+    .select_from(ChecklistTask)
+    .join(Checklist, ChecklistTask.checklist_id == Checklist.id)
+    .join(CleaningTask, ChecklistTask.task_id == CleaningTask.id)
+    .order_by(ChecklistTask.checklist_id, ChecklistTask.position)
+)
+
+ADMIN_USER_FIELDS = FieldMap(
+    converters={"lastLogin": isoformat},
+    id=public_id(AdminUser),
+    username=AdminUser.username,
+    fullName=AdminUser.full_name,
+    role=AdminUser.role,
+    status=AdminUser.status,
+    lastLogin=AdminUser.last_login,
+    version=AdminUser.version,
+)
+
+# studentIds is filled in by the assignments route; select() needs the joins below
+ASSIGNMENT_FIELDS = FieldMap(
+    converters={"date": isoformat, "completedAt": isoformat},
+    id=public_id(TaskAssignment),
+    date=TaskAssignment.date,
+    classroomId=public_id(Classroom),
+    checklistId=public_id(Checklist),
+    status=TaskAssignment.status,
+    completedAt=TaskAssignment.completed_at,
+    comments=TaskAssignment.comments,
+    version=TaskAssignment.version,
+    templateId=public_id(AssignmentTemplate),
+)
+
+# (assignment id, student id) pairs; filter on TaskAssignment.date as needed
+ASSIGNMENT_STUDENT_IDS = (
+    select(public_id(TaskAssignment), public_id(Student))
+    .select_from(TaskAssignmentStudent)
+    .join(TaskAssignment, TaskAssignmentStudent.assignment_id == TaskAssignment.id)
+    .join(Student, TaskAssignmentStudent.student_id == Student.id)
+    .order_by(TaskAssignmentStudent.assignment_id, TaskAssignmentStudent.student_id)
+)
+
+# One row per (assignment, student) for the expanded view, newest first
+EXPANDED_MEMBERS = (
+    select(
+        public_id(TaskAssignment), TaskAssignment.date, public_id(Classroom), Classroom.name,
+        public_id(Student), Student.first_name, Student.last_name,
+        TaskAssignment.checklist_id, TaskAssignment.status, TaskAssignment.completed_at, TaskAssignment.comments,
+    )
+    .select_from(TaskAssignmentStudent)
+    .join(TaskAssignment, TaskAssignmentStudent.assignment_id == TaskAssignment.id)
+    .join(Classroom, TaskAssignment.classroom_id == Classroom.id)
+    .join(Student, TaskAssignmentStudent.student_id == Student.id)
+    .order_by(TaskAssignment.date.desc(), TaskAssignment.id, TaskAssignmentStudent.student_id)
+)
+
+CHECKLIST_TASKS = (
+    select(ChecklistTask.checklist_id, public_id(CleaningTask), CleaningTask.name)
+    .select_from(ChecklistTask)
+    .join(CleaningTask, ChecklistTask.task_id == CleaningTask.id)
+    .order_by(ChecklistTask.checklist_id, ChecklistTask.position)
+)
+
+
+def assignment_select():
+    return (
+        ASSIGNMENT_FIELDS.select()
+        .select_from(TaskAssignment)
+        .join(Classroom, TaskAssignment.classroom_id == Classroom.id)
+        .join(Checklist, TaskAssignment.checklist_id == Checklist.id)
+        .outerjoin(AssignmentTemplate, TaskAssignment.template_id == AssignmentTemplate.id)
+    )
+
+
+def checklist_task_ids() -> dict[str, list[str]]:
+    """Ordered task ids per checklist public id, in one query."""
+    result: dict[str, list[str]] = {}
+    for checklist_id, task_id in db.session.execute(CHECKLIST_TASK_IDS):
+        result.setdefault(checklist_id, []).append(task_id)
+    return result
+
+
+def checklist_tasks() -> dict[int, list[tuple[str, str]]]:
+    """Ordered (task id, task name) per checklist primary key, in one query."""
+    result: dict[int, list[tuple[str, str]]] = {}
+    for checklist_pk, task_id, name in db.session.execute(CHECKLIST_TASKS):
+        result.setdefault(checklist_pk, []).append((task_id, name))
+    return result
@@ -0,0 +1,218 @@
+"""Multi-school tenancy with per-tenant database shards.
+
+* The tenant comes from the ``X-Tenant`` header (or ``?tenant=``) and
+  defaults to ``DEFAULT_TENANT``.
+* The ``tenants`` directory table in the default database maps each tenant to
+  a bind key in ``SQLALCHEMY_BINDS`` (its shard). Tenants with no row live in
+  the default database.
+* Every ORM SELECT/UPDATE/DELETE gets a ``tenant_id`` criterion for all
+  ``BaseModel`` entities, and new rows get the current tenant by default,
+  so route code needs no tenant filters.
+
+CLI::
+
+    flask shard-init east                 # create the tenant tables on a shard
+    flask tenant-add north-high "North High" --shard east
+    flask tenant-move north-high west     # copy rows, switch directory, delete old rows
+"""
+import time
+import click
+from flask import Flask, jsonify, request
+from sqlalchemy import event, insert, select, delete
+from sqlalchemy.orm import Session, with_loader_criteria
+from .cache import TTLCache, invalidate_on_write
+from .db import db, DEFAULT_TENANT, GLOBAL_TABLES, _shard, _tenant, current_tenant, use_tenant
+from .models.models import BaseModel, Tenant
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+# How long workers may keep using a cached directory entry
+DIRECTORY_CACHE_SECONDS = 5
+
+_directory = invalidate_on_write(TTLCache(DIRECTORY_CACHE_SECONDS))
+
+
+def lookup_tenant(slug: str) -> tuple[str | None, str] | None:
+    """(shard bind key, status) for a tenant, or None if it does not exist."""
+    hit = _directory.get(slug)
+    if hit is not None:
+        return hit
+    with use_tenant(DEFAULT_TENANT):
+        row = db.session.execute(select(Tenant.shard, Tenant.status).where(Tenant.slug == slug)).first()
+    if row:
+        entry = (row.shard, row.status)
+    elif slug == DEFAULT_TENANT:
+        entry = (None, "active")
+    else:
+        return None
+    _directory.set(slug, entry)
+    return entry
+
+
+def tenant_tables():
+    """Tables stored on every shard, in dependency order."""
+    return [t for t in db.metadata.sorted_tables if t.name not in GLOBAL_TABLES]
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_to_tenant(orm_execute_state):
+    if orm_execute_state.is_column_load or orm_execute_state.is_relationship_load:
+        return
+    if orm_execute_state.is_select or orm_execute_state.is_update or orm_execute_state.is_delete:
+        tenant = current_tenant()
+        orm_execute_state.statement = orm_execute_state.statement.options(
+            with_loader_criteria(BaseModel, lambda cls: cls.tenant_id == tenant, include_aliases=True)
+        )
+
+
+def init_app(app: Flask):
+    header = app.config.get("TENANT_HEADER", "X-Tenant")
+
+    @app.before_request
+    def _resolve_tenant():
+        slug = request.headers.get(header) or request.args.get("tenant") or DEFAULT_TENANT
+        entry = lookup_tenant(slug)
+        if entry is None:
+            return jsonify({"message": "Unknown tenant"}), 404
+        shard, status = entry
+        if shard is not None and shard not in app.config.get("SQLALCHEMY_BINDS", {}):
+            return jsonify({"message": "Tenant shard is not configured"}), 503
+        if status == "moving" and request.method in WRITE_METHODS:
+            return jsonify({"message": "Tenant is being moved, try again shortly"}), 503
+        request.tenant_tokens = (_tenant.set(slug), _shard.set(shard))
+
+    @app.teardown_request
+    def _reset_tenant(exc):
+        tokens = getattr(request, "tenant_tokens", None)
+        if tokens:
+            _tenant.reset(tokens[0])
+            _shard.reset(tokens[1])
+
+    @app.cli.command("shard-init")
+    @click.argument("shard", required=False)
+    def shard_init_command(shard):
+        """Create the tenant tables on SHARD (default database if omitted)."""
+        engine = db.engines[shard] if shard else db.engine
+        db.metadata.create_all(engine, tables=tenant_tables())
+        print(f"Initialized tables on {shard or 'default'}")
+
+    @app.cli.command("tenant-add")
+    @click.argument("slug")
+    @click.argument("name")
+    @click.option("--shard", default=None, help="bind key from SQLALCHEMY_BINDS (default database if omitted)")
+    def tenant_add_command(slug, name, shard):
+        if shard and shard not in app.config.get("SQLALCHEMY_BINDS", {}):
+            raise click.ClickException(f"Unknown shard {shard!r}")
+        db.session.add(Tenant(slug=slug, name=name, shard=shard))
+        db.session.commit()
+        print(f"Added tenant {slug} on {shard or 'default'}")
+
+    @app.cli.command("tenant-move")
+    @click.argument("slug")
+    @click.argument("target")
+    def tenant_move_command(slug, target):
+        """Move SLUG's rows to TARGET shard ('default' for the default database)."""
+        counts = move_tenant(slug, None if target == "default" else target)
+        print(", ".join(f"{name}={n}" for name, n in counts.items()) or "nothing to move")
+
+
+def move_tenant(slug: str, target: str | None, chunk_size: int = 500) -> dict[str, int]:
+    """Copy a tenant's rows to another shard, repoint the directory, then delete the originals.
+
+    Integer primary keys are reassigned on the target (they may collide with
+    other tenants there) and foreign keys are remapped. Writes for the tenant
+    are rejected while its directory status is 'moving'.
+    """
+    entry = lookup_tenant(slug)
+    if entry is None:
+        raise click.ClickException(f"Unknown tenant {slug!r}")
+    source = entry[0]
+    if source == target:
+        raise click.ClickException(f"{slug} is already on {target or 'default'}")
+
+    tenant = Tenant.query.filter_by(slug=slug).first()
+    if tenant is None:  # the implicit default tenant gets a directory row on first move
+        tenant = Tenant(slug=slug, name=slug, shard=source)
+        db.session.add(tenant)
+    tenant.status = "moving"
+    db.session.commit()
+    # Let workers' cached directory entries expire so they start rejecting writes
+    time.sleep(DIRECTORY_CACHE_SECONDS)
+
+    src_engine = db.engines[source] if source else db.engine
+    dst_engine = db.engines[target] if target else db.engine
+    tables = tenant_tables()
+    # old id -> new id per tenant table; only the ids are kept in memory, rows are streamed
+    id_maps: dict[str, dict[int, int]] = {}
+    counts: dict[str, int] = {}
+
+    try:
+        with src_engine.connect() as src, dst_engine.begin() as dst:
+            for table in tables:
+                counts[table.name] = 0
+                if "tenant_id" in table.c:
+                    id_maps[table.name] = {}
+                for chunk in _source_chunks(src, table, slug, id_maps, chunk_size):
+                    rows = [dict(r._mapping) for r in chunk]
+                    counts[table.name] += len(rows)
+                    for row in rows:
+                        for fk in table.foreign_keys:
+                            parent = fk.column.table.name
+                            if parent in id_maps and row[fk.parent.name] is not None:
+                                row[fk.parent.name] = id_maps[parent][row[fk.parent.name]]
+                    if "tenant_id" in table.c:
+                        old_ids = [row.pop("id") for row in rows]
+                        stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+                        new_ids = [r.id for r in dst.execute(stmt, rows)]
+                        id_maps[table.name].update(zip(old_ids, new_ids))
+                    else:
+                        dst.execute(insert(table), rows)
+
+        with db.session.begin_nested():
+            tenant.shard = target
+            tenant.status = "active"
+        db.session.commit()
+
+        # Old rows are unreachable now; remove them children first, one short transaction per chunk
+        for table in reversed(tables):
+            column, ids = _owner_ids(table, id_maps)
+            for i in range(0, len(ids), chunk_size):
+                with src_engine.begin() as src:
+                    src.execute(delete(table).where(column.in_(ids[i:i + chunk_size])))
+    except Exception:
+        db.session.rollback()
+        tenant.status = "active"
+        db.session.commit()
+        raise
+    return counts
+
+
+def _owner_ids(table, id_maps: dict[str, dict[int, int]]):
+    """(column, old ids) selecting a table's rows of the tenant being moved.
+
+    Tenant tables are matched by their own id; rows of a table without
+    tenant_id belong to the tenant through their first foreign key.
+    """
+    if "tenant_id" in table.c:
+        return table.c.id, list(id_maps[table.name])
+    fk = next(iter(sorted(table.foreign_keys, key=lambda f: list(table.c).index(f.parent))))
+    return fk.parent, list(id_maps.get(fk.column.table.name, {}))
+
+
+def _source_chunks(src, table, slug: str, id_maps, chunk_size: int):
+    """The tenant's rows of ``table`` in chunks of about ``chunk_size``, so neither rows nor IN lists grow with the tenant."""
+    if "tenant_id" in table.c:
+        last = 0
+        while True:
+            rows = src.execute(
+                select(table).where(table.c.tenant_id == slug, table.c.id > last).order_by(table.c.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                return
+            yield rows
+            last = rows[-1].id
+    else:
+        column, parent_ids = _owner_ids(table, id_maps)
+        for i in range(0, len(parent_ids), chunk_size):
+            rows = src.execute(select(table).where(column.in_(parent_ids[i:i + chunk_size]))).all()
+            if rows:
+                yield rows
@@ -0,0 +1,211 @@
+"""Signed, expiring bearer tokens and the ``/api/*`` guard.
+
+* Login returns a short-lived access token and a longer-lived refresh token.
+  Both are HMAC-signed with ``SECRET_KEY`` (itsdangerous, already a Flask
+  dependency) and carry the user kind, public id, role, tenant and issue time
+  (``iat``, sub-second, so a login right after a revocation is not caught by it).
+* The guard checks the signature and expiry without touching the database.
+  Verified principals are cached per token for ``AUTH_PRINCIPAL_CACHE_SECONDS``
+  (at most ``AUTH_PRINCIPAL_CACHE_SIZE`` tokens, least recently used first out).
+* Deactivating a user, changing their password or role, or deleting them
+  writes a row to ``revocations``. Each worker keeps those rows in memory and
+  reloads them every ``AUTH_REVOCATION_REFRESH_SECONDS`` (immediately after
+  its own revocations). Tokens issued before a user's revocation are rejected.
+  Rows older than the refresh-token lifetime are pruned, since every token
+  they could reject has expired.
+* ``POST /api/auth/refresh`` trades a refresh token for a new access token
+  with one indexed lookup and no bcrypt verification.
+"""
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from flask import Flask, current_app, g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session
+from .cache import TTLCache
+from .db import db, current_tenant
+from .models.models import Revocation
+
+ACCESS = "access"
+REFRESH = "refresh"
+# Reachable without a token
+PUBLIC_ENDPOINTS = {"health", "auth.admin_login", "auth.student_login", "auth.refresh"}
+# Students may mark their own assignments completed (see assignments.update_assignment)
+# and read everything but these
+STUDENT_WRITABLE_ENDPOINTS = {"assignments.update_assignment"}
+STUDENT_WRITABLE_FIELDS = {"status", "completedAt", "comments", "version"}
+STUDENT_HIDDEN_PREFIXES = ("/api/admin-users/", "/api/audit/", "/api/metrics")
+# Only admins with this role may manage admin users or run bulk term rollover
+ADMINISTRATOR_ROLE = "Administrator"
+ADMINISTRATOR_PREFIXES = ("/api/admin-users/", "/api/rollover/")
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    kind: str  # "admin" or "student"
+    id: str  # public id (ext_id or str(id))
+    role: str
+    tenant: str
+    issued_at: float
+    expires_at: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.id}"
+
+
+_principals: TTLCache | None = None
+_revocations: TTLCache | None = None
+
+
+def _serializer(purpose: str) -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt=f"piyuclean-{purpose}")
+
+
+def _lifetime(purpose: str) -> int:
+    key = "AUTH_ACCESS_TOKEN_SECONDS" if purpose == ACCESS else "AUTH_REFRESH_TOKEN_SECONDS"
+    return current_app.config.get(key, 900 if purpose == ACCESS else 7 * 24 * 3600)
+
+
+def issue_token(purpose: str, kind: str, public_id: str, role: str) -> str:
+    return _serializer(purpose).dumps(
+        {"sub": f"{kind}:{public_id}", "role": role, "tid": current_tenant(), "iat": time.time()}
+    )
+
+
+def issue_tokens(kind: str, public_id: str, role: str) -> dict:
+    """Login response fields: a fresh access and refresh token pair."""
+    return {
+        "accessToken": issue_token(ACCESS, kind, public_id, role),
+        "refreshToken": issue_token(REFRESH, kind, public_id, role),
+        "tokenType": "Bearer",
+        "expiresIn": _lifetime(ACCESS),
+    }
+
+
+def verify_token(token: str, purpose: str) -> Principal | None:
+    """The token's principal if it is authentic, unexpired and not revoked."""
+    lifetime = _lifetime(purpose)
+    try:
+        payload, issued = _serializer(purpose).loads(token, max_age=lifetime, return_timestamp=True)
+        kind, _, public_id = payload["sub"].partition(":")
+        # The signature timestamp has whole seconds only; older tokens have no "iat"
+        issued_at = float(payload.get("iat", issued.timestamp()))
+        principal = Principal(kind, public_id, payload["role"], payload["tid"], issued_at, issued_at + lifetime)
+    except (SignatureExpired, BadSignature, KeyError, TypeError, ValueError):
+        return None
+    return None if is_revoked(principal) else principal
+
+
+def revoke(kind: str, public_id: str):
+    """Invalidate every token issued so far to a user; committed with the caller's transaction."""
+    session = db.session()
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=_lifetime(REFRESH))
+    session.execute(delete(Revocation).where(Revocation.revoked_at < cutoff))
+    session.add(Revocation(tenant_id=current_tenant(), principal=f"{kind}:{public_id}", revoked_at=now))
+    session.info["revoked"] = True
+
+
+def revoke_many(kind: str, public_ids: list[str]):
+    """``revoke`` for many users of one kind with a single multi-row INSERT."""
+    if not public_ids:
+        return
+    session = db.session()
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=_lifetime(REFRESH))
+    session.execute(delete(Revocation).where(Revocation.revoked_at < cutoff))
+    session.execute(insert(Revocation), [
+        {"tenant_id": current_tenant(), "principal": f"{kind}:{public_id}", "revoked_at": now}
+        for public_id in public_ids
+    ])
+    session.info["revoked"] = True
+
+
+def _revoked_since() -> dict[tuple[str, str], float]:
+    """(tenant, principal) -> latest revocation time, for revocations still relevant."""
+    hit = _revocations.get("all") if _revocations else None
+    if hit is not None:
+        return hit
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=_lifetime(REFRESH))
+    rows = db.session.execute(
+        select(Revocation.tenant_id, Revocation.principal, func.max(Revocation.revoked_at))
+        .where(Revocation.revoked_at >= cutoff)
+        .group_by(Revocation.tenant_id, Revocation.principal)
+    )
+    result = {(tenant, principal): _timestamp(revoked_at) for tenant, principal, revoked_at in rows}
+    if _revocations:
+        _revocations.set("all", result)
+    return result
+
+
+def _timestamp(value: datetime) -> float:
+    # SQLite returns naive datetimes; they were stored as UTC
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def is_revoked(principal: Principal) -> bool:
+    revoked_at = _revoked_since().get((principal.tenant, principal.key))
+    return revoked_at is not None and principal.issued_at <= revoked_at
+
+
+@event.listens_for(Session, "after_commit")
+def _reload_revocations(session):
+    if session.info.pop("revoked", False) and _revocations:
+        _revocations.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_revocations(session):
+    session.info.pop("revoked", None)
+
+
+def _student_may_write() -> bool:
+    """PUT of status/completedAt/comments on an assignment; the route checks that it is the student's own."""
+    if request.method != "PUT" or request.endpoint not in STUDENT_WRITABLE_ENDPOINTS:
+        return False
+    data = request.get_json(force=True, silent=True)
+    return isinstance(data, dict) and set(data) <= STUDENT_WRITABLE_FIELDS
+
+
+def _unauthorized(message: str):
+    response = jsonify({"message": message})
+    response.headers["WWW-Authenticate"] = "Bearer"
+    return response, 401
+
+
+def init_app(app: Flask):
+    global _principals, _revocations
+    _principals = TTLCache(app.config.get("AUTH_PRINCIPAL_CACHE_SECONDS", 60), app.config.get("AUTH_PRINCIPAL_CACHE_SIZE", 10000))
+    _revocations = TTLCache(app.config.get("AUTH_REVOCATION_REFRESH_SECONDS", 5))
+    if not app.config.get("AUTH_REQUIRED", True):
+        return
+
+    @app.before_request
+    def _require_token():
+        if request.method == "OPTIONS" or request.endpoint in PUBLIC_ENDPOINTS or not request.path.startswith("/api/"):
+            return None
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return _unauthorized("Authentication required")
+
+        principal = _principals.get(token)
+        if principal is None:
+            principal = verify_token(token, ACCESS)
+            if principal is None:
+                return _unauthorized("Invalid or expired token")
+            _principals.set(token, principal)
+        elif principal.expires_at < time.time() or is_revoked(principal):
+            return _unauthorized("Invalid or expired token")
+
+        if principal.tenant != current_tenant():
+            return _unauthorized("Token belongs to a different tenant")
+        if principal.kind == "student" and (
+            request.path.startswith(STUDENT_HIDDEN_PREFIXES)
+            or (request.method not in ("GET", "HEAD") and not _student_may_write())
+        ):
+            return jsonify({"message": "Forbidden"}), 403
+        if principal.kind == "admin" and principal.role != ADMINISTRATOR_ROLE and request.path.startswith(ADMINISTRATOR_PREFIXES):
+            return jsonify({"message": "Forbidden"}), 403
+        g.principal = principal
@@ -0,0 +1,7 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.asgi import create_asgi_app
+
+# uvicorn asgi:app --host 127.0.0.1 --port 5000
+app = create_asgi_app()
@@ -6,50 +6,70 @@ BEGIN;
 -- Admin users
 CREATE TABLE IF NOT EXISTS admin_users (
   id            BIGSERIAL PRIMARY KEY,
-  ext_id        TEXT UNIQUE NOT NULL, -- mirrors storage.ts id (e.g., "1")
-  username      VARCHAR(64) UNIQUE NOT NULL,
+  tenant_id     VARCHAR(64) NOT NULL DEFAULT 'default', -- tenants.slug
+  ext_id        TEXT NOT NULL, -- mirrors storage.ts id (e.g., "1")
+  version       INT NOT NULL DEFAULT 1, -- optimistic concurrency (If-Match / ETag)
+  username      VARCHAR(64) NOT NULL,
   password_hash TEXT NOT NULL,
   full_name     VARCHAR(128) NOT NULL,
   role          VARCHAR(32)  NOT NULL CHECK (role IN ('Administrator','Teacher','Class Adviser')),
   status        VARCHAR(16)  NOT NULL CHECK (status IN ('active','inactive')),
-  last_login    TIMESTAMPTZ
+  last_login    TIMESTAMPTZ,
+  UNIQUE (tenant_id, ext_id),
+  UNIQUE (tenant_id, username)
 );
 
 -- Students
 CREATE TABLE IF NOT EXISTS students (
   id            BIGSERIAL PRIMARY KEY,
-  ext_id        TEXT UNIQUE NOT NULL, -- mirrors storage.ts id (e.g., "student-1")
-  student_id    VARCHAR(64) UNIQUE NOT NULL,
+  tenant_id     VARCHAR(64) NOT NULL DEFAULT 'default', -- tenants.slug
+  ext_id        TEXT NOT NULL, -- mirrors storage.ts id (e.g., "student-1")
+  version       INT NOT NULL DEFAULT 1, -- optimistic concurrency (If-Match / ETag)
+  student_id    VARCHAR(64) NOT NULL,
   first_name    VARCHAR(64) NOT NULL,
   last_name     VARCHAR(64) NOT NULL,
   class_section VARCHAR(64) NOT NULL,
   status        VARCHAR(16) NOT NULL CHECK (status IN ('active','inactive')),
-  password_hash TEXT NOT NULL
+  password_hash TEXT NOT NULL,
+  UNIQUE (tenant_id, ext_id),
+  UNIQUE (tenant_id, student_id)
 );
 
 -- Classrooms
 CREATE TABLE IF NOT EXISTS classrooms (
   id           BIGSERIAL PRIMARY KEY,
-  ext_id       TEXT UNIQUE NOT NULL, -- mirrors storage.ts id (e.g., "classroom-1")
-  classroom_id VARCHAR(64) UNIQUE NOT NULL,
+  tenant_id    VARCHAR(64) NOT NULL DEFAULT 'default', -- tenants.slug
+  ext_id       TEXT NOT NULL, -- mirrors storage.ts id (e.g., "classroom-1")
+  version      INT NOT NULL DEFAULT 1, -- optimistic concurrency (If-Match / ETag)
+  classroom_id VARCHAR(64) NOT NULL,
   name         VARCHAR(128) NOT NULL,
-  description  TEXT
+  description  TEXT,
+  UNIQUE (tenant_id, ext_id),
+  UNIQUE (tenant_id, classroom_id)
 );
 
 -- Cleaning tasks
 CREATE TABLE IF NOT EXISTS cleaning_tasks (
   id          BIGSERIAL PRIMARY KEY,
-  ext_id      TEXT UNIQUE NOT NULL, -- mirrors storage.ts id (e.g., "task-1")
-  name        VARCHAR(128) UNIQUE NOT NULL,
-  description TEXT
+  tenant_id   VARCHAR(64) NOT NULL DEFAULT 'default', -- tenants.slug
+  ext_id      TEXT NOT NULL, -- mirrors storage.ts id (e.g., "task-1")
+  version     INT NOT NULL DEFAULT 1, -- optimistic concurrency (If-Match / ETag)
+  name        VARCHAR(128) NOT NULL,
+  description TEXT,
+  UNIQUE (tenant_id, ext_id),
+  UNIQUE (tenant_id, name)
 );
 
 -- Checklists
 CREATE TABLE IF NOT EXISTS checklists (
   id          BIGSERIAL PRIMARY KEY,
-  ext_id      TEXT UNIQUE NOT NULL, -- mirrors storage.ts id (e.g., "checklist-1")
-  name        VARCHAR(128) UNIQUE NOT NULL,
-  description TEXT
+  tenant_id   VARCHAR(64) NOT NULL DEFAULT 'default', -- tenants.slug
+  ext_id      TEXT NOT NULL, -- mirrors storage.ts id (e.g., "checklist-1")
+  version     INT NOT NULL DEFAULT 1, -- optimistic concurrency (If-Match / ETag)
+  name        VARCHAR(128) NOT NULL,
+  description TEXT,
+  UNIQUE (tenant_id, ext_id),
+  UNIQUE (tenant_id, name)
 );
 
 -- Checklists <-> Tasks (ordered)
@@ -61,16 +81,44 @@ CREATE TABLE IF NOT EXISTS checklist_tasks (
   UNIQUE (checklist_id, position)
 );
 
+-- Recurring assignment templates (weekly on BYDAY codes between two dates, minus EXDATEs).
+-- Occurrences are generated on read and only stored in task_assignments once changed.
+CREATE TABLE IF NOT EXISTS assignment_templates (
+  id           BIGSERIAL PRIMARY KEY,
+  tenant_id    VARCHAR(64) NOT NULL DEFAULT 'default', -- tenants.slug
+  ext_id       TEXT,
+  version      INT NOT NULL DEFAULT 1, -- optimistic concurrency (If-Match / ETag)
+  classroom_id BIGINT NOT NULL REFERENCES classrooms(id),
+  checklist_id BIGINT NOT NULL REFERENCES checklists(id),
+  start_date   DATE NOT NULL,
+  end_date     DATE NOT NULL CHECK (end_date >= start_date),
+  weekdays     VARCHAR(32) NOT NULL, -- e.g. "MO,TU,WE,TH,FR"
+  exdates      TEXT NOT NULL DEFAULT '', -- comma separated ISO dates
+  comments     TEXT,
+  UNIQUE (tenant_id, ext_id)
+);
+
+CREATE TABLE IF NOT EXISTS assignment_template_students (
+  template_id BIGINT NOT NULL REFERENCES assignment_templates(id) ON DELETE CASCADE,
+  student_id  BIGINT NOT NULL REFERENCES students(id),
+  PRIMARY KEY (template_id, student_id)
+);
+
 -- Task assignments (group assignment referencing multiple students and a checklist)
 CREATE TABLE IF NOT EXISTS task_assignments (
   id           BIGSERIAL PRIMARY KEY,
-  ext_id       TEXT UNIQUE, -- optional external id if you want to mirror storage pattern
+  tenant_id    VARCHAR(64) NOT NULL DEFAULT 'default', -- tenants.slug
+  ext_id       TEXT, -- optional external id if you want to mirror storage pattern
+  version      INT NOT NULL DEFAULT 1, -- optimistic concurrency (If-Match / ETag)
   date         DATE NOT NULL,
   classroom_id BIGINT NOT NULL REFERENCES classrooms(id),
   checklist_id BIGINT NOT NULL REFERENCES checklists(id),
   status       VARCHAR(16) NOT NULL DEFAULT 'assigned' CHECK (status IN ('assigned','completed','pending','overdue')),
   completed_at TIMESTAMPTZ,
-  comments     TEXT
+  comments     TEXT,
+  template_id  BIGINT REFERENCES assignment_templates(id) ON DELETE SET NULL, -- set for materialized occurrences
+  UNIQUE (template_id, date),
+  UNIQUE (tenant_id, ext_id)
 );
 
 -- Assignment <-> Students (which students are part of a given assignment)
@@ -80,9 +128,75 @@ CREATE TABLE IF NOT EXISTS task_assignment_students (
   PRIMARY KEY (assignment_id, student_id)
 );
 
+-- Tenant directory (app/tenancy.py); lives in the default database only.
+-- shard is a SQLALCHEMY_BINDS key (SHARD_URLS); NULL means the default database.
+CREATE TABLE IF NOT EXISTS tenants (
+  id     BIGSERIAL PRIMARY KEY,
+  slug   VARCHAR(64) UNIQUE NOT NULL,
+  name   VARCHAR(128) NOT NULL,
+  shard  VARCHAR(64),
+  status VARCHAR(16) NOT NULL DEFAULT 'active' CHECK (status IN ('active','moving'))
+);
+
+-- Token revocations (app/tokens.py); lives in the default database only.
+-- Tokens issued to principal ("admin:<id>" / "student:<id>") before revoked_at are rejected.
+CREATE TABLE IF NOT EXISTS revocations (
+  id         BIGSERIAL PRIMARY KEY,
+  tenant_id  VARCHAR(64) NOT NULL,
+  principal  VARCHAR(160) NOT NULL,
+  revoked_at TIMESTAMPTZ NOT NULL
+);
+
+-- Cached weeks of reports (app/report_cache.py); one row per tenant, report, filters and closed week.
+-- Rows are deleted when a write touches a date in their week, and recomputed on the next request.
+CREATE TABLE IF NOT EXISTS report_segments (
+  id          BIGSERIAL PRIMARY KEY,
+  tenant_id   VARCHAR(64) NOT NULL,
+  report      VARCHAR(64) NOT NULL,
+  filters     VARCHAR(255) NOT NULL DEFAULT '',
+  week_start  DATE NOT NULL,
+  payload     TEXT NOT NULL,
+  computed_at TIMESTAMPTZ NOT NULL,
+  CONSTRAINT uq_report_segments UNIQUE (tenant_id, report, filters, week_start)
+);
+
+-- Write counter per tenant and week (app/report_cache.py). Writes bump it before deleting the week's
+-- segments; a segment is only stored if the counter did not change while it was computed.
+CREATE TABLE IF NOT EXISTS report_weeks (
+  id          BIGSERIAL PRIMARY KEY,
+  tenant_id   VARCHAR(64) NOT NULL,
+  week_start  DATE NOT NULL,
+  version     INTEGER NOT NULL DEFAULT 0,
+  CONSTRAINT uq_report_weeks UNIQUE (tenant_id, week_start)
+);
+
+-- Append-only audit log, written in batches by app/audit.py
+CREATE TABLE IF NOT EXISTS audit_log (
+  id          BIGSERIAL PRIMARY KEY,
+  tenant_id   VARCHAR(64) NOT NULL,
+  occurred_at TIMESTAMPTZ NOT NULL,
+  actor       VARCHAR(128),
+  source      VARCHAR(255), -- e.g. "PUT /api/students/student-1"
+  action      VARCHAR(16) NOT NULL CHECK (action IN ('insert','update','delete')),
+  entity      VARCHAR(64) NOT NULL, -- table name
+  entity_id   TEXT NOT NULL,
+  changes     TEXT NOT NULL -- JSON {"field": [before, after]}
+);
+
 -- Helpful indexes
-CREATE INDEX IF NOT EXISTS idx_task_assignments_date ON task_assignments(date);
+CREATE INDEX IF NOT EXISTS idx_task_assignments_date ON task_assignments(tenant_id, date);
+CREATE INDEX IF NOT EXISTS idx_task_assignments_completed ON task_assignments(tenant_id, completed_at);
+CREATE INDEX IF NOT EXISTS idx_task_assignment_students_student ON task_assignment_students(student_id);
+CREATE INDEX IF NOT EXISTS idx_assignment_template_students_student ON assignment_template_students(student_id);
+CREATE INDEX IF NOT EXISTS idx_checklist_tasks_task ON checklist_tasks(task_id);
+CREATE INDEX IF NOT EXISTS idx_students_status ON students(tenant_id, status);
 CREATE INDEX IF NOT EXISTS idx_task_assignments_classroom ON task_assignments(classroom_id);
 CREATE INDEX IF NOT EXISTS idx_task_assignments_checklist ON task_assignments(checklist_id);
+CREATE INDEX IF NOT EXISTS idx_task_assignments_template ON task_assignments(template_id);
+CREATE INDEX IF NOT EXISTS idx_audit_log_occurred_at ON audit_log(occurred_at);
+CREATE INDEX IF NOT EXISTS idx_revocations_revoked_at ON revocations(revoked_at);
+CREATE INDEX IF NOT EXISTS idx_audit_log_entity ON audit_log(tenant_id, entity, entity_id);
+CREATE INDEX IF NOT EXISTS idx_report_segments_week ON report_segments(tenant_id, week_start);
+CREATE INDEX IF NOT EXISTS idx_assignment_templates_range ON assignment_templates(start_date, end_date);
 
 COMMIT;
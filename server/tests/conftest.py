@@ -0,0 +1,47 @@
+import pytest
+from app import create_app
+from app.config import Config
+from app.db import db
+
+
+def make_app(tmp_path, **overrides):
+    config = type("TestConfig", (Config,), {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "SQLALCHEMY_ENGINE_OPTIONS": {},
+        "AUTH_REQUIRED": False,
+        "AUDIT_ENABLED": False,
+        "TESTING": True,
+        **overrides,
+    })
+    app = create_app(config)
+    with app.app_context():
+        # Only the default database: shard tables are created by the tests that configure shards
+        db.create_all(bind_key=None)
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def school(client):
+    """One classroom, one checklist and two students, created through the API."""
+    client.post("/api/classrooms/", json={"id": "classroom-1", "classroomId": "R1", "name": "Room 1"})
+    client.post("/api/tasks/", json={"id": "task-1", "name": "Sweep"})
+    client.post("/api/checklists/", json={"id": "checklist-1", "name": "Daily", "taskIds": ["task-1"]})
+    for i in (1, 2):
+        client.post("/api/students/", json={
+            "id": f"student-{i}", "studentId": f"S{i}", "firstName": f"First{i}", "lastName": "Last",
+            "classSection": "A",
+        })
+    return client
@@ -0,0 +1,70 @@
+import types
+import pytest
+from sqlalchemy import inspect, update
+from sqlalchemy.dialects import postgresql
+from conftest import make_app
+from app.audit import _returning_old_values
+from app.db import db
+from app.models.models import Student
+
+
+@pytest.fixture
+def audited(tmp_path):
+    app = make_app(tmp_path, AUDIT_ENABLED=True, AUDIT_FLUSH_SECONDS=60)
+    client = app.test_client()
+    client.post("/api/students/", json={
+        "id": "student-1", "studentId": "S1", "firstName": "Ana", "lastName": "Cruz", "classSection": "A",
+    })
+    client.flush = app.extensions["audit"].flush
+    yield client
+    app.extensions["audit"].close()
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_statement_update_records_before_and_after(audited):
+    assert audited.put("/api/students/student-1", json={"firstName": "Anna", "classSection": "B"}).status_code == 200
+    audited.flush()
+    entry = audited.get("/api/audit/?entity=students&entityId=student-1").get_json()["items"][0]
+    assert entry["action"] == "update"
+    assert entry["changes"] == {"first_name": ["Ana", "Anna"], "class_section": ["A", "B"], "version": [1, 2]}
+
+
+def test_password_changes_stay_redacted(audited):
+    audited.put("/api/students/student-1", json={"password": "new-secret"})
+    audited.flush()
+    entry = audited.get("/api/audit/?entity=students").get_json()["items"][0]
+    assert entry["changes"]["password_hash"] == ["***", "***"]
+
+
+def test_postgresql_update_returns_old_values_in_the_same_statement():
+    stmt = (
+        update(Student).where(Student.ext_id == "student-1", Student.version == 1)
+        .values(first_name="Anna", version=Student.version + 1)
+        .returning(Student.id, Student.ext_id, Student.version)
+    )
+    state = types.SimpleNamespace(statement=stmt, bind_mapper=inspect(Student))
+    sql = str(_returning_old_values(state, {"first_name": "Anna"}).compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE) AS \"old\"" in sql and "students.id = \"old\".id" in sql
+    assert sql.endswith('"old".first_name AS audit_before_first_name, "old".version AS audit_before_version')
+
+
+def test_zero_limit_is_rejected(audited):
+    response = audited.get("/api/audit/?limit=0")
+    assert response.status_code == 400
+    assert response.get_json() == {"message": "Invalid limit, before, since or until"}
+
+
+@pytest.mark.parametrize("limit", ["-1", "x"])
+def test_invalid_limit_is_rejected(audited, limit):
+    assert audited.get(f"/api/audit/?limit={limit}").status_code == 400
+
+
+def test_limit_is_capped_and_paginates(audited):
+    for name in ("B", "C", "D"):
+        audited.put("/api/students/student-1", json={"firstName": name})
+    audited.flush()
+    first = audited.get("/api/audit/?limit=2").get_json()
+    assert len(first["items"]) == 2 and first["nextCursor"]
+    rest = audited.get(f"/api/audit/?limit=100000&before={first['nextCursor']}").get_json()
+    assert len(rest["items"]) == 2 and rest["nextCursor"] is None
@@ -0,0 +1,23 @@
+import time
+from app.cache import TTLCache
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = TTLCache(60, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert len(cache._items) == 2
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_expired_entries_are_dropped_on_set():
+    cache = TTLCache(0.01)
+    for i in range(100):
+        cache.set(i, i)
+    time.sleep(0.02)
+    cache.set("fresh", 1)
+    assert len(cache._items) == 1
+    assert cache.get("fresh") == 1
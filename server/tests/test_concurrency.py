@@ -0,0 +1,56 @@
+import pytest
+
+# (list path, item path, PUT body) of resources whose PUT is a conditional update
+RESOURCES = [
+    ("/api/students/", "/api/students/student-1", {"firstName": "Renamed"}),
+    ("/api/classrooms/", "/api/classrooms/classroom-1", {"name": "Renamed"}),
+    ("/api/tasks/", "/api/tasks/task-1", {"name": "Renamed"}),
+    ("/api/checklists/", "/api/checklists/checklist-1", {"name": "Renamed"}),
+]
+
+
+def _version(client, list_path: str, ext_id: str) -> int:
+    return next(row["version"] for row in client.get(list_path).get_json() if row["id"] == ext_id)
+
+
+@pytest.mark.parametrize("list_path, path, body", RESOURCES)
+def test_etag_round_trip(school, list_path, path, body):
+    version = _version(school, list_path, path.rsplit("/", 1)[1])
+    first = school.put(path, headers={"If-Match": f'"{version}"'}, json=body)
+    assert first.status_code == 200
+    assert first.headers["ETag"] == f'"{version + 1}"' and first.get_json()["version"] == version + 1
+    # The ETag of a response is accepted as-is (also weak) by the next PUT
+    second = school.put(path, headers={"If-Match": "W/" + first.headers["ETag"]}, json=body)
+    assert second.status_code == 200 and second.get_json()["version"] == version + 2
+
+
+@pytest.mark.parametrize("list_path, path, body", RESOURCES)
+def test_stale_version_is_rejected(school, list_path, path, body):
+    version = _version(school, list_path, path.rsplit("/", 1)[1])
+    assert school.put(path, json=body).status_code == 200
+    for stale in ({"headers": {"If-Match": f'"{version}"'}, "json": body}, {"json": {**body, "version": version}}):
+        response = school.put(path, **stale)
+        assert response.status_code == 412
+        assert response.get_json()["version"] == version + 1 and response.headers["ETag"] == f'"{version + 1}"'
+
+
+@pytest.mark.parametrize("list_path, path, body", RESOURCES)
+def test_unknown_id_is_not_found(school, list_path, path, body):
+    assert school.put(path.rsplit("/", 1)[0] + "/missing", json=body).status_code == 404
+    assert school.put(path.rsplit("/", 1)[0] + "/missing", headers={"If-Match": '"1"'}, json=body).status_code == 404
+
+
+def test_malformed_version_is_rejected(school):
+    assert school.put("/api/students/student-1", headers={"If-Match": '"abc"'}, json={}).status_code == 400
+
+
+def test_assignment_version_conflict(school):
+    created = school.post("/api/assignments/", json={
+        "id": "a-1", "date": "2030-01-08", "classroomId": "classroom-1", "checklistId": "checklist-1",
+        "studentIds": ["student-1"], "status": "assigned",
+    })
+    assert created.status_code == 201
+    version = _version(school, "/api/assignments/", "a-1")
+    assert school.put("/api/assignments/a-1", json={"status": "completed", "version": version}).status_code == 200
+    assert school.put("/api/assignments/a-1", json={"status": "pending", "version": version}).status_code == 412
+    assert school.put("/api/assignments/a-9", json={"status": "pending"}).status_code == 404
@@ -0,0 +1,37 @@
+import pytest
+
+TEMPLATE = {
+    "id": "r-1", "classroomId": "classroom-1", "checklistId": "checklist-1", "studentIds": ["student-1", "student-2"],
+    "startDate": "2030-01-07", "endDate": "2030-01-16", "weekdays": ["MO"],
+}
+
+
+@pytest.fixture
+def template(school):
+    assert school.post("/api/assignment-templates/", json=TEMPLATE).status_code == 201
+    return school
+
+
+def test_classroom_used_by_a_template_is_kept(template):
+    response = template.delete("/api/classrooms/classroom-1")
+    assert response.status_code == 400
+    assert template.get("/api/assignment-templates/").status_code == 200
+    assert template.get("/api/assignments/").status_code == 200
+
+
+def test_checklist_used_by_a_template_is_kept(template):
+    assert template.delete("/api/checklists/checklist-1").status_code == 400
+    assert template.get("/api/assignments/expanded").status_code == 200
+
+
+def test_classroom_is_deleted_once_its_template_is(template):
+    assert template.delete("/api/assignment-templates/r-1").status_code == 200
+    assert template.delete("/api/classrooms/classroom-1").status_code == 200
+
+
+def test_deleting_a_student_removes_their_template_links(template):
+    assert template.delete("/api/students/student-1").status_code == 200
+    assert template.get("/api/assignment-templates/").get_json()[0]["studentIds"] == ["student-2"]
+    expanded = template.get("/api/assignments/expanded?start=2030-01-07&end=2030-01-07")
+    assert expanded.status_code == 200
+    assert {row["studentId"] for row in expanded.get_json()} == {"student-2"}
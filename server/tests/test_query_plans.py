@@ -0,0 +1,19 @@
+from app import query_plans
+
+
+def test_no_query_plan_regressions(capsys):
+    status = query_plans.main([])
+    assert status == 0, capsys.readouterr().out
+
+
+def test_tenant_wide_index_search_counts_as_a_scan():
+    lines = [
+        "SEARCH task_assignments USING INDEX idx_task_assignments_date (tenant_id=?)",
+        "SEARCH students_1 USING COVERING INDEX ix_students_tenant_id (tenant_id=?)",
+        "SEARCH task_assignments USING INDEX idx_task_assignments_date (tenant_id=? AND date>? AND date<?)",
+        "SCAN classrooms",
+    ]
+    matches = [m.group(1) or m.group(2) for line in lines if (m := query_plans.SQLITE_SCAN.match(line))]
+    assert matches == ["task_assignments", "students_1", "classrooms"]
+    assert query_plans.PG_TENANT_ONLY.match("(tenant_id = 'default'::text)")
+    assert not query_plans.PG_TENANT_ONLY.match("((tenant_id = 'default'::text) AND (date >= '2030-01-01'::date))")
@@ -0,0 +1,115 @@
+import pytest
+from datetime import date
+from sqlalchemy import event, insert, select
+from app.db import db
+from app.models.models import AssignmentTemplate, TaskAssignment
+from app.recurrence import materialize_occurrence
+
+# Mondays and Wednesdays of two weeks in January 2030
+TEMPLATE = {
+    "id": "r-1", "classroomId": "classroom-1", "checklistId": "checklist-1", "studentIds": ["student-1"],
+    "startDate": "2030-01-07", "endDate": "2030-01-16", "weekdays": ["MO", "WE"],
+}
+RANGE = "?start=2030-01-01&end=2030-01-31"
+
+
+@pytest.fixture
+def template(school):
+    assert school.post("/api/assignment-templates/", json=TEMPLATE).status_code == 201
+    return school
+
+
+def _listed(client) -> list[tuple[str, str]]:
+    return sorted((a["id"], a["date"]) for a in client.get(f"/api/assignments/{RANGE}").get_json())
+
+
+def test_occurrences_are_listed(template):
+    assert _listed(template) == [
+        ("r-1@2030-01-07", "2030-01-07"), ("r-1@2030-01-09", "2030-01-09"),
+        ("r-1@2030-01-14", "2030-01-14"), ("r-1@2030-01-16", "2030-01-16"),
+    ]
+
+
+def test_status_change_materializes_in_place(template):
+    assert template.put("/api/assignments/r-1@2030-01-09", json={"status": "completed"}).status_code == 200
+    rows = {a["id"]: a for a in template.get(f"/api/assignments/{RANGE}").get_json()}
+    assert len(rows) == 4
+    assert rows["r-1@2030-01-09"]["status"] == "completed"
+    assert rows["r-1@2030-01-09"]["templateId"] == "r-1"
+
+
+def test_moving_an_occurrence_does_not_regenerate_the_old_date(template):
+    assert template.put("/api/assignments/r-1@2030-01-07", json={"date": "2030-01-08"}).status_code == 200
+    listed = _listed(template)
+    assert [ident for ident, _ in listed].count("r-1@2030-01-07") == 1
+    assert ("r-1@2030-01-07", "2030-01-08") in listed
+    assert len(listed) == 4
+    exceptions = template.get("/api/assignment-templates/").get_json()[0]["exceptions"]
+    assert exceptions == ["2030-01-07"]
+
+
+def test_moving_onto_another_occurrence_keeps_both(template):
+    assert template.put("/api/assignments/r-1@2030-01-07", json={"date": "2030-01-09"}).status_code == 200
+    response = template.put("/api/assignments/r-1@2030-01-09", json={"status": "completed"})
+    assert response.status_code == 200
+    rows = {a["id"]: a for a in template.get(f"/api/assignments/{RANGE}").get_json()}
+    assert rows["r-1@2030-01-07"]["date"] == "2030-01-09"
+    assert rows["r-1@2030-01-07"]["templateId"] is None
+    assert rows["r-1@2030-01-09"]["status"] == "completed"
+    assert len(rows) == 4
+
+
+def test_moving_a_materialized_occurrence(template):
+    template.put("/api/assignments/r-1@2030-01-14", json={"status": "completed"})
+    assert template.put("/api/assignments/r-1@2030-01-14", json={"date": "2030-01-16"}).status_code == 200
+    assert template.put("/api/assignments/r-1@2030-01-16", json={"comments": "ok"}).status_code == 200
+    listed = _listed(template)
+    assert [ident for ident, _ in listed].count("r-1@2030-01-14") == 1
+    assert ("r-1@2030-01-16", "2030-01-16") in listed
+
+
+def test_deleting_an_occurrence_adds_an_exception(template):
+    assert template.delete("/api/assignments/r-1@2030-01-14").status_code == 200
+    assert "r-1@2030-01-14" not in [ident for ident, _ in _listed(template)]
+    assert template.put("/api/assignments/r-1@2030-01-14", json={"status": "completed"}).status_code == 404
+
+
+def test_template_update_is_versioned(template):
+    listed = template.get("/api/assignment-templates/").get_json()[0]
+    resp = template.put("/api/assignment-templates/r-1", json={"weekdays": ["MO"], "version": listed["version"]})
+    assert resp.status_code == 200 and resp.get_json()["version"] == listed["version"] + 1
+    stale = template.put("/api/assignment-templates/r-1", headers={"If-Match": f'"{listed["version"]}"'},
+                         json={"studentIds": ["student-2"]})
+    assert stale.status_code == 412
+    after = template.get("/api/assignment-templates/").get_json()[0]
+    assert after["weekdays"] == ["MO"] and after["studentIds"] == ["student-1"]
+    assert _listed(template) == [("r-1@2030-01-07", "2030-01-07"), ("r-1@2030-01-14", "2030-01-14")]
+
+
+def test_template_update_checks_the_stored_range(template):
+    assert template.put("/api/assignment-templates/r-1", json={"endDate": "2030-01-01"}).status_code == 400
+    assert template.put("/api/assignment-templates/missing", json={"comments": "x"}).status_code == 404
+    assert template.get("/api/assignment-templates/").get_json()[0]["endDate"] == "2030-01-16"
+
+
+def test_concurrent_materialization_returns_the_stored_row(template, app):
+    with app.app_context():
+        tpl = db.session.scalars(select(AssignmentTemplate)).one()
+        row = {"ext_id": "r-1@2030-01-09", "date": date(2030, 1, 9), "classroom_id": tpl.classroom_id,
+               "checklist_id": tpl.checklist_id, "status": "completed", "tenant_id": "default"}
+
+        def other_request_commits_first(session, flush_context, instances):
+            # Between this request's lookup and its INSERT
+            if row:
+                with db.engine.begin() as conn:
+                    conn.execute(insert(TaskAssignment.__table__), row)
+                row.clear()
+
+        event.listen(db.session, "before_flush", other_request_commits_first)
+        try:
+            ta = materialize_occurrence("r-1@2030-01-09")
+        finally:
+            event.remove(db.session, "before_flush", other_request_commits_first)
+        assert ta.status == "completed"
+        db.session.commit()
+    assert template.put("/api/assignments/r-1@2030-01-09", json={"comments": "ok"}).status_code == 200
@@ -0,0 +1,91 @@
+import pytest
+from datetime import date
+from flask import g
+from app.db import db
+from app.models.models import ReportSegment
+from app.report_cache import invalidate, weekly_segments
+
+# A closed (past) Monday-to-Sunday week
+WEEK = date(2025, 1, 6), date(2025, 1, 12)
+
+
+def _stored(app) -> list:
+    with app.app_context():
+        return db.session.scalars(db.select(ReportSegment.week_start)).all()
+
+
+def test_closed_week_is_computed_on_the_primary_and_stored(app):
+    def compute(lo, hi):
+        assert not g.read_replica
+        return {lo: {"n": 1}}
+
+    with app.test_request_context():
+        g.read_replica = True
+        assert weekly_segments("test", *WEEK, compute) == [{"n": 1}]
+        assert g.read_replica
+        assert weekly_segments("test", *WEEK, lambda lo, hi: {lo: {"n": 2}}) == [{"n": 1}]
+    assert _stored(app) == [WEEK[0]]
+
+
+def test_week_written_during_compute_is_not_stored(app):
+    def compute(lo, hi):
+        # A concurrent request changes the week after this compute read it
+        with db.engine.begin() as conn:
+            invalidate(conn, dates=[lo])
+        return {lo: {"n": 1}}
+
+    with app.test_request_context():
+        assert weekly_segments("test", *WEEK, compute) == [{"n": 1}]
+    assert _stored(app) == []
+    with app.test_request_context():
+        weekly_segments("test", *WEEK, lambda lo, hi: {lo: {"n": 2}})
+    assert _stored(app) == [WEEK[0]]
+
+
+W1, W2 = date(2025, 1, 6), date(2025, 1, 13)
+RANGE = "?start=2025-01-06&end=2025-01-19"
+
+
+@pytest.fixture
+def reported(school, app):
+    """Two closed weeks: template r-1 on Mondays and Wednesdays, and assignment a-1 on 2025-01-14."""
+    school.post("/api/assignment-templates/", json={
+        "id": "r-1", "classroomId": "classroom-1", "checklistId": "checklist-1", "studentIds": ["student-1"],
+        "startDate": "2025-01-06", "endDate": "2025-01-19", "weekdays": ["MO", "WE"],
+    })
+    school.post("/api/assignments/", json={
+        "id": "a-1", "date": "2025-01-14", "classroomId": "classroom-1", "checklistId": "checklist-1",
+        "studentIds": ["student-2"], "status": "assigned",
+    })
+    _reports(school)
+    assert set(_stored(app)) == {W1, W2}
+    return school
+
+
+def _reports(client) -> list:
+    return [client.get(f"/api/reports/{name}{RANGE}").get_json() for name in ("weekly-summary", "student-performance")]
+
+
+def _live_reports(client, app) -> list:
+    app.config["REPORT_CACHE_ENABLED"] = False
+    try:
+        return _reports(client)
+    finally:
+        app.config["REPORT_CACHE_ENABLED"] = True
+
+
+@pytest.mark.parametrize("method, path, body, kept", [
+    ("put", "/api/assignments/a-1", {"status": "completed"}, {W1}),
+    ("put", "/api/assignments/r-1@2025-01-08", {"status": "completed"}, {W2}),
+    ("put", "/api/assignment-templates/r-1", {"weekdays": ["MO"]}, set()),
+    ("delete", "/api/assignments/r-1@2025-01-15", None, {W1}),
+], ids=["status change", "materialization", "template weekdays", "occurrence delete"])
+def test_write_invalidates_the_affected_weeks(reported, app, method, path, body, kept):
+    before = _reports(reported)
+    assert getattr(reported, method)(path, json=body).status_code == 200
+    assert set(_stored(app)) == kept
+    after = _reports(reported)
+    assert after != before
+    assert after == _live_reports(reported, app)
+    # Served from the recomputed segments
+    assert set(_stored(app)) == {W1, W2} and _reports(reported) == after
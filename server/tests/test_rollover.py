@@ -0,0 +1,61 @@
+import pytest
+from app import rollover
+
+BEFORE = "2030-01-14"
+# Ends before the cutoff: deleted
+OLD = {
+    "id": "r-old", "classroomId": "classroom-1", "checklistId": "checklist-1", "studentIds": ["student-1"],
+    "startDate": "2030-01-01", "endDate": "2030-01-10", "weekdays": ["MO", "WE"],
+}
+# Runs across the cutoff: shortened to start on it
+RUNNING = {**OLD, "id": "r-run", "endDate": "2030-01-31", "weekdays": ["TU"]}
+
+
+@pytest.fixture
+def templates(school):
+    for body in (OLD, RUNNING):
+        assert school.post("/api/assignment-templates/", json=body).status_code == 201
+    # Materialized occurrences on both sides of the cutoff
+    for ident in ("r-old@2030-01-07", "r-run@2030-01-08", "r-run@2030-01-15"):
+        assert school.put(f"/api/assignments/{ident}", json={"status": "completed"}).status_code == 200
+    return school
+
+
+def _dates(client, start="2030-01-01", end="2030-01-31") -> list[str]:
+    return sorted(a["date"] for a in client.get(f"/api/assignments/?start={start}&end={end}").get_json())
+
+
+def test_purge_deletes_ended_and_shortens_running_templates(templates):
+    response = templates.post("/api/rollover/purge-assignments", json={"before": BEFORE})
+    assert response.get_json() == {"assignments": 2, "templates": 1, "templatesShortened": 1}
+    listed = {t["id"]: t for t in templates.get("/api/assignment-templates/").get_json()}
+    assert list(listed) == ["r-run"] and listed["r-run"]["startDate"] == BEFORE
+    # Nothing before the cutoff, stored or virtual; r-run's later Tuesdays are untouched
+    assert _dates(templates, end="2030-01-13") == []
+    assert _dates(templates) == ["2030-01-15", "2030-01-22", "2030-01-29"]
+
+
+def test_interrupted_purge_brings_no_virtual_occurrences_back(templates, app, monkeypatch):
+    delete = rollover._delete
+
+    def fail_on_assignments(model, *criteria, **kwargs):
+        if model.__tablename__ == "task_assignments":
+            raise RuntimeError("interrupted")
+        return delete(model, *criteria, **kwargs)
+
+    monkeypatch.setattr(rollover, "_delete", fail_on_assignments)
+    with app.test_request_context(), pytest.raises(RuntimeError):
+        rollover.purge_assignments(rollover.date.fromisoformat(BEFORE))
+    # Only the two stored rows are left before the cutoff; rerunning the purge removes them
+    rows = templates.get("/api/assignments/?start=2030-01-01&end=2030-01-13").get_json()
+    assert sorted((a["date"], a["status"]) for a in rows) == [("2030-01-07", "completed"), ("2030-01-08", "completed")]
+
+
+def test_retire_classrooms_resolves_each_identifier_once(school):
+    # ext_id "2" belongs to the third classroom; the second one has numeric id 2
+    school.post("/api/classrooms/", json={"id": "room-x", "classroomId": "RX", "name": "Room X"})
+    school.post("/api/classrooms/", json={"id": "2", "classroomId": "R2", "name": "Room 2"})
+    school.post("/api/assignment-templates/", json={**OLD, "classroomId": "classroom-1"})
+    response = school.post("/api/rollover/retire-classrooms", json={"classroomIds": ["2", "1", "missing", "99"]})
+    assert response.get_json() == {"deleted": ["2"], "inUse": ["classroom-1"], "notFound": ["missing", "99"]}
+    assert sorted(c["id"] for c in school.get("/api/classrooms/").get_json()) == ["classroom-1", "room-x"]
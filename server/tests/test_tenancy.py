@@ -0,0 +1,59 @@
+import pytest
+from app import tenancy
+from app.db import db
+from app.models.models import Tenant
+from conftest import make_app
+
+TEMPLATE = {
+    "id": "r-1", "classroomId": "classroom-1", "checklistId": "checklist-1", "studentIds": ["student-1", "student-2"],
+    "startDate": "2030-01-07", "endDate": "2030-01-16", "weekdays": ["MO", "WE"],
+}
+
+
+@pytest.fixture
+def sharded(tmp_path, monkeypatch):
+    monkeypatch.setattr(tenancy, "DIRECTORY_CACHE_SECONDS", 0)
+    app = make_app(tmp_path, SQLALCHEMY_BINDS={"east": f"sqlite:///{tmp_path / 'east.db'}"})
+    with app.app_context():
+        db.metadata.create_all(db.engines["east"], tables=tenancy.tenant_tables())
+        db.session.add(Tenant(slug="north", name="North"))
+        db.session.commit()
+    client = app.test_client()
+    headers = {"X-Tenant": "north"}
+    client.post("/api/classrooms/", headers=headers, json={"id": "classroom-1", "classroomId": "R1", "name": "Room 1"})
+    for i in range(1, 4):
+        client.post("/api/tasks/", headers=headers, json={"id": f"task-{i}", "name": f"Task {i}"})
+    client.post("/api/checklists/", headers=headers, json={
+        "id": "checklist-1", "name": "Daily", "taskIds": ["task-1", "task-2", "task-3"],
+    })
+    for i in range(1, 8):
+        client.post("/api/students/", headers=headers, json={
+            "id": f"student-{i}", "studentId": f"S{i}", "firstName": "F", "lastName": "L", "classSection": "A",
+        })
+    for day in range(8, 13):
+        client.post("/api/assignments/", headers=headers, json={
+            "date": f"2030-01-{day:02d}", "classroomId": "classroom-1", "checklistId": "checklist-1",
+            "studentIds": ["student-1", "student-2", "student-3"], "status": "assigned", "id": f"a-{day}",
+        })
+    client.post("/api/assignment-templates/", headers=headers, json=TEMPLATE)
+    yield app, client, headers
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_move_copies_in_chunks_and_removes_the_originals(sharded):
+    app, client, headers = sharded
+    before = client.get("/api/assignments/expanded?start=2030-01-01&end=2030-01-31", headers=headers).get_json()
+    with app.app_context():
+        counts = tenancy.move_tenant("north", "east", chunk_size=2)
+    assert counts["students"] == 7
+    assert counts["task_assignment_students"] == 15
+    assert counts["checklist_tasks"] == 3
+    after = client.get("/api/assignments/expanded?start=2030-01-01&end=2030-01-31", headers=headers).get_json()
+    assert after == before
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for table in tenancy.tenant_tables():
+                assert conn.execute(table.select()).first() is None, table.name
+        assert Tenant.query.filter_by(slug="north").one().shard == "east"
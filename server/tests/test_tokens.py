@@ -0,0 +1,100 @@
+import pytest
+from app.db import db
+from app.models.models import AdminUser
+from conftest import make_app
+
+TEMPLATE = {
+    "id": "r-1", "classroomId": "classroom-1", "checklistId": "checklist-1", "studentIds": ["student-1"],
+    "startDate": "2030-01-07", "endDate": "2030-01-07", "weekdays": ["MO"],
+}
+
+
+@pytest.fixture
+def secure(tmp_path):
+    """Client for an app with authentication on: an Administrator, a Teacher and the school fixture's data."""
+    app = make_app(tmp_path, AUTH_REQUIRED=True)
+    with app.app_context():
+        for ext_id, username, role in (("1", "admin", "Administrator"), ("2", "teacher", "Teacher")):
+            user = AdminUser(ext_id=ext_id, username=username, full_name=username, role=role, status="active")
+            user.set_password("secret123")
+            db.session.add(user)
+        db.session.commit()
+    client = app.test_client()
+    client.admin = _login(client, "/api/auth/login", {"username": "admin", "password": "secret123"})
+    client.teacher = _login(client, "/api/auth/login", {"username": "teacher", "password": "secret123"})
+    client.post("/api/classrooms/", headers=client.admin, json={"id": "classroom-1", "classroomId": "R1", "name": "Room 1"})
+    client.post("/api/checklists/", headers=client.admin, json={"id": "checklist-1", "name": "Daily", "taskIds": []})
+    for i in (1, 2):
+        client.post("/api/students/", headers=client.admin, json={
+            "id": f"student-{i}", "studentId": f"S{i}", "firstName": "F", "lastName": "L", "classSection": "A",
+            "password": "student123",
+        })
+    for i in (1, 2):
+        client.post("/api/assignments/", headers=client.admin, json={
+            "id": f"a-{i}", "date": "2030-01-08", "classroomId": "classroom-1", "checklistId": "checklist-1",
+            "studentIds": [f"student-{i}"], "status": "assigned",
+        })
+    client.post("/api/assignment-templates/", headers=client.admin, json=TEMPLATE)
+    client.student = _login(client, "/api/auth/student-login", {"studentId": "S1", "password": "student123"})
+    yield client
+    with app.app_context():
+        db.engine.dispose()
+
+
+def _login(client, path: str, body: dict) -> dict:
+    response = client.post(path, json=body)
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.get_json()['accessToken']}"}
+
+
+def test_student_marks_own_assignment_completed(secure):
+    response = secure.put("/api/assignments/a-1", headers=secure.student, json={"status": "completed"})
+    assert response.status_code == 200
+
+
+def test_student_marks_own_template_occurrence_completed(secure):
+    response = secure.put("/api/assignments/r-1@2030-01-07", headers=secure.student, json={"status": "completed"})
+    assert response.status_code == 200
+
+
+def test_student_cannot_touch_other_assignments(secure):
+    assert secure.put("/api/assignments/a-2", headers=secure.student, json={"status": "completed"}).status_code == 403
+    assert secure.delete("/api/assignments/a-2", headers=secure.student).status_code == 403
+    created = secure.post("/api/assignments/", headers=secure.student, json={
+        "date": "2030-01-09", "classroomId": "classroom-1", "checklistId": "checklist-1",
+        "studentIds": ["student-1"], "status": "assigned",
+    })
+    assert created.status_code == 403
+
+
+def test_student_cannot_change_other_fields(secure):
+    for body in ({"date": "2030-02-01"}, {"studentIds": ["student-1", "student-2"]}):
+        assert secure.put("/api/assignments/a-1", headers=secure.student, json=body).status_code == 403
+
+
+def test_only_administrators_manage_admins_and_rollover(secure):
+    assert secure.get("/api/admin-users/", headers=secure.teacher).status_code == 403
+    response = secure.post("/api/rollover/delete-section", headers=secure.teacher, json={"classSection": "A"})
+    assert response.status_code == 403
+    assert secure.get("/api/students/", headers=secure.teacher).status_code == 200
+    assert secure.get("/api/admin-users/", headers=secure.admin).status_code == 200
+    response = secure.post("/api/rollover/deactivate-section", headers=secure.admin, json={"classSection": "A"})
+    assert response.get_json() == {"deactivated": 2}
+
+
+def test_editing_an_admin_without_a_role_change_keeps_their_tokens(secure):
+    refresh = secure.post("/api/auth/login", json={"username": "admin", "password": "secret123"}).get_json()["refreshToken"]
+    body = {"fullName": "Renamed", "role": "Administrator", "status": "active"}
+    assert secure.put("/api/admin-users/1", headers=secure.admin, json=body).status_code == 200
+    assert secure.get("/api/students/", headers=secure.admin).status_code == 200
+    assert secure.post("/api/auth/refresh", json={"refreshToken": refresh}).status_code == 200
+    assert secure.put("/api/admin-users/2", headers=secure.admin, json={"role": "Administrator"}).status_code == 200
+    assert secure.get("/api/students/", headers=secure.teacher).status_code == 401
+
+
+def test_login_right_after_a_password_change_is_valid(secure):
+    assert secure.put("/api/students/student-1", headers=secure.admin, json={"password": "changed123"}).status_code == 200
+    assert secure.get("/api/assignments/", headers=secure.student).status_code == 401
+    tokens = secure.post("/api/auth/student-login", json={"studentId": "S1", "password": "changed123"}).get_json()
+    assert secure.get("/api/assignments/", headers={"Authorization": f"Bearer {tokens['accessToken']}"}).status_code == 200
+    assert secure.post("/api/auth/refresh", json={"refreshToken": tokens["refreshToken"]}).status_code == 200